@@ -1,9 +1,14 @@
 import reflex as rx
+from fastapi.responses import JSONResponse
 from app.states.data_state import AppState
 from app.components.sidebar import sidebar
 from app.components.main_content_area import (
     main_content_area,
 )
+from app.data.registry import memory_stats
+from app.data.views import view_cache
+from app.startup import mark, startup_stats
+from app.warmup import readiness, warm_up_task
 
 
 def index() -> rx.Component:
@@ -18,4 +23,35 @@ def index() -> rx.Component:
 
 
 app = rx.App(theme=rx.theme(appearance="light"))
-app.add_page(index, on_load=AppState.load_data)
\ No newline at end of file
+app.add_page(index, on_load=AppState.load_data)
+app.register_lifespan_task(warm_up_task)
+
+
+@app.api.get("/metrics/datasets")
+def dataset_metrics() -> dict:
+    """Resident dataset bytes of the worker serving the request."""
+    return memory_stats()
+
+
+@app.api.get("/metrics/views")
+def view_metrics() -> dict:
+    """Hit/miss counters of the shared view-model cache."""
+    return view_cache.stats()
+
+
+@app.api.get("/metrics/startup")
+def startup_metrics() -> dict:
+    """Seconds from process start to each cold-start milestone."""
+    return startup_stats()
+
+
+@app.api.get("/ready")
+def ready() -> JSONResponse:
+    """200 once the warm-up is over, 503 while it runs."""
+    is_ready, status = readiness()
+    return JSONResponse(
+        status, status_code=200 if is_ready else 503
+    )
+
+
+mark("app_imported")
\ No newline at end of file
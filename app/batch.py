@@ -0,0 +1,279 @@
+"""Headless batch processing of workbooks, without the web UI.
+
+`python -m app.batch WORKBOOK... --output DIR` runs every workbook
+through the ingestion of an upload (header check, `parse_and_prepare_df`
+with its quality report), builds the in-memory dataset with its
+indexes and summaries, and writes, under DIR/<workbook name>/:
+
+- `rapport.xlsx` (or `.json`): KPIs and chart series of the filtered
+  view, see `app.data.report`;
+- `donnees_filtrees.csv`: the filtered rows, as the dashboard exports
+  them;
+- `qualite.json`: the data-quality report.
+
+The sidebar filters and display options are command-line options.
+Workbooks are processed in parallel, one process per core by default,
+and a line with the time of each stage is printed as each one ends.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from app.data.dataset import Dataset
+from app.data.ingest import (
+    missing_columns_message,
+    missing_upload_columns,
+    parse_and_prepare_df,
+    read_header,
+)
+from app.data.quality import QualityReport
+from app.data.query import (
+    NumpyExecutor,
+    QueryPlan,
+    filter_predicates,
+)
+from app.data.records import as_frame
+from app.data.registry import (
+    register_dataset,
+    release_dataset,
+)
+from app.data.report import (
+    REPORT_FORMATS,
+    build_report,
+    export_frame,
+    write_report,
+)
+from app.data.schema import ITEM_COLUMNS
+from app.data.timeline import (
+    GRANULARITY_LABELS,
+    GRANULARITY_YEAR,
+)
+from app.data.topk import TOP_K_CHOICES
+
+REPORT_FILE = "rapport"
+ROWS_FILE = "donnees_filtrees.csv"
+QUALITY_FILE = "qualite.json"
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one workbook, with the seconds of each stage."""
+
+    workbook: str
+    rows: int = 0
+    filtered_rows: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def summary(self) -> str:
+        if self.error:
+            return f"{self.workbook}: ÉCHEC - {self.error}"
+        stages = ", ".join(
+            f"{stage} {seconds:.2f}s"
+            for stage, seconds in self.timings.items()
+        )
+        return (
+            f"{self.workbook}: {self.rows} lignes, "
+            f"{self.filtered_rows} filtrées ({stages}; "
+            f"total {sum(self.timings.values()):.2f}s)"
+        )
+
+
+def process_workbook(
+    workbook: Path,
+    output: Path,
+    filters: dict,
+    options: dict[str, tuple],
+    report_format: str,
+) -> BatchResult:
+    """Ingests one workbook and writes its report, rows and quality."""
+    result = BatchResult(str(workbook))
+    started = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal started
+        now = time.perf_counter()
+        result.timings[stage] = now - started
+        started = now
+
+    try:
+        columns, _ = read_header(workbook)
+        missing = missing_upload_columns(columns)
+        if missing:
+            result.error = missing_columns_message(missing)
+            return result
+        df = pd.read_excel(workbook)
+        lap("lecture")
+        quality = QualityReport()
+        prepared_df, error = parse_and_prepare_df(
+            df, is_uploaded_file=True, quality=quality
+        )
+        if error:
+            result.error = error
+            return result
+        lap("préparation")
+        dataset = Dataset.from_frame(prepared_df)
+        dataset_id = register_dataset(
+            dataset, publish=False
+        )
+        result.rows = len(dataset)
+        lap("index")
+        executor = NumpyExecutor()
+
+        def run(plan: QueryPlan):
+            return executor.execute(
+                dataset_id,
+                dataset.version,
+                plan.normalized(),
+            )
+
+        predicates = filter_predicates(**filters)
+        report = build_report(
+            dataset_id,
+            dataset.version,
+            run,
+            predicates,
+            options,
+        )
+        rows = export_frame(
+            as_frame(
+                run(QueryPlan(predicates=predicates)),
+                ITEM_COLUMNS,
+            )
+        )
+        result.filtered_rows = len(rows)
+        release_dataset(dataset_id)
+        lap("agrégats")
+        target = output / workbook.stem
+        target.mkdir(parents=True, exist_ok=True)
+        (
+            target / f"{REPORT_FILE}.{report_format}"
+        ).write_bytes(write_report(report, report_format))
+        rows.to_csv(
+            target / ROWS_FILE,
+            index=False,
+            encoding="utf-8",
+        )
+        (target / QUALITY_FILE).write_text(
+            json.dumps(
+                quality.to_dict(),
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        lap("écriture")
+    except Exception as e:
+        result.error = (
+            f"Erreur de traitement des données: {e}"
+        )
+    return result
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch",
+        description="Traite des classeurs Excel sans l'interface web.",
+    )
+    parser.add_argument(
+        "workbooks",
+        nargs="+",
+        type=Path,
+        metavar="WORKBOOK",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, default=Path("batch")
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processus en parallèle (défaut : un par cœur)",
+    )
+    parser.add_argument(
+        "--format", choices=REPORT_FORMATS, default="xlsx"
+    )
+    parser.add_argument("--pn", default="")
+    parser.add_argument("--urgency", default="")
+    parser.add_argument("--ac-reg", default="")
+    parser.add_argument(
+        "--min-score", type=float, default=0.0
+    )
+    parser.add_argument("--annee", default="")
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        choices=TOP_K_CHOICES,
+        default=TOP_K_CHOICES[0],
+    )
+    parser.add_argument(
+        "--granularity",
+        choices=list(GRANULARITY_LABELS),
+        default=GRANULARITY_YEAR,
+    )
+    parser.add_argument(
+        "--full-detail", action="store_true"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(
+        sys.argv[1:] if argv is None else argv
+    )
+    filters = {
+        "pn": args.pn,
+        "urgency": args.urgency,
+        "ac_reg": args.ac_reg,
+        "min_score": args.min_score,
+        "annee": args.annee,
+    }
+    options = {
+        "top_critical_parts": (args.top_k,),
+        "aog_nrc_by_part": (args.top_k,),
+        "urgency_distribution": (args.full_detail,),
+        "evolution": (args.granularity, args.full_detail),
+    }
+    started = time.perf_counter()
+    failures = 0
+    jobs = max(1, min(args.jobs, len(args.workbooks)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(
+                process_workbook,
+                workbook,
+                args.output,
+                filters,
+                options,
+                args.format,
+            )
+            for workbook in args.workbooks
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            failures += result.error is not None
+            print(result.summary(), flush=True)
+    print(
+        f"{len(args.workbooks) - failures}/{len(args.workbooks)} "
+        f"classeurs traités en "
+        f"{time.perf_counter() - started:.2f}s "
+        f"({jobs} processus) -> {args.output}"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -5,7 +5,7 @@ from app.states.data_state import AppState
 def aog_nrc_chart() -> rx.Component:
     return rx.el.div(
         rx.el.h3(
-            "Répartition %AOG & %NRC par Pièce (Top 10)",
+            f"Répartition %AOG & %NRC par Pièce (Top {AppState.top_k})",
             class_name="text-lg font-semibold text-gray-700 mb-2",
         ),
         rx.recharts.bar_chart(
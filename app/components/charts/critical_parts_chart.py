@@ -5,7 +5,7 @@ from app.states.data_state import AppState
 def critical_parts_chart() -> rx.Component:
     return rx.el.div(
         rx.el.h3(
-            "Top 10 Pièces Critiques (par Score)",
+            f"Top {AppState.top_k} Pièces Critiques (par Score)",
             class_name="text-lg font-semibold text-gray-700 mb-2",
         ),
         rx.recharts.bar_chart(
@@ -26,7 +26,7 @@ def critical_parts_chart() -> rx.Component:
                 fill="#8884d8",
                 radius=[4, 4, 0, 0],
             ),
-            data=AppState.top_10_critical_parts_data,
+            data=AppState.top_critical_parts_data,
             height=300,
         ),
         class_name="bg-white p-4 rounded-lg shadow",
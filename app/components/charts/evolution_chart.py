@@ -1,12 +1,25 @@
 import reflex as rx
 from app.states.data_state import AppState
+from app.data.timeline import GRANULARITY_LABELS
 
 
 def evolution_chart() -> rx.Component:
     return rx.el.div(
-        rx.el.h3(
-            "Évolution Score Moyen & Qté Totale par Année",
-            class_name="text-lg font-semibold text-gray-700 mb-2",
+        rx.el.div(
+            rx.el.h3(
+                f"Évolution Score Moyen & Qté Totale par {AppState.evolution_granularity_label}",
+                class_name="text-lg font-semibold text-gray-700",
+            ),
+            rx.el.select(
+                *[
+                    rx.el.option(label, value=value)
+                    for value, label in GRANULARITY_LABELS.items()
+                ],
+                value=AppState.evolution_granularity,
+                on_change=AppState.set_evolution_granularity,
+                class_name="p-1 border border-gray-300 rounded-md text-sm",
+            ),
+            class_name="flex justify-between items-center mb-2",
         ),
         rx.recharts.line_chart(
             rx.recharts.cartesian_grid(
@@ -11,14 +11,36 @@ from app.components.charts.urgency_pie_chart import (
 from app.components.charts.evolution_chart import (
     evolution_chart,
 )
+from app.components.charts.score_histogram_chart import (
+    score_histogram_chart,
+)
 from app.states.data_state import AppState
 
 
 def charts_section() -> rx.Component:
     return rx.el.div(
         rx.cond(
-            AppState.filtered_data.length() > 0,
+            AppState.filtered_count > 0,
             rx.el.div(
+                rx.el.div(
+                    rx.cond(
+                        AppState.charts_refreshing,
+                        rx.el.span(
+                            "Mise à jour des graphiques…",
+                            class_name="text-sm text-gray-500 animate-pulse",
+                        ),
+                    ),
+                    rx.el.button(
+                        rx.cond(
+                            AppState.chart_full_detail,
+                            "Vue simplifiée des graphiques",
+                            "Afficher tout le détail",
+                        ),
+                        on_click=AppState.toggle_chart_full_detail,
+                        class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded-md hover:bg-gray-300",
+                    ),
+                    class_name="w-full flex justify-end items-center gap-3",
+                ),
                 rx.el.div(
                     critical_parts_chart(),
                     class_name="w-full lg:w-1/2",
@@ -35,6 +57,10 @@ def charts_section() -> rx.Component:
                     evolution_chart(),
                     class_name="w-full lg:w-1/2",
                 ),
+                rx.el.div(
+                    score_histogram_chart(),
+                    class_name="w-full lg:w-1/2",
+                ),
                 class_name="flex flex-wrap gap-4 mb-6",
             ),
             rx.el.div(
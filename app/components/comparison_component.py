@@ -0,0 +1,145 @@
+import reflex as rx
+from app.states.data_state import AppState
+from app.components.quality_report_component import (
+    report_table,
+)
+
+SUMMARY_CARDS = [
+    ("new", "Nouvelles pièces"),
+    ("removed", "Pièces retirées"),
+    ("up", "Plus critiques"),
+    ("down", "Moins critiques"),
+    ("urgency_changed", "Urgence modifiée"),
+]
+DIFF_HEADERS = [
+    "PN",
+    "A/C REG",
+    "Score précédent",
+    "Score actuel",
+    "Écart",
+    "Urgence",
+    "Statut",
+]
+DIFF_KEYS = [
+    "pn",
+    "ac_reg",
+    "previous_score",
+    "current_score",
+    "delta",
+    "urgency",
+    "status",
+]
+
+
+def summary_card(key: str, title: str) -> rx.Component:
+    return rx.el.div(
+        rx.el.h4(
+            title,
+            class_name="text-xs font-medium text-gray-500",
+        ),
+        rx.el.p(
+            AppState.comparison_summary.get(key, 0),
+            class_name="text-xl font-semibold text-indigo-600 mt-1",
+        ),
+        class_name="bg-gray-50 p-3 rounded-md",
+    )
+
+
+def comparison_component() -> rx.Component:
+    return rx.cond(
+        AppState.previous_dataset_id != "",
+        rx.el.div(
+            rx.el.div(
+                rx.el.h3(
+                    "Comparaison avec les données précédentes",
+                    class_name="text-lg font-semibold text-gray-700",
+                ),
+                rx.el.div(
+                    rx.cond(
+                        AppState.comparison_refreshing,
+                        rx.el.span(
+                            "Calcul de la comparaison…",
+                            class_name="text-sm text-gray-500 animate-pulse",
+                        ),
+                        rx.el.span(
+                            f"Calculée en {AppState.comparison_ms} ms",
+                            class_name="text-sm text-gray-500",
+                        ),
+                    ),
+                    rx.el.button(
+                        "Quitter la comparaison",
+                        on_click=AppState.stop_comparison,
+                        class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded-md hover:bg-gray-300",
+                    ),
+                    class_name="flex items-center gap-3",
+                ),
+                class_name="flex justify-between items-center mb-3",
+            ),
+            rx.el.div(
+                *[
+                    summary_card(key, title)
+                    for key, title in SUMMARY_CARDS
+                ],
+                class_name="grid grid-cols-2 sm:grid-cols-5 gap-3 mb-4",
+            ),
+            rx.el.h4(
+                f"Top {AppState.top_k} hausses de score (PN / A/C REG)",
+                class_name="text-sm font-semibold text-gray-600 mb-2",
+            ),
+            rx.recharts.bar_chart(
+                rx.recharts.cartesian_grid(
+                    stroke_dasharray="3 3",
+                    stroke_opacity=0.5,
+                ),
+                rx.recharts.x_axis(
+                    data_key="name",
+                    angle=-30,
+                    text_anchor="end",
+                    height=90,
+                    stroke="#6b7280",
+                ),
+                rx.recharts.y_axis(stroke="#6b7280"),
+                rx.recharts.tooltip(),
+                rx.recharts.bar(
+                    data_key="Écart",
+                    fill="#f97316",
+                    radius=[4, 4, 0, 0],
+                ),
+                data=AppState.comparison_chart_data,
+                height=300,
+            ),
+            report_table(
+                DIFF_HEADERS,
+                DIFF_KEYS,
+                AppState.comparison_increases,
+            ),
+            rx.el.h4(
+                "Nouvelles pièces les plus critiques",
+                class_name="text-sm font-semibold text-gray-600 mb-2",
+            ),
+            report_table(
+                DIFF_HEADERS,
+                DIFF_KEYS,
+                AppState.comparison_new,
+            ),
+            rx.el.h4(
+                "Pièces retirées les plus critiques",
+                class_name="text-sm font-semibold text-gray-600 mb-2",
+            ),
+            report_table(
+                DIFF_HEADERS,
+                DIFF_KEYS,
+                AppState.comparison_removed,
+            ),
+            rx.el.h4(
+                "Pièces dont l'urgence a changé",
+                class_name="text-sm font-semibold text-gray-600 mb-2",
+            ),
+            report_table(
+                DIFF_HEADERS,
+                DIFF_KEYS,
+                AppState.comparison_urgency_changed,
+            ),
+            class_name="bg-white p-4 rounded-lg shadow mb-6",
+        ),
+    )
\ No newline at end of file
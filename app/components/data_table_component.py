@@ -59,6 +59,30 @@ def table_row(item: ItemData) -> rx.Component:
     )
 
 
+def table_pagination() -> rx.Component:
+    button_class = "px-3 py-1 text-sm border border-gray-300 rounded-md bg-white hover:bg-gray-50 disabled:opacity-50"
+    return rx.el.div(
+        rx.el.button(
+            "Précédent",
+            on_click=AppState.previous_table_page,
+            disabled=AppState.table_page == 0,
+            class_name=button_class,
+        ),
+        rx.el.span(
+            f"Page {AppState.table_page + 1} / {AppState.table_page_count} ({AppState.filtered_count} lignes)",
+            class_name="text-sm text-gray-600",
+        ),
+        rx.el.button(
+            "Suivant",
+            on_click=AppState.next_table_page,
+            disabled=AppState.table_page + 1
+            >= AppState.table_page_count,
+            class_name=button_class,
+        ),
+        class_name="flex items-center justify-between mt-3",
+    )
+
+
 def data_table_component() -> rx.Component:
     return rx.el.div(
         rx.el.h3(
@@ -70,13 +94,13 @@ def data_table_component() -> rx.Component:
                 table_header(),
                 rx.el.tbody(
                     rx.foreach(
-                        AppState.filtered_data, table_row
+                        AppState.table_rows, table_row
                     )
                 ),
                 class_name="min-w-full divide-y divide-gray-200",
             ),
             rx.cond(
-                AppState.filtered_data.length() == 0,
+                AppState.filtered_count == 0,
                 rx.el.p(
                     "Aucune donnée à afficher.",
                     class_name="text-center py-4 text-gray-500",
@@ -84,5 +108,6 @@ def data_table_component() -> rx.Component:
             ),
             class_name="overflow-x-auto shadow border-b border-gray-200 sm:rounded-lg",
         ),
+        table_pagination(),
         class_name="bg-white p-4 rounded-lg shadow",
     )
\ No newline at end of file
@@ -1,11 +1,31 @@
 import reflex as rx
 from app.states.data_state import AppState
 
+BUTTON_CLASS = "px-4 py-2 bg-green-600 text-white font-semibold rounded-lg shadow hover:bg-green-700 focus:outline-none focus:ring-2 focus:ring-green-500 focus:ring-opacity-50 transition ease-in-out duration-150 disabled:opacity-50"
+
 
 def download_button() -> rx.Component:
     return rx.el.button(
         "Télécharger les Données Filtrées (CSV)",
         on_click=AppState.download_filtered_data,
-        class_name="px-4 py-2 bg-green-600 text-white font-semibold rounded-lg shadow hover:bg-green-700 focus:outline-none focus:ring-2 focus:ring-green-500 focus:ring-opacity-50 transition ease-in-out duration-150 disabled:opacity-50",
-        disabled=AppState.filtered_data.length() == 0,
+        class_name=BUTTON_CLASS,
+        disabled=AppState.filtered_count == 0,
+    )
+
+
+def report_buttons() -> rx.Component:
+    return rx.el.div(
+        rx.el.button(
+            "Télécharger le Rapport (XLSX)",
+            on_click=AppState.download_report("xlsx"),
+            class_name=BUTTON_CLASS,
+            disabled=AppState.filtered_count == 0,
+        ),
+        rx.el.button(
+            "Rapport (JSON)",
+            on_click=AppState.download_report("json"),
+            class_name=BUTTON_CLASS,
+            disabled=AppState.filtered_count == 0,
+        ),
+        class_name="flex gap-2",
     )
\ No newline at end of file
@@ -0,0 +1,149 @@
+import reflex as rx
+from app.states.data_state import AppState
+
+CELL_CLASS = (
+    "px-4 py-2 whitespace-nowrap text-sm text-gray-700"
+)
+
+
+def breadcrumb() -> rx.Component:
+    link_class = "text-sm text-indigo-600 hover:underline"
+    return rx.el.div(
+        rx.el.button(
+            "Flotte",
+            on_click=AppState.drill_to(0),
+            class_name=link_class,
+        ),
+        rx.foreach(
+            AppState.drill_path,
+            lambda value, index: rx.el.span(
+                rx.el.span(
+                    ">", class_name="mx-2 text-gray-400"
+                ),
+                rx.el.button(
+                    value,
+                    on_click=AppState.drill_to(index + 1),
+                    class_name=link_class,
+                ),
+            ),
+        ),
+        class_name="flex items-center mb-2",
+    )
+
+
+def drilldown_row(
+    node: dict,
+) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            rx.cond(
+                AppState.drilldown_can_expand,
+                rx.el.button(
+                    node["name"],
+                    on_click=AppState.drill_into(
+                        node["name"]
+                    ),
+                    class_name="text-indigo-600 hover:underline",
+                ),
+                node["name"],
+            ),
+            class_name=CELL_CLASS,
+        ),
+        rx.el.td(node["count"], class_name=CELL_CLASS),
+        rx.el.td(node["avg_score"], class_name=CELL_CLASS),
+        rx.el.td(
+            f"{node['avg_aog']}%", class_name=CELL_CLASS
+        ),
+        rx.el.td(
+            f"{node['avg_nrc']}%", class_name=CELL_CLASS
+        ),
+        class_name="hover:bg-gray-50",
+    )
+
+
+def drilldown_search() -> rx.Component:
+    return rx.el.input(
+        placeholder="Rechercher...",
+        on_change=AppState.set_drill_search,
+        value=AppState.drill_search,
+        class_name="w-64 p-2 mb-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-sm",
+    )
+
+
+def drilldown_pagination() -> rx.Component:
+    button_class = "px-3 py-1 text-sm border border-gray-300 rounded-md bg-white hover:bg-gray-50 disabled:opacity-50"
+    return rx.el.div(
+        rx.el.button(
+            "Précédent",
+            on_click=AppState.previous_drill_page,
+            disabled=AppState.drill_page == 0,
+            class_name=button_class,
+        ),
+        rx.el.span(
+            f"Page {AppState.drill_page + 1} / {AppState.drilldown_page_count} ({AppState.drilldown_node_count} éléments)",
+            rx.cond(
+                AppState.drilldown_more_count > 0,
+                f" - {AppState.drilldown_more_count} de plus…",
+                "",
+            ),
+            class_name="text-sm text-gray-600",
+        ),
+        rx.el.button(
+            "Suivant",
+            on_click=AppState.next_drill_page,
+            disabled=AppState.drill_page + 1
+            >= AppState.drilldown_page_count,
+            class_name=button_class,
+        ),
+        class_name="flex items-center justify-between mt-3",
+    )
+
+
+def drilldown_component() -> rx.Component:
+    header_class = "px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider bg-gray-50"
+    return rx.el.div(
+        rx.el.h3(
+            "Analyse par Flotte",
+            class_name="text-lg font-semibold text-gray-700 mb-2",
+        ),
+        breadcrumb(),
+        drilldown_search(),
+        rx.el.div(
+            rx.el.table(
+                rx.el.thead(
+                    rx.el.tr(
+                        rx.el.th(
+                            AppState.drilldown_level_label,
+                            class_name=header_class,
+                        ),
+                        rx.el.th(
+                            "Lignes",
+                            class_name=header_class,
+                        ),
+                        rx.el.th(
+                            "Score Moyen",
+                            class_name=header_class,
+                        ),
+                        rx.el.th(
+                            "% AOG Moyen",
+                            class_name=header_class,
+                        ),
+                        rx.el.th(
+                            "% NRC Moyen",
+                            class_name=header_class,
+                        ),
+                    )
+                ),
+                rx.el.tbody(
+                    rx.foreach(
+                        AppState.drilldown_rows,
+                        drilldown_row,
+                    )
+                ),
+                class_name="min-w-full divide-y divide-gray-200",
+            ),
+            class_name="overflow-x-auto shadow border-b border-gray-200 sm:rounded-lg",
+        ),
+        drilldown_pagination(),
+        class_name="bg-white p-4 rounded-lg shadow mb-6",
+    )
\ No newline at end of file
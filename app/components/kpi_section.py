@@ -39,5 +39,17 @@ def kpi_section() -> rx.Component:
             AppState.avg_percent_nrc.to_string(),
             unit="%",
         ),
+        kpi_card(
+            "Score Criticité Médian",
+            AppState.median_score_criticite.to_string(),
+        ),
+        kpi_card(
+            "Score Criticité P90",
+            AppState.p90_score_criticite.to_string(),
+        ),
+        kpi_card(
+            "Score Criticité P99",
+            AppState.p99_score_criticite.to_string(),
+        ),
         class_name="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4 mb-6",
     )
\ No newline at end of file
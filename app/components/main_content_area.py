@@ -5,7 +5,22 @@ from app.components.charts_section import charts_section
 from app.components.data_table_component import (
     data_table_component,
 )
-from app.components.download_button import download_button
+from app.components.download_button import (
+    download_button,
+    report_buttons,
+)
+from app.components.drilldown_component import (
+    drilldown_component,
+)
+from app.components.quality_report_component import (
+    quality_report_component,
+)
+from app.components.comparison_component import (
+    comparison_component,
+)
+from app.components.score_simulation_component import (
+    score_simulation_component,
+)
 
 
 def main_content_area() -> rx.Component:
@@ -46,11 +61,16 @@ def main_content_area() -> rx.Component:
                     ),
                     kpi_section(),
                     charts_section(),
+                    comparison_component(),
+                    drilldown_component(),
+                    score_simulation_component(),
                     rx.el.div(
+                        report_buttons(),
                         download_button(),
-                        class_name="my-4 flex justify-end",
+                        class_name="my-4 flex justify-end gap-2",
                     ),
                     data_table_component(),
+                    quality_report_component(),
                 ),
             ),
             class_name="p-6",
@@ -0,0 +1,105 @@
+import reflex as rx
+from app.states.data_state import AppState
+
+CELL_CLASS = (
+    "px-4 py-2 whitespace-nowrap text-sm text-gray-700"
+)
+HEADER_CLASS = "px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider bg-gray-50"
+
+
+def report_table(
+    headers: list[str], keys: list[str], rows: rx.Var
+) -> rx.Component:
+    return rx.el.div(
+        rx.el.table(
+            rx.el.thead(
+                rx.el.tr(
+                    *[
+                        rx.el.th(
+                            header, class_name=HEADER_CLASS
+                        )
+                        for header in headers
+                    ]
+                )
+            ),
+            rx.el.tbody(
+                rx.foreach(
+                    rows,
+                    lambda row: rx.el.tr(
+                        *[
+                            rx.el.td(
+                                row[key],
+                                class_name=CELL_CLASS,
+                            )
+                            for key in keys
+                        ],
+                        class_name="hover:bg-gray-50",
+                    ),
+                )
+            ),
+            class_name="min-w-full divide-y divide-gray-200",
+        ),
+        class_name="overflow-x-auto shadow border-b border-gray-200 sm:rounded-lg mb-4",
+    )
+
+
+def quality_report_component() -> rx.Component:
+    return rx.cond(
+        AppState.quality_rows_checked > 0,
+        rx.el.details(
+            rx.el.summary(
+                "Qualité des données",
+                rx.el.span(
+                    f" ({AppState.quality_rows_checked} lignes contrôlées, {AppState.quality_issues.length()} problèmes)",
+                    class_name="text-sm font-normal text-gray-500",
+                ),
+                class_name="text-lg font-semibold text-gray-700 cursor-pointer mb-2",
+            ),
+            rx.cond(
+                AppState.quality_issues.length() > 0,
+                rx.el.div(
+                    report_table(
+                        [
+                            "Problème",
+                            "Colonne",
+                            "Lignes",
+                            "Part des lignes",
+                        ],
+                        [
+                            "issue",
+                            "column",
+                            "count",
+                            "rate",
+                        ],
+                        AppState.quality_issues,
+                    ),
+                    rx.el.h4(
+                        "Exemples de lignes concernées",
+                        class_name="text-sm font-semibold text-gray-600 mb-2",
+                    ),
+                    report_table(
+                        [
+                            "Ligne",
+                            "PN",
+                            "Colonne",
+                            "Valeur",
+                            "Problème",
+                        ],
+                        [
+                            "row",
+                            "pn",
+                            "column",
+                            "value",
+                            "issue",
+                        ],
+                        AppState.quality_samples,
+                    ),
+                ),
+                rx.el.p(
+                    "Aucun problème détecté.",
+                    class_name="text-sm text-gray-500",
+                ),
+            ),
+            class_name="bg-white p-4 rounded-lg shadow mb-6",
+        ),
+    )
\ No newline at end of file
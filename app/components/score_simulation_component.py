@@ -0,0 +1,87 @@
+import reflex as rx
+from app.states.data_state import AppState, FACTOR_LABELS
+from app.components.quality_report_component import (
+    report_table,
+)
+
+
+def weight_input(name: str, label: str) -> rx.Component:
+    return rx.el.div(
+        rx.el.label(
+            label,
+            class_name="block text-xs font-medium text-gray-600 mb-1",
+        ),
+        rx.el.input(
+            type="number",
+            min="0",
+            step="0.5",
+            value=AppState.score_weight_inputs[name],
+            on_change=lambda value: AppState.set_score_weight(
+                name, value
+            ),
+            class_name="w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-sm",
+        ),
+    )
+
+
+def score_simulation_component() -> rx.Component:
+    return rx.el.details(
+        rx.el.summary(
+            "Simulation du score de criticité",
+            class_name="text-lg font-semibold text-gray-700 cursor-pointer mb-2",
+        ),
+        rx.el.p(
+            "Le score est recalculé à partir des fréquences, des visites et des quantités avec les poids ci-dessous. « Appliquer » remplace le score, le % NRC et le % AOG de toutes les lignes par les valeurs recalculées.",
+            class_name="text-sm text-gray-500 mb-3",
+        ),
+        rx.el.div(
+            *[
+                weight_input(name, label)
+                for name, label in FACTOR_LABELS.items()
+            ],
+            class_name="grid grid-cols-2 sm:grid-cols-5 gap-3 mb-3",
+        ),
+        rx.el.div(
+            rx.el.button(
+                "Simuler",
+                on_click=AppState.simulate_scores,
+                class_name="px-3 py-1 text-sm bg-indigo-600 text-white rounded-md hover:bg-indigo-700",
+            ),
+            rx.el.button(
+                "Poids par défaut",
+                on_click=AppState.reset_score_weights,
+                class_name="px-3 py-1 text-sm bg-gray-200 text-gray-700 rounded-md hover:bg-gray-300",
+            ),
+            rx.el.button(
+                rx.cond(
+                    AppState.score_applying,
+                    "Application...",
+                    "Appliquer au jeu de données",
+                ),
+                on_click=AppState.apply_score_weights,
+                disabled=AppState.score_applying,
+                class_name="px-3 py-1 text-sm bg-emerald-600 text-white rounded-md hover:bg-emerald-700 disabled:opacity-50",
+            ),
+            class_name="flex gap-3 mb-3",
+        ),
+        rx.cond(
+            AppState.score_simulation_active,
+            rx.el.div(
+                rx.el.p(
+                    f"{AppState.score_simulation_row_count} lignes recalculées en {AppState.score_simulation_ms} ms. Score moyen : {AppState.score_simulation_avg_current} actuel, {AppState.score_simulation_avg_simulated} simulé.",
+                    class_name="text-sm text-gray-600 mb-2",
+                ),
+                report_table(
+                    [
+                        "PN",
+                        "Score actuel",
+                        "Score simulé",
+                        "Écart",
+                    ],
+                    ["pn", "current", "simulated", "delta"],
+                    AppState.score_simulation_rows,
+                ),
+            ),
+        ),
+        class_name="bg-white p-4 rounded-lg shadow mb-6",
+    )
\ No newline at end of file
@@ -18,6 +18,10 @@ from app.states.data_state import (
     COL_AC_REG,
     COL_ANNEE,
     COL_URGENCY,
+    UPLOAD_MODE_REPLACE,
+    UPLOAD_MODE_UPSERT,
+    UPLOAD_MODE_COMPARE,
+    TOP_K_CHOICES,
 )
 
 
@@ -139,6 +143,30 @@ def file_upload_component() -> rx.Component:
             width="100%",
             class_name="cursor-pointer bg-gray-50 hover:bg-gray-100 hover:border-indigo-500 transition-colors duration-150 ease-in-out",
         ),
+        rx.el.div(
+            rx.el.label(
+                "Mode d'import:",
+                class_name="block text-xs font-medium text-gray-700 mb-1",
+            ),
+            rx.el.select(
+                rx.el.option(
+                    "Remplacer les données",
+                    value=UPLOAD_MODE_REPLACE,
+                ),
+                rx.el.option(
+                    "Ajouter / mettre à jour (PN + A/C REG + Année)",
+                    value=UPLOAD_MODE_UPSERT,
+                ),
+                rx.el.option(
+                    "Comparer avec les données actuelles",
+                    value=UPLOAD_MODE_COMPARE,
+                ),
+                value=AppState.upload_mode,
+                on_change=AppState.set_upload_mode,
+                class_name="w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-xs",
+            ),
+            class_name="mt-2",
+        ),
         rx.cond(
             AppState.is_loading,
             rx.el.div(
@@ -195,15 +223,18 @@ def sidebar() -> rx.Component:
                             "Toutes les urgences", value=""
                         ),
                         rx.foreach(
-                            AppState.unique_urgencies,
-                            lambda urgency: rx.el.option(
-                                urgency, value=urgency
+                            AppState.filter_options[
+                                "urgency"
+                            ],
+                            lambda option: rx.el.option(
+                                option["label"],
+                                value=option["value"],
                             ),
                         ),
                         value=AppState.filter_urgency,
                         on_change=AppState.set_filter_urgency,
                         class_name="w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-sm",
-                        key=f"filter_urgency_{AppState.raw_data.length()}",
+                        key=f"filter_urgency_{AppState.dataset_id}_{AppState.dataset_version}",
                     ),
                 ),
                 filter_input_group(
@@ -213,15 +244,18 @@ def sidebar() -> rx.Component:
                             "Tous les A/C REG", value=""
                         ),
                         rx.foreach(
-                            AppState.unique_ac_regs,
-                            lambda ac_reg: rx.el.option(
-                                ac_reg, value=ac_reg
+                            AppState.filter_options[
+                                "ac_reg"
+                            ],
+                            lambda option: rx.el.option(
+                                option["label"],
+                                value=option["value"],
                             ),
                         ),
                         value=AppState.filter_ac_reg,
                         on_change=AppState.set_filter_ac_reg,
                         class_name="w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-sm",
-                        key=f"filter_ac_reg_{AppState.raw_data.length()}",
+                        key=f"filter_ac_reg_{AppState.dataset_id}_{AppState.dataset_version}",
                     ),
                 ),
                 filter_input_group(
@@ -234,6 +268,20 @@ def sidebar() -> rx.Component:
                         default_value=AppState.filter_min_score.to_string(),
                     ),
                 ),
+                filter_input_group(
+                    "Top pièces affichées:",
+                    rx.el.select(
+                        *[
+                            rx.el.option(
+                                f"Top {k}", value=str(k)
+                            )
+                            for k in TOP_K_CHOICES
+                        ],
+                        value=AppState.top_k.to_string(),
+                        on_change=AppState.set_top_k,
+                        class_name="w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-sm",
+                    ),
+                ),
                 filter_input_group(
                     "Année:",
                     rx.el.select(
@@ -241,15 +289,18 @@ def sidebar() -> rx.Component:
                             "Toutes les années", value=""
                         ),
                         rx.foreach(
-                            AppState.unique_annees,
-                            lambda annee: rx.el.option(
-                                annee, value=annee
+                            AppState.filter_options[
+                                "annee"
+                            ],
+                            lambda option: rx.el.option(
+                                option["label"],
+                                value=option["value"],
                             ),
                         ),
                         value=AppState.filter_annee,
                         on_change=AppState.set_filter_annee,
                         class_name="w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500 text-sm",
-                        key=f"filter_annee_{AppState.raw_data.length()}",
+                        key=f"filter_annee_{AppState.dataset_id}_{AppState.dataset_version}",
                     ),
                 ),
                 class_name="px-4",
@@ -0,0 +1,348 @@
+"""Per-group summary tables maintained alongside a dataset.
+
+`GroupedSums` keeps, for every value of a group column (PN, year or
+month), the row count and the sums of a few numeric columns, both over
+the whole dataset and split by the value of each equality filter
+column. Grouped queries with at most one such filter then read
+O(groups in the selection) table rows instead of scanning the dataset
+rows.
+"""
+
+from typing import Collection, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.data.dataset import (
+    Dataset,
+    DatasetChange,
+    DerivedIndex,
+)
+from app.data.schema import MONTH_COLUMN
+
+PART_SUM_COLUMNS = [
+    "percent_aog",
+    "percent_nrc",
+    "score_criticite",
+    "quantite_moyenne",
+]
+PART_PARTIAL_COLUMNS = ["urgency", "ac_reg", "annee"]
+TIME_SUM_COLUMNS = ["score_criticite", "quantite_moyenne"]
+
+
+class SumTable:
+    """Row count and column sums per key, in growable arrays."""
+
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+        self.index: dict[Hashable, int] = {}
+        self.keys: list = []
+        self._counts = np.zeros(0)
+        self._sums = {col: np.zeros(0) for col in columns}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[: len(self.keys)]
+
+    def sums(self, column: str) -> np.ndarray:
+        return self._sums[column][: len(self.keys)]
+
+    def _on_new_key(self, key: Hashable, row: int) -> None:
+        pass
+
+    def _rows_for(self, keys: list) -> np.ndarray:
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            row = self.index.get(key)
+            if row is None:
+                row = len(self.keys)
+                self.index[key] = row
+                self.keys.append(key)
+                self._on_new_key(key, row)
+            rows[i] = row
+        capacity = len(self._counts)
+        if len(self.keys) > capacity:
+            new_capacity = max(len(self.keys), capacity * 2)
+            self._counts = np.resize(
+                self._counts, new_capacity
+            )
+            self._counts[capacity:] = 0.0
+            for col in self.columns:
+                grown = np.resize(
+                    self._sums[col], new_capacity
+                )
+                grown[capacity:] = 0.0
+                self._sums[col] = grown
+        return rows
+
+    def load(
+        self,
+        keys: list,
+        counts: np.ndarray,
+        sums: dict[str, np.ndarray],
+    ) -> None:
+        """Bulk-loads pre-aggregated keys, e.g. from a groupby."""
+        rows = self._rows_for(keys)
+        self._counts[rows] = counts
+        for col in self.columns:
+            self._sums[col][rows] = sums[col]
+
+    def add(
+        self,
+        keys: list,
+        values: dict[str, np.ndarray],
+        sign: float = 1.0,
+    ) -> None:
+        rows = self._rows_for(keys)
+        np.add.at(self._counts, rows, sign)
+        for col in self.columns:
+            np.add.at(
+                self._sums[col], rows, sign * values[col]
+            )
+
+
+class PartialSumTable(SumTable):
+    """SumTable keyed on (filter value, group value) pairs."""
+
+    def __init__(self, columns: list[str]):
+        super().__init__(columns)
+        self.by_value: dict[Hashable, list[int]] = {}
+
+    def _on_new_key(self, key: Hashable, row: int) -> None:
+        self.by_value.setdefault(key[0], []).append(row)
+
+    def rows_for_value(self, value: Hashable) -> np.ndarray:
+        return np.asarray(
+            self.by_value.get(value, []), dtype=np.int64
+        )
+
+
+class GroupedSums(DerivedIndex):
+    """Per-group counts and sums, overall and per filter value."""
+
+    def __init__(
+        self,
+        group_column: str,
+        value_columns: list[str],
+        partial_columns: list[str],
+    ):
+        self.group_column = group_column
+        self.value_columns = value_columns
+        self.partial_columns = partial_columns
+        self.total = SumTable(value_columns)
+        self.partials: dict[str, PartialSumTable] = {}
+
+    def depends_on(self, columns: Collection[str]) -> bool:
+        return any(
+            col in columns
+            for col in [
+                self.group_column,
+                *self.value_columns,
+                *self.partial_columns,
+            ]
+        )
+
+    def build(self, dataset: Dataset) -> None:
+        frame = pd.DataFrame(
+            {
+                col: dataset.column(col)
+                for col in [
+                    self.group_column,
+                    *self.value_columns,
+                    *self.partial_columns,
+                ]
+            }
+        )
+        self.total = SumTable(self.value_columns)
+        self._load(self.total, frame, [self.group_column])
+        self.partials = {}
+        for col in self.partial_columns:
+            table = PartialSumTable(self.value_columns)
+            self._load(
+                table, frame, [col, self.group_column]
+            )
+            self.partials[col] = table
+
+    def _load(
+        self,
+        table: SumTable,
+        frame: pd.DataFrame,
+        by: list[str],
+    ) -> None:
+        grouped = frame.groupby(by, sort=False)[
+            self.value_columns
+        ]
+        sums = grouped.sum()
+        table.load(
+            sums.index.tolist(),
+            grouped.size().to_numpy(dtype=np.float64),
+            {
+                col: sums[col].to_numpy()
+                for col in self.value_columns
+            },
+        )
+
+    def _add(
+        self, columns: dict[str, np.ndarray], sign: float
+    ) -> None:
+        groups = columns[self.group_column].tolist()
+        values = {
+            col: columns[col] for col in self.value_columns
+        }
+        self.total.add(groups, values, sign)
+        for col, table in self.partials.items():
+            table.add(
+                list(zip(columns[col].tolist(), groups)),
+                values,
+                sign,
+            )
+
+    def apply(
+        self, dataset: Dataset, change: DatasetChange
+    ) -> None:
+        if len(change.updated):
+            self._add(change.previous, -1.0)
+        touched = change.touched
+        self._add(
+            {
+                col: dataset.column(col)[touched]
+                for col in [
+                    self.group_column,
+                    *self.value_columns,
+                    *self.partial_columns,
+                ]
+            },
+            1.0,
+        )
+
+    def _tables(self) -> dict[str, SumTable]:
+        return {
+            "total": self.total,
+            **{
+                f"partial_{col}": table
+                for col, table in self.partials.items()
+            },
+        }
+
+    def dump(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """JSON-ready description and arrays to save, see `restore`."""
+        meta = {
+            "group_column": self.group_column,
+            "value_columns": self.value_columns,
+            "partial_columns": self.partial_columns,
+            "keys": {},
+        }
+        arrays = {}
+        for name, table in self._tables().items():
+            meta["keys"][name] = table.keys
+            arrays[f"{name}.counts"] = table.counts
+            for col in self.value_columns:
+                arrays[f"{name}.{col}"] = table.sums(col)
+        return meta, arrays
+
+    @classmethod
+    def restore(
+        cls, meta: dict, arrays: dict[str, np.ndarray]
+    ) -> "GroupedSums":
+        """Tables saved by `dump`, keys back to tuples where paired."""
+        index = cls(
+            meta["group_column"],
+            meta["value_columns"],
+            meta["partial_columns"],
+        )
+        index.partials = {
+            col: PartialSumTable(index.value_columns)
+            for col in index.partial_columns
+        }
+        for name, table in index._tables().items():
+            keys = meta["keys"][name]
+            table.load(
+                (
+                    keys
+                    if table is index.total
+                    else [tuple(key) for key in keys]
+                ),
+                arrays[f"{name}.counts"],
+                {
+                    col: arrays[f"{name}.{col}"]
+                    for col in index.value_columns
+                },
+            )
+        return index
+
+    def groups(
+        self,
+        filter_column: Optional[str] = None,
+        filter_value: Optional[Hashable] = None,
+    ) -> tuple[
+        np.ndarray, np.ndarray, dict[str, np.ndarray]
+    ]:
+        """Group values, counts and sums, optionally for one filter value.
+
+        Groups whose count dropped to zero after upserts are omitted.
+        """
+        if filter_column is None:
+            table: SumTable = self.total
+            rows = np.arange(len(table))
+            groups = np.asarray(table.keys, dtype=object)
+        else:
+            table = self.partials[filter_column]
+            rows = table.rows_for_value(filter_value)
+            groups = np.asarray(
+                [
+                    table.keys[row][1]
+                    for row in rows.tolist()
+                ],
+                dtype=object,
+            )
+        counts = table.counts[rows]
+        present = counts > 0
+        return (
+            groups[present],
+            counts[present],
+            {
+                col: table.sums(col)[rows][present]
+                for col in self.value_columns
+            },
+        )
+
+
+def register_summaries(dataset: Dataset) -> None:
+    """Builds the per-PN, per-aircraft, per-year and per-month tables.
+
+    The month table is the base of the year → quarter → month rollup
+    of the evolution chart, see `app.data.timeline`. The score sketches
+    of `app.data.sketches` are registered along with them.
+    """
+    from app.data.sketches import (
+        SKETCH_COLUMN,
+        ScoreSketches,
+    )
+
+    summaries = {
+        "pn": PART_SUM_COLUMNS,
+        "ac_reg": PART_SUM_COLUMNS,
+        "annee": TIME_SUM_COLUMNS,
+        MONTH_COLUMN: TIME_SUM_COLUMNS,
+    }
+    for group_column, value_columns in summaries.items():
+        name = f"sums_{group_column}"
+        if not dataset.has_derived(name):
+            dataset.register_derived(
+                name,
+                GroupedSums(
+                    group_column,
+                    value_columns,
+                    [
+                        col
+                        for col in PART_PARTIAL_COLUMNS
+                        if col != group_column
+                    ],
+                ),
+            )
+    name = f"sketches_{SKETCH_COLUMN}"
+    if not dataset.has_derived(name):
+        dataset.register_derived(name, ScoreSketches())
\ No newline at end of file
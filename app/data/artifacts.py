@@ -0,0 +1,151 @@
+"""Precomputed artifacts of the default dataset.
+
+Parsing the default workbook with pandas and openpyxl takes seconds on
+every cold start. Once prepared, the default dataset is written in the
+registry's column format under `DASHBOARD_ARTIFACT_DIR` (`.artifacts`
+by default), keyed by a digest of the workbook so an edited workbook
+gets new artifacts. A worker maps them instead of parsing, and every
+session of every worker shares the one `default-<digest>` dataset.
+
+`python -m app.data.artifacts [workbook]` builds them ahead of a
+deployment; the app also writes them after it parses the workbook.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.data.dataset import Dataset
+from app.data.quality import QualityReport
+from app.data.registry import (
+    get_dataset,
+    read_dataset,
+    register_dataset,
+    write_dataset,
+)
+from app.data.store import file_signature
+
+DEFAULT_WORKBOOK = Path(
+    "assets/Tableau_Final_Items_Critiques.xlsx"
+)
+ARTIFACT_DIR_ENV = "DASHBOARD_ARTIFACT_DIR"
+DEFAULT_ARTIFACT_DIR = ".artifacts"
+SHARED_PREFIX = "default-"
+ARTIFACT_VERSION = 1
+QUALITY_FILE = "quality.json"
+
+_dataset_ids: dict[tuple[str, str], str] = {}
+
+
+def artifact_dir() -> Path:
+    return Path(
+        os.environ.get(ARTIFACT_DIR_ENV, "")
+        or DEFAULT_ARTIFACT_DIR
+    )
+
+
+def default_dataset_id(path: Path) -> str:
+    """Id of the dataset prepared from this workbook content.
+
+    The digest is computed once per version of the file, as identified
+    by its path, size and modification time.
+    """
+    key = (str(path.resolve()), file_signature(path))
+    dataset_id = _dataset_ids.get(key)
+    if dataset_id is None:
+        digest = hashlib.sha1()
+        with open(path, "rb") as handle:
+            for chunk in iter(
+                lambda: handle.read(1 << 20), b""
+            ):
+                digest.update(chunk)
+        dataset_id = SHARED_PREFIX + digest.hexdigest()[:16]
+        _dataset_ids[key] = dataset_id
+    return dataset_id
+
+
+def is_shared_dataset(dataset_id: str) -> bool:
+    """Whether sessions share the dataset, so none may change it."""
+    return dataset_id.startswith(SHARED_PREFIX)
+
+
+def load_default_dataset(path: Path) -> Optional[Dataset]:
+    """The default dataset from memory, the registry or the artifacts."""
+    dataset_id = default_dataset_id(path)
+    dataset = get_dataset(dataset_id)
+    if dataset is not None:
+        return dataset
+    dataset = read_dataset(
+        artifact_dir() / dataset_id,
+        dataset_id,
+        ARTIFACT_VERSION,
+    )
+    if dataset is not None:
+        register_dataset(dataset)
+    return dataset
+
+
+def default_quality_report(
+    dataset_id: str,
+) -> Optional[QualityReport]:
+    """The data-quality report written with the artifacts, if any."""
+    try:
+        return QualityReport.from_dict(
+            json.loads(
+                (
+                    artifact_dir()
+                    / dataset_id
+                    / QUALITY_FILE
+                ).read_text()
+            )
+        )
+    except FileNotFoundError:
+        return None
+
+
+def build_default_dataset(
+    path: Path,
+) -> Tuple[Optional[Dataset], Optional[str]]:
+    """Parses the workbook, writes its artifacts and registers it."""
+    import pandas as pd
+
+    from app.data.ingest import parse_and_prepare_df
+
+    quality = QualityReport()
+    prepared_df, error = parse_and_prepare_df(
+        pd.read_excel(path), quality=quality
+    )
+    if error:
+        return None, error
+    dataset_id = default_dataset_id(path)
+    dataset = Dataset.from_frame(
+        prepared_df, dataset_id=dataset_id
+    )
+    target = artifact_dir() / dataset_id
+    write_dataset(dataset, target)
+    (target / QUALITY_FILE).write_text(
+        json.dumps(quality.to_dict())
+    )
+    register_dataset(dataset)
+    return dataset, None
+
+
+if __name__ == "__main__":
+    workbook = Path(
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else DEFAULT_WORKBOOK
+    )
+    started = time.perf_counter()
+    dataset, error = build_default_dataset(workbook)
+    if error:
+        sys.exit(error)
+    print(
+        f"{workbook}: {len(dataset)} rows -> "
+        f"{artifact_dir() / dataset.dataset_id} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
\ No newline at end of file
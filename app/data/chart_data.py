@@ -0,0 +1,113 @@
+"""Level-of-detail reduction of chart payloads.
+
+Line series are downsampled with Largest-Triangle-Three-Buckets, which
+keeps the visual shape (peaks, dips) of a series with far fewer points;
+categorical series keep their largest categories and fold the rest into
+an "Autres" entry. Full resolution is only sent when the user asks for
+the detailed view.
+"""
+
+from typing import Union
+
+import numpy as np
+
+MAX_LINE_POINTS = 200
+MAX_CATEGORIES = 6
+OTHER_LABEL = "Autres"
+
+ChartRow = dict[str, Union[str, int, float]]
+
+
+def lttb_indices(
+    values: np.ndarray, threshold: int
+) -> np.ndarray:
+    """Indices of the points LTTB keeps out of `values`.
+
+    Points are assumed evenly spaced on the x axis. The first and last
+    points are always kept; each bucket in between contributes the point
+    forming the largest triangle with the previously kept point and the
+    mean of the next bucket. `threshold` must be at least 3.
+    """
+    count = len(values)
+    if threshold >= count:
+        return np.arange(count)
+    x = np.arange(count, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(
+        np.int64
+    )
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = (
+            edges[bucket + 2]
+            if bucket + 2 < len(edges)
+            else count
+        )
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        areas = np.abs(
+            (x[previous] - next_x)
+            * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop])
+            * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample_line(
+    rows: list[ChartRow],
+    value_keys: list[str],
+    max_points: int = MAX_LINE_POINTS,
+) -> list[ChartRow]:
+    """Keeps at most `max_points` rows of an x-ordered line chart.
+
+    Each series gets an equal share of the budget; the rows kept for any
+    series are kept for all, since they share the x axis.
+    """
+    if len(rows) <= max_points or not value_keys:
+        return rows
+    share = max(max_points // len(value_keys), 3)
+    kept = np.unique(
+        np.concatenate(
+            [
+                lttb_indices(
+                    np.array(
+                        [row[key] for row in rows],
+                        dtype=np.float64,
+                    ),
+                    share,
+                )
+                for key in value_keys
+            ]
+        )
+    )
+    return [rows[i] for i in kept.tolist()]
+
+
+def top_n_with_other(
+    rows: list[ChartRow],
+    value_key: str,
+    label_key: str = "name",
+    max_categories: int = MAX_CATEGORIES,
+) -> list[ChartRow]:
+    """Largest categories first, the tail summed into one "Autres" row."""
+    if len(rows) <= max_categories:
+        return rows
+    ordered = sorted(
+        rows, key=lambda row: row[value_key], reverse=True
+    )
+    head = ordered[: max_categories - 1]
+    other = sum(
+        row[value_key]
+        for row in ordered[max_categories - 1 :]
+    )
+    return [
+        *head,
+        {label_key: OTHER_LABEL, value_key: other},
+    ]
\ No newline at end of file
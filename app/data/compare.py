@@ -0,0 +1,275 @@
+"""Differences between a previous and a current dataset.
+
+Parts are matched on (PN, A/C REG). Both sides' keys are dictionary-
+encoded together with `pd.factorize`, so the join is a pair of
+`np.bincount` passes over integer codes rather than a hash merge of
+rows. A part's score on each side is the mean over its rows (all
+years), and its urgency is the one of its latest year.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.data.query import Predicate, select_columns
+from app.data.topk import top_k_indices
+
+DIFF_KEYS = ("pn", "ac_reg")
+DIFF_COLUMNS = (
+    *DIFF_KEYS,
+    "annee",
+    "urgency",
+    "score_criticite",
+)
+STATUS_LABELS = {
+    "new": "Nouvelle",
+    "removed": "Retirée",
+    "up": "Plus critique",
+    "down": "Moins critique",
+    "same": "Inchangée",
+}
+
+
+@dataclass
+class DatasetDiff:
+    """One entry per (PN, A/C REG) present on either side.
+
+    Scores are NaN and urgencies empty on the side a part is absent
+    from.
+    """
+
+    pn: np.ndarray
+    ac_reg: np.ndarray
+    previous_score: np.ndarray
+    current_score: np.ndarray
+    previous_urgency: np.ndarray
+    current_urgency: np.ndarray
+
+    @property
+    def delta(self) -> np.ndarray:
+        return self.current_score - self.previous_score
+
+    def status(self) -> np.ndarray:
+        """A `STATUS_LABELS` key per part."""
+        delta = self.delta
+        return np.select(
+            [
+                np.isnan(self.previous_score),
+                np.isnan(self.current_score),
+                delta > 0,
+                delta < 0,
+            ],
+            ["new", "removed", "up", "down"],
+            "same",
+        )
+
+    def summary(self) -> dict[str, int]:
+        counts = dict(
+            zip(
+                *np.unique(
+                    self.status(), return_counts=True
+                )
+            )
+        )
+        return {
+            **{
+                status: int(counts.get(status, 0))
+                for status in STATUS_LABELS
+            },
+            "urgency_changed": int(
+                np.count_nonzero(self.urgency_changed())
+            ),
+        }
+
+    def urgency_changed(self) -> np.ndarray:
+        """Mask of the parts on both sides whose urgency changed."""
+        both = ~(
+            np.isnan(self.previous_score)
+            | np.isnan(self.current_score)
+        )
+        return both & (
+            self.previous_urgency != self.current_urgency
+        )
+
+    def rows(
+        self, indices: np.ndarray
+    ) -> list[dict[str, str]]:
+        """Entries as strings ready to display."""
+        status = self.status()
+        delta = self.delta
+
+        def score(value: float) -> str:
+            return "" if np.isnan(value) else f"{value:.2f}"
+
+        return [
+            {
+                "pn": str(self.pn[i]),
+                "ac_reg": str(self.ac_reg[i]),
+                "previous_score": score(
+                    self.previous_score[i]
+                ),
+                "current_score": score(
+                    self.current_score[i]
+                ),
+                "delta": (
+                    ""
+                    if np.isnan(delta[i])
+                    else f"{delta[i]:+.2f}"
+                ),
+                "urgency": (
+                    str(self.current_urgency[i])
+                    if self.previous_urgency[i]
+                    == self.current_urgency[i]
+                    else f"{self.previous_urgency[i] or '—'} → {self.current_urgency[i] or '—'}"
+                ),
+                "status": STATUS_LABELS[status[i]],
+            }
+            for i in indices.tolist()
+        ]
+
+
+def _side(
+    codes: np.ndarray,
+    columns: Mapping[str, np.ndarray],
+    size: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Mean score and latest-year urgency per key code."""
+    counts = np.bincount(codes, minlength=size)
+    sums = np.bincount(
+        codes,
+        weights=columns["score_criticite"],
+        minlength=size,
+    )
+    scores = np.full(size, np.nan)
+    np.divide(sums, counts, out=scores, where=counts > 0)
+    urgencies = np.full(size, "", dtype=object)
+    if len(codes):
+        order = np.lexsort((columns["annee"], codes))
+        ordered = codes[order]
+        last = order[
+            np.concatenate(
+                [ordered[1:] != ordered[:-1], [True]]
+            )
+        ]
+        urgencies[codes[last]] = columns["urgency"][last]
+    return scores, urgencies
+
+
+def diff_datasets(
+    previous: Mapping[str, np.ndarray],
+    current: Mapping[str, np.ndarray],
+) -> DatasetDiff:
+    """Joins two sides' `DIFF_COLUMNS` arrays on (PN, A/C REG)."""
+    split = len(previous["pn"])
+    pn_codes, pns = pd.factorize(
+        np.concatenate([previous["pn"], current["pn"]])
+    )
+    ac_codes, ac_regs = pd.factorize(
+        np.concatenate(
+            [previous["ac_reg"], current["ac_reg"]]
+        )
+    )
+    keys, uniques = pd.factorize(
+        pn_codes.astype(np.int64) * max(len(ac_regs), 1)
+        + ac_codes
+    )
+    size = len(uniques)
+    previous_score, previous_urgency = _side(
+        keys[:split], previous, size
+    )
+    current_score, current_urgency = _side(
+        keys[split:], current, size
+    )
+    return DatasetDiff(
+        pn=np.asarray(pns, dtype=object)[
+            uniques // max(len(ac_regs), 1)
+        ],
+        ac_reg=np.asarray(ac_regs, dtype=object)[
+            uniques % max(len(ac_regs), 1)
+        ],
+        previous_score=previous_score,
+        current_score=current_score,
+        previous_urgency=previous_urgency,
+        current_urgency=current_urgency,
+    )
+
+
+def _top(
+    scores: np.ndarray, mask: np.ndarray, top_k: int
+) -> np.ndarray:
+    """The `top_k` entries of `mask` by score, highest first."""
+    ranked = np.where(
+        mask, np.nan_to_num(scores, nan=-np.inf), -np.inf
+    )
+    best = top_k_indices(ranked, top_k)
+    return best[np.isfinite(ranked[best])]
+
+
+def comparison(
+    dataset_id: str,
+    version: int,
+    predicates: tuple[Predicate, ...],
+    previous_id: str,
+    previous_version: int,
+    top_k: int,
+) -> dict:
+    """Summary and rankings of the filtered rows of two datasets.
+
+    `increases` holds the `top_k` parts whose score rose most, with
+    their delta series for the chart, `new` the `top_k` new parts by
+    current score, `removed` the `top_k` removed parts by previous
+    score and `urgency_changed` the `top_k` parts whose urgency changed
+    by current score.
+    """
+    started = time.perf_counter()
+    diff = diff_datasets(
+        select_columns(
+            previous_id,
+            previous_version,
+            predicates,
+            DIFF_COLUMNS,
+        ),
+        select_columns(
+            dataset_id, version, predicates, DIFF_COLUMNS
+        ),
+    )
+    delta = np.nan_to_num(diff.delta, nan=-np.inf)
+    increases = top_k_indices(delta, top_k)
+    increases = increases[delta[increases] > 0]
+    increase_rows = diff.rows(increases)
+    return {
+        "summary": diff.summary(),
+        "increases": increase_rows,
+        "chart": [
+            {
+                "name": f"{row['pn']} / {row['ac_reg']}",
+                "Écart": float(row["delta"]),
+            }
+            for row in increase_rows
+        ],
+        "new": diff.rows(
+            _top(
+                diff.current_score,
+                np.isnan(diff.previous_score),
+                top_k,
+            )
+        ),
+        "removed": diff.rows(
+            _top(
+                diff.previous_score,
+                np.isnan(diff.current_score),
+                top_k,
+            )
+        ),
+        "urgency_changed": diff.rows(
+            _top(
+                diff.current_score,
+                diff.urgency_changed(),
+                top_k,
+            )
+        ),
+        "seconds": time.perf_counter() - started,
+    }
\ No newline at end of file
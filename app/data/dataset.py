@@ -0,0 +1,720 @@
+import mmap
+import uuid
+from dataclasses import dataclass, field
+from typing import Collection, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import (
+    FLOAT_COLUMNS,
+    INT_COLUMNS,
+    STRING_COLUMNS,
+    ITEM_COLUMNS,
+    DATE_COLUMNS,
+    KEY_COLUMNS,
+    NO_YEAR,
+    MONTH_COLUMN,
+    NO_MONTH,
+    STORED_COLUMNS,
+    ItemData,
+)
+from app.data.records import Records, intern_strings
+
+COLUMN_DTYPES: dict[str, object] = {
+    **{col: np.float64 for col in FLOAT_COLUMNS},
+    **{col: np.int64 for col in INT_COLUMNS},
+    **{col: object for col in STRING_COLUMNS},
+    **{col: object for col in DATE_COLUMNS},
+    "annee": np.int64,
+    MONTH_COLUMN: np.int64,
+}
+ENCODED_COLUMNS = ["pn", "urgency", "ac_reg", "annee"]
+MISSING_VALUES = ("", NO_YEAR)
+POSTING_COLUMNS = ["urgency", "ac_reg", "annee"]
+EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
+# Key tuple, its dict slot and the boxed position, per row.
+KEY_ENTRY_BYTES = 160
+# Versions whose changed columns a dataset remembers.
+HISTORY_LENGTH = 64
+
+
+@dataclass
+class DatasetChange:
+    """Row positions touched by an upsert.
+
+    `previous` holds, for every column, the values the updated
+    positions had before the merge so derived structures can
+    retract them.
+    """
+
+    inserted: np.ndarray
+    updated: np.ndarray
+    previous: dict[str, np.ndarray] = field(
+        default_factory=dict
+    )
+
+    @property
+    def touched(self) -> np.ndarray:
+        return np.concatenate([self.updated, self.inserted])
+
+
+class DerivedIndex:
+    """Structure derived from a dataset and kept in sync with it.
+
+    `build` scans the whole dataset once; `apply` folds an upsert in.
+    The default `apply` rebuilds, subclasses override it to work in
+    time proportional to the change.
+    """
+
+    def build(self, dataset: "Dataset") -> None:
+        raise NotImplementedError
+
+    def apply(
+        self, dataset: "Dataset", change: DatasetChange
+    ) -> None:
+        self.build(dataset)
+
+    def depends_on(self, columns: Collection[str]) -> bool:
+        """Whether the index reads any of `columns`."""
+        return True
+
+    def nbytes(self) -> int:
+        """Memory held by the index's arrays, 0 if negligible."""
+        return 0
+
+
+class DictionaryEncoding(DerivedIndex):
+    """Integer code per row and row count per category of one column.
+
+    Codes are assigned in order of first appearance, so an upsert only
+    encodes its delta and never renumbers existing rows. The sorted list
+    of present categories is cached until the counts change.
+    """
+
+    def __init__(self, column: str):
+        self.column = column
+        self.categories: list = []
+        self.code_of: dict = {}
+        self._codes = np.empty(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._values: Optional[list] = None
+
+    def depends_on(self, columns: Collection[str]) -> bool:
+        return self.column in columns
+
+    def build(self, dataset: "Dataset") -> None:
+        codes, uniques = pd.factorize(
+            dataset.column(self.column), sort=True
+        )
+        self.categories = uniques.tolist()
+        self.code_of = {
+            value: code
+            for code, value in enumerate(self.categories)
+        }
+        self._codes = codes.astype(np.int32)
+        self.counts = np.bincount(
+            codes, minlength=len(self.categories)
+        )
+        self._values = None
+
+    @classmethod
+    def from_codes(
+        cls,
+        column: str,
+        codes: np.ndarray,
+        categories: list,
+    ) -> "DictionaryEncoding":
+        """An encoding restored from saved codes, e.g. memory-mapped."""
+        encoding = cls(column)
+        encoding.categories = categories
+        encoding.code_of = {
+            value: code
+            for code, value in enumerate(categories)
+        }
+        encoding._codes = codes
+        encoding.counts = np.bincount(
+            codes, minlength=len(categories)
+        )
+        return encoding
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        """Codes of `values`, adding unseen ones as new categories."""
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values.tolist()):
+            code = self.code_of.get(value)
+            if code is None:
+                code = len(self.categories)
+                self.code_of[value] = code
+                self.categories.append(value)
+            codes[i] = code
+        return codes
+
+    def apply(
+        self, dataset: "Dataset", change: DatasetChange
+    ) -> None:
+        if len(change.updated):
+            np.subtract.at(
+                self.counts, self._codes[change.updated], 1
+            )
+        touched = change.touched
+        codes = self.encode(
+            dataset.column(self.column)[touched]
+        )
+        if len(dataset) > len(self._codes):
+            self._codes = np.resize(
+                self._codes,
+                max(len(dataset), 2 * len(self._codes)),
+            )
+        elif not self._codes.flags.writeable:
+            self._codes = np.array(self._codes)
+        self._codes[touched] = codes
+        if len(self.categories) > len(self.counts):
+            self.counts = np.concatenate(
+                [
+                    self.counts,
+                    np.zeros(
+                        len(self.categories)
+                        - len(self.counts),
+                        dtype=np.int64,
+                    ),
+                ]
+            )
+        np.add.at(self.counts, codes, 1)
+        self._values = None
+
+    def nbytes(self) -> int:
+        codes = (
+            0
+            if is_mapped(self._codes)
+            else self._codes.nbytes
+        )
+        return codes + self.counts.nbytes
+
+    def codes(self, size: int) -> np.ndarray:
+        return self._codes[:size]
+
+    def values(self) -> list:
+        """Sorted categories present in at least one row, missing markers excluded."""
+        if self._values is None:
+            self._values = sorted(
+                value
+                for value, count in zip(
+                    self.categories, self.counts.tolist()
+                )
+                if count > 0 and value not in MISSING_VALUES
+            )
+        return self._values
+
+
+def group_positions(
+    values: np.ndarray, positions: np.ndarray
+) -> dict:
+    """Splits `positions` by value, each group keeping its input order."""
+    if len(values) == 0:
+        return {}
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    bounds = (
+        np.flatnonzero(
+            sorted_values[1:] != sorted_values[:-1]
+        )
+        + 1
+    )
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(values)]])
+    return {
+        sorted_values[start]: positions[order[start:end]]
+        for start, end in zip(starts, ends)
+    }
+
+
+class PostingIndex(DerivedIndex):
+    """Sorted row positions per distinct value of one column."""
+
+    def __init__(self, column: str):
+        self.column = column
+        self.postings: dict = {}
+
+    def depends_on(self, columns: Collection[str]) -> bool:
+        return self.column in columns
+
+    def build(self, dataset: "Dataset") -> None:
+        self.postings = group_positions(
+            dataset.column(self.column),
+            np.arange(len(dataset), dtype=np.int64),
+        )
+
+    @classmethod
+    def from_bounds(
+        cls,
+        column: str,
+        values: list,
+        positions: np.ndarray,
+        bounds: np.ndarray,
+    ) -> "PostingIndex":
+        """Postings restored as slices of one saved positions array.
+
+        `positions` holds the postings of `values` one after the other,
+        those of `values[i]` in `positions[bounds[i]:bounds[i + 1]]`.
+        """
+        index = cls(column)
+        index.postings = {
+            value: positions[start:end]
+            for value, start, end in zip(
+                values,
+                bounds[:-1].tolist(),
+                bounds[1:].tolist(),
+            )
+            if end > start
+        }
+        return index
+
+    def apply(
+        self, dataset: "Dataset", change: DatasetChange
+    ) -> None:
+        column = dataset.column(self.column)
+        if len(change.updated):
+            old = change.previous[self.column]
+            new = column[change.updated]
+            moved = old != new
+            for value, positions in group_positions(
+                old[moved], change.updated[moved]
+            ).items():
+                self.postings[value] = np.setdiff1d(
+                    self.postings[value],
+                    positions,
+                    assume_unique=True,
+                )
+            for value, positions in group_positions(
+                new[moved], change.updated[moved]
+            ).items():
+                self.postings[value] = np.union1d(
+                    self.positions(value), positions
+                )
+        for value, positions in group_positions(
+            column[change.inserted], change.inserted
+        ).items():
+            self.postings[value] = np.concatenate(
+                [self.positions(value), positions]
+            )
+
+    def positions(self, value) -> np.ndarray:
+        return self.postings.get(value, EMPTY_POSITIONS)
+
+    def nbytes(self) -> int:
+        return sum(
+            positions.nbytes
+            for positions in self.postings.values()
+            if not is_mapped(positions)
+        )
+
+
+def is_mapped(array: np.ndarray) -> bool:
+    """Whether the array's memory is a file mapping."""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def month_keys(dates: pd.Series) -> np.ndarray:
+    """YYYYMM integers for ISO dates, NO_MONTH where missing."""
+    parsed = pd.to_datetime(
+        dates, errors="coerce", format="%Y-%m-%d"
+    )
+    return (
+        (parsed.dt.year * 100 + parsed.dt.month)
+        .fillna(NO_MONTH)
+        .astype(np.int64)
+        .to_numpy()
+    )
+
+
+def coerce_columns(
+    df: pd.DataFrame,
+) -> dict[str, np.ndarray]:
+    """Converts a prepared DataFrame into typed column arrays.
+
+    String columns are interned so repeated values share one object.
+    Also derives the `MONTH_COLUMN` key from the `date` column.
+    """
+    columns: dict[str, np.ndarray] = {}
+    for col in ITEM_COLUMNS:
+        if col in DATE_COLUMNS:
+            columns[col] = (
+                intern_strings(
+                    df[col]
+                    .fillna("")
+                    .to_numpy(dtype=object)
+                )
+                if col in df.columns
+                else np.full(len(df), "", dtype=object)
+            )
+        elif col in STRING_COLUMNS:
+            columns[col] = intern_strings(
+                df[col].to_numpy(dtype=object)
+            )
+        elif col == "annee":
+            columns[col] = (
+                pd.to_numeric(df[col], errors="coerce")
+                .fillna(NO_YEAR)
+                .astype(np.int64)
+                .to_numpy()
+            )
+        else:
+            columns[col] = df[col].to_numpy(
+                dtype=COLUMN_DTYPES[col]
+            )
+    columns[MONTH_COLUMN] = month_keys(
+        pd.Series(columns["date"])
+    )
+    return columns
+
+
+class Dataset:
+    """Columnar dataset stored as growable NumPy buffers.
+
+    Rows are addressed by position. A key index on `KEY_COLUMNS`
+    (pn, ac_reg, annee), built on the first upsert, lets `upsert`
+    merge a delta in time proportional to the delta, the buffers
+    growing geometrically like a list so appends are amortised O(1)
+    per row.
+
+    String columns may be given `encoded` as (codes, categories), e.g.
+    mapped from disk: rows are then gathered through the codes, and a
+    column is only decoded in full when it is first read whole.
+    `derived` indexes already built for these columns are used as is.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, np.ndarray],
+        dataset_id: Optional[str] = None,
+        version: int = 1,
+        encoded: Optional[
+            dict[str, tuple[np.ndarray, np.ndarray]]
+        ] = None,
+        derived: Optional[dict[str, DerivedIndex]] = None,
+    ):
+        self.dataset_id = dataset_id or uuid.uuid4().hex
+        self.version = version
+        self._encoded = dict(encoded or {})
+        self._buffers = {
+            col: np.asarray(
+                columns[col], dtype=COLUMN_DTYPES[col]
+            )
+            for col in STORED_COLUMNS
+            if col not in self._encoded
+        }
+        self._size = len(
+            self._encoded["pn"][0]
+            if "pn" in self._encoded
+            else self._buffers["pn"]
+        )
+        self._key_index: Optional[dict[tuple, int]] = None
+        # (version, columns it changed), None when the rows changed.
+        self._history: list[
+            tuple[int, Optional[frozenset[str]]]
+        ] = []
+        self._history_start = version
+        # Version last written to or read from the registry.
+        self.published_version = 0
+        self._frame: Optional[pd.DataFrame] = None
+        self._frame_version = 0
+        self._derived: dict[str, DerivedIndex] = {}
+        derived = derived or {}
+        defaults = {
+            **{
+                f"codes_{col}": DictionaryEncoding(col)
+                for col in ENCODED_COLUMNS
+            },
+            **{
+                f"postings_{col}": PostingIndex(col)
+                for col in POSTING_COLUMNS
+            },
+        }
+        for name, index in defaults.items():
+            if name in derived:
+                self._derived[name] = derived[name]
+            else:
+                self.register_derived(name, index)
+        for name, index in derived.items():
+            self._derived.setdefault(name, index)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        dataset_id: Optional[str] = None,
+    ) -> "Dataset":
+        return cls(
+            coerce_columns(df), dataset_id=dataset_id
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        records: list[ItemData],
+        dataset_id: Optional[str] = None,
+    ) -> "Dataset":
+        return cls.from_frame(
+            pd.DataFrame(records, columns=ITEM_COLUMNS),
+            dataset_id=dataset_id,
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _record_change(
+        self, columns: Optional[frozenset[str]]
+    ) -> None:
+        self._history.append((self.version, columns))
+        if len(self._history) > HISTORY_LENGTH:
+            dropped, _ = self._history.pop(0)
+            self._history_start = dropped
+
+    def changed_since(
+        self, version: int
+    ) -> Optional[set[str]]:
+        """Columns changed after `version`.
+
+        None when unknown, or when rows were inserted since, which
+        changes every column.
+        """
+        if version < self._history_start:
+            return None
+        changed: set[str] = set()
+        for changed_version, columns in self._history:
+            if changed_version <= version:
+                continue
+            if columns is None:
+                return None
+            changed |= columns
+        return changed
+
+    def copy(
+        self, dataset_id: Optional[str] = None
+    ) -> "Dataset":
+        """A private copy, e.g. to upsert into a shared dataset."""
+        return Dataset(
+            {
+                col: self.column(col).copy()
+                for col in STORED_COLUMNS
+            },
+            dataset_id=dataset_id,
+        )
+
+    def resident_bytes(self) -> int:
+        """Approximate private memory of buffers, indexes and caches.
+
+        Memory-mapped buffers live in the shared page cache and are
+        not counted.
+        """
+        total = sum(
+            buffer.nbytes
+            for buffer in self._buffers.values()
+            if not is_mapped(buffer)
+        )
+        total += sum(
+            index.nbytes()
+            for index in self._derived.values()
+        )
+        total += (
+            len(self._key_index or ()) * KEY_ENTRY_BYTES
+        )
+        if self._frame is not None:
+            total += int(
+                self._frame.memory_usage(deep=False).sum()
+            )
+        return total
+
+    def column(self, name: str) -> np.ndarray:
+        encoded = self._encoded.get(name)
+        if encoded is not None:
+            codes, categories = encoded
+            self._buffers[name] = categories[codes]
+            self._encoded.pop(name, None)
+        return self._buffers[name][: self._size]
+
+    def _gather(
+        self, name: str, positions: np.ndarray
+    ) -> np.ndarray:
+        encoded = self._encoded.get(name)
+        if encoded is not None:
+            codes, categories = encoded
+            return categories[codes[positions]]
+        return self._buffers[name][positions]
+
+    def register_derived(
+        self, name: str, index: DerivedIndex
+    ) -> DerivedIndex:
+        index.build(self)
+        self._derived[name] = index
+        return index
+
+    def derived(self, name: str) -> DerivedIndex:
+        return self._derived[name]
+
+    def derived_indexes(self) -> dict[str, DerivedIndex]:
+        return dict(self._derived)
+
+    def has_derived(self, name: str) -> bool:
+        return name in self._derived
+
+    def encoding(self, column: str) -> DictionaryEncoding:
+        index = self._derived[f"codes_{column}"]
+        assert isinstance(index, DictionaryEncoding)
+        return index
+
+    def distinct_values(self, column: str) -> list:
+        return self.encoding(column).values()
+
+    def distinct_count(self, column: str) -> int:
+        return len(self.encoding(column).values())
+
+    def frame(self) -> pd.DataFrame:
+        """The columns as a DataFrame, built once per version."""
+        if (
+            self._frame is None
+            or self._frame_version != self.version
+        ):
+            self._frame = pd.DataFrame(
+                {
+                    col: self.column(col)
+                    for col in STORED_COLUMNS
+                }
+            )
+            self._frame_version = self.version
+        return self._frame
+
+    def records(
+        self,
+        positions: np.ndarray,
+        columns: Sequence[str] = ITEM_COLUMNS,
+    ) -> Records:
+        """Compact row views of `positions`, one gathered array per column."""
+        return Records(
+            {
+                col: self._gather(col, positions)
+                for col in columns
+            }
+        )
+
+    def _index_keys(self, positions: np.ndarray) -> None:
+        keys = zip(
+            *(
+                self._buffers[col][positions].tolist()
+                for col in KEY_COLUMNS
+            )
+        )
+        self._key_index.update(
+            zip(keys, positions.tolist())
+        )
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._buffers["pn"])
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        for col, buffer in self._buffers.items():
+            grown = np.empty(
+                new_capacity, dtype=buffer.dtype
+            )
+            grown[: self._size] = buffer[: self._size]
+            self._buffers[col] = grown
+
+    def replace_columns(
+        self, values: dict[str, np.ndarray]
+    ) -> None:
+        """Overwrites whole numeric columns as a new version.
+
+        Key and string columns cannot be replaced. The derived indexes
+        reading a replaced column are rebuilt.
+        """
+        for col, array in values.items():
+            if (
+                col in KEY_COLUMNS
+                or COLUMN_DTYPES[col] is object
+            ):
+                raise ValueError(
+                    f"Column cannot be replaced: {col}"
+                )
+            buffer = np.array(self._buffers[col])
+            buffer[: self._size] = array
+            self._buffers[col] = buffer
+        self.version += 1
+        self._record_change(frozenset(values))
+        for index in self._derived.values():
+            if index.depends_on(values):
+                index.build(self)
+
+    def upsert(self, df: pd.DataFrame) -> DatasetChange:
+        """Merges prepared rows keyed on pn + ac_reg + annee.
+
+        Rows whose key already exists overwrite it in place, the others
+        are appended; when a key repeats inside `df` the last row wins.
+        Derived indexes are patched from the returned change instead of
+        being rebuilt. Encoded columns are decoded and read-only
+        (memory-mapped) buffers copied first.
+        """
+        delta = coerce_columns(df)
+        for col in list(self._encoded):
+            self.column(col)
+        for col, buffer in self._buffers.items():
+            if not buffer.flags.writeable:
+                self._buffers[col] = np.array(buffer)
+        if self._key_index is None:
+            self._key_index = {}
+            self._index_keys(np.arange(self._size))
+        count = len(delta["pn"])
+        positions = np.empty(count, dtype=np.int64)
+        next_position = self._size
+        keys = zip(
+            *(delta[col].tolist() for col in KEY_COLUMNS)
+        )
+        for i, key in enumerate(keys):
+            position = self._key_index.get(key)
+            if position is None:
+                position = next_position
+                self._key_index[key] = position
+                next_position += 1
+            positions[i] = position
+        _, last_reversed = np.unique(
+            positions[::-1], return_index=True
+        )
+        keep = np.sort(count - 1 - last_reversed)
+        positions = positions[keep]
+        updated = positions[positions < self._size]
+        previous = {
+            col: self._buffers[col][updated]
+            for col in STORED_COLUMNS
+        }
+        change = DatasetChange(
+            inserted=np.arange(
+                self._size, next_position, dtype=np.int64
+            ),
+            updated=updated,
+            previous=previous,
+        )
+        self._reserve(next_position)
+        for col in STORED_COLUMNS:
+            self._buffers[col][positions] = delta[col][keep]
+        self._size = next_position
+        self.version += 1
+        self._record_change(
+            None
+            if len(change.inserted)
+            else frozenset(
+                col
+                for col in STORED_COLUMNS
+                if np.any(
+                    self._buffers[col][updated]
+                    != previous[col]
+                )
+            )
+        )
+        for index in self._derived.values():
+            index.apply(self, change)
+        return change
\ No newline at end of file
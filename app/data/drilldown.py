@@ -0,0 +1,81 @@
+"""Fleet → aircraft → segment → part drill-down plans.
+
+A drill path lists the values chosen so far, one per level. Each level
+is a grouped plan restricted to the path: the fleet level reads the
+per-aircraft summary table, deeper levels start from the aircraft's
+posting list, so expanding a node costs in proportion to that node's
+rows. Results are cached per dataset version by the executor cache, so
+nothing is computed until a node is opened. Children are paged and can
+be searched, so every node stays reachable however many there are.
+"""
+
+from app.data.query import (
+    Aggregate,
+    OrderBy,
+    Predicate,
+    QueryPlan,
+)
+
+DRILL_LEVELS = ["ac_reg", "segment", "pn"]
+DRILL_LEVEL_LABELS = {
+    "ac_reg": "A/C REG",
+    "segment": "Segment",
+    "pn": "Pièce",
+}
+DRILL_NODE_LIMIT = 100
+
+
+def _node_predicates(
+    path: list[str], search: str
+) -> tuple[Predicate, ...]:
+    if len(path) >= len(DRILL_LEVELS):
+        raise ValueError(
+            f"Drill path too deep: {' > '.join(path)}"
+        )
+    predicates = tuple(
+        Predicate(column, "eq", value)
+        for column, value in zip(DRILL_LEVELS, path)
+    )
+    if search:
+        predicates += (
+            Predicate(
+                DRILL_LEVELS[len(path)], "contains", search
+            ),
+        )
+    return predicates
+
+
+def drilldown_plan(
+    path: list[str], search: str = "", page: int = 0
+) -> QueryPlan:
+    """Children of the node at `path`, highest mean score first.
+
+    Children are listed `DRILL_NODE_LIMIT` per page; `search` keeps
+    those whose value contains it.
+    """
+    return QueryPlan(
+        predicates=_node_predicates(path, search),
+        group_by=DRILL_LEVELS[len(path)],
+        aggregates=(
+            Aggregate("count", alias="count"),
+            Aggregate(
+                "mean", "score_criticite", "avg_score"
+            ),
+            Aggregate("mean", "percent_aog", "avg_aog"),
+            Aggregate("mean", "percent_nrc", "avg_nrc"),
+        ),
+        order_by=OrderBy(("avg_score",), descending=True),
+        limit=DRILL_NODE_LIMIT,
+        offset=page * DRILL_NODE_LIMIT,
+    )
+
+
+def drilldown_count_plan(
+    path: list[str], search: str = ""
+) -> QueryPlan:
+    """One row per child of the node at `path`, to count them."""
+    return QueryPlan(
+        predicates=_node_predicates(path, search),
+        group_by=DRILL_LEVELS[len(path)],
+        aggregates=(Aggregate("count", alias="count"),),
+    )
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""Faceted option counts for the sidebar filters.
+
+The count shown next to a facet value is the number of rows it would
+return combined with the *other* active filters. In memory all facets
+come from one pass: every predicate is evaluated once over the rows,
+the number of failed predicates is summed per row, and a facet counts
+rows that fail nothing or only its own predicate, bincounted on its
+dictionary codes. The SQL store runs one grouped plan per facet.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+from app.data.dataset import Dataset
+from app.data.query import (
+    Aggregate,
+    NumpyExecutor,
+    Predicate,
+    QueryPlan,
+    Rows,
+)
+
+FACET_COLUMNS = ["urgency", "ac_reg", "annee"]
+
+FacetCounts = dict[str, dict[str, int]]
+
+
+def facet_counts(
+    dataset: Dataset,
+    predicates: tuple[Predicate, ...],
+    columns: list[str] = FACET_COLUMNS,
+) -> FacetCounts:
+    """Rows per value of each facet column under the other predicates."""
+    executor = NumpyExecutor()
+    failures = np.zeros(len(dataset), dtype=np.int8)
+    own_failure: dict[str, np.ndarray] = {}
+    for predicate in predicates:
+        failed = ~executor.predicate_mask(
+            dataset, predicate
+        )
+        failures += failed
+        if predicate.column in columns:
+            own_failure[predicate.column] = failed
+    passing = failures == 0
+    counts: FacetCounts = {}
+    for column in columns:
+        selected = passing
+        if column in own_failure:
+            selected = passing | (
+                (failures == 1) & own_failure[column]
+            )
+        encoding = dataset.encoding(column)
+        per_code = np.bincount(
+            encoding.codes(len(dataset))[selected],
+            minlength=len(encoding.categories),
+        )
+        counts[column] = {
+            str(value): int(count)
+            for value, count in zip(
+                encoding.categories, per_code.tolist()
+            )
+            if count
+        }
+    return counts
+
+
+def facet_counts_from_plans(
+    run: Callable[[QueryPlan], Rows],
+    predicates: tuple[Predicate, ...],
+    columns: list[str] = FACET_COLUMNS,
+) -> FacetCounts:
+    """Same counts as `facet_counts`, one grouped plan per facet."""
+    counts: FacetCounts = {}
+    for column in columns:
+        rows = run(
+            QueryPlan(
+                predicates=tuple(
+                    p
+                    for p in predicates
+                    if p.column != column
+                ),
+                group_by=column,
+                aggregates=(
+                    Aggregate("count", alias="count"),
+                ),
+            )
+        )
+        counts[column] = {
+            str(row[column]): int(row["count"])
+            for row in rows
+        }
+    return counts
\ No newline at end of file
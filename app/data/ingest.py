@@ -0,0 +1,311 @@
+"""Turning a read workbook into the prepared item columns.
+
+Shared by the app, the default-dataset artifacts and scripts that run
+outside Reflex. Uploads are spooled to a temporary file in chunks
+(`spool_upload`) and `read_header` lets one be rejected for missing
+columns or too many rows before the whole workbook is parsed. The
+limits come from `DASHBOARD_UPLOAD_MAX_MB` and
+`DASHBOARD_UPLOAD_MAX_ROWS`.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+import pandas as pd
+
+from app.data.quality import QualityReport
+from app.data.schema import (
+    COL_REF_PIECE,
+    COL_PN_ALT,
+    COLUMN_MAPPING,
+    REQUIRED_UPLOAD_COLUMNS_FR,
+    REQUIRED_INTERNAL_COLUMNS,
+    FLOAT_COLUMNS,
+    INT_COLUMNS,
+    STRING_COLUMNS,
+    DATE_COLUMNS,
+    ItemData,
+)
+
+UPLOAD_MAX_MB_ENV = "DASHBOARD_UPLOAD_MAX_MB"
+UPLOAD_MAX_ROWS_ENV = "DASHBOARD_UPLOAD_MAX_ROWS"
+DEFAULT_UPLOAD_MAX_MB = 50
+DEFAULT_UPLOAD_MAX_ROWS = 1_000_000
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+ISO_DATE = r"\s*\d{4}-\d{2}-\d{2}"
+
+
+def upload_max_bytes() -> int:
+    return int(
+        float(
+            os.environ.get(
+                UPLOAD_MAX_MB_ENV, DEFAULT_UPLOAD_MAX_MB
+            )
+        )
+        * 1024
+        * 1024
+    )
+
+
+def upload_max_rows() -> int:
+    return int(
+        os.environ.get(
+            UPLOAD_MAX_ROWS_ENV, DEFAULT_UPLOAD_MAX_ROWS
+        )
+    )
+
+
+async def spool_upload(
+    upload,
+) -> Tuple[Optional[Path], Optional[str]]:
+    """Copies an upload to a temporary .xlsx file, chunk by chunk.
+
+    Returns the file, which the caller deletes, or None and a French
+    error message once the upload exceeds the size limit.
+    """
+    max_bytes = upload_max_bytes()
+    handle, name = tempfile.mkstemp(suffix=".xlsx")
+    path = Path(name)
+    written = 0
+    with os.fdopen(handle, "wb") as spool:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > max_bytes:
+                break
+            spool.write(chunk)
+    if written > max_bytes:
+        path.unlink(missing_ok=True)
+        return (
+            None,
+            f"Fichier trop volumineux : la limite est de {round(max_bytes / (1024 * 1024), 1):g} Mo.",
+        )
+    return path, None
+
+
+def too_many_rows_message(max_rows: int) -> str:
+    return f"Fichier trop volumineux : plus de {max_rows} lignes."
+
+
+def read_header(
+    source: Union[str, Path, BinaryIO],
+) -> Tuple[list[str], Optional[int]]:
+    """Stripped column names of the first sheet, and its data rows.
+
+    The workbook is opened in read-only mode, which streams the sheet
+    XML, and only the first row is read. The row count is the one the
+    sheet declares, None when it declares none.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(
+        source, read_only=True, data_only=True
+    )
+    try:
+        rows = workbook.worksheets[0].iter_rows(
+            min_row=1, max_row=1, values_only=True
+        )
+        header = next(rows, ())
+        declared_rows = workbook.worksheets[0].max_row
+    finally:
+        workbook.close()
+    return [
+        str(value).strip()
+        for value in header
+        if value is not None
+    ], (
+        max(declared_rows - 1, 0)
+        if declared_rows is not None
+        else None
+    )
+
+
+def missing_upload_columns(columns) -> list[str]:
+    """Required upload columns absent from `columns`.
+
+    The part reference may come under its alternate name.
+    """
+    present = {str(col).strip() for col in columns}
+    missing = [
+        col_fr
+        for col_fr in REQUIRED_UPLOAD_COLUMNS_FR
+        if col_fr not in present
+    ]
+    if COL_REF_PIECE in missing and COL_PN_ALT in present:
+        missing.remove(COL_REF_PIECE)
+    return missing
+
+
+def missing_columns_message(missing: list[str]) -> str:
+    return f"Colonnes requises manquantes dans le fichier téléversé : {', '.join(missing)}."
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Dates of cells holding datetimes, ISO or day-first text.
+
+    ISO dates, with or without a time, are parsed with an explicit
+    format; only the other cells are read day first (03/04/2021 is
+    3 April), so neither form makes pandas guess and warn.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    text = values.astype("string")
+    iso = text.str.match(ISO_DATE, na=False)
+    parsed = pd.Series(
+        pd.NaT, index=values.index, dtype="datetime64[ns]"
+    )
+    if iso.any():
+        parsed[iso] = pd.to_datetime(
+            text[iso], errors="coerce", format="ISO8601"
+        )
+    rest = ~iso & values.notna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(
+            text[rest], errors="coerce", dayfirst=True
+        )
+    return parsed
+
+
+def parse_and_prepare_df(
+    df: pd.DataFrame,
+    is_uploaded_file: bool = False,
+    quality: Optional[QualityReport] = None,
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Parses and prepares a Pandas DataFrame.
+    Renames columns, validates required columns, cleans data, and keeps the ItemData columns.
+    If is_uploaded_file is True, it performs stricter validation for required columns.
+    If quality is given, it is filled with the data-quality findings.
+    Returns the prepared frame, or None and a French error message.
+    """
+    try:
+        if is_uploaded_file:
+            missing_upload_cols = missing_upload_columns(
+                df.columns
+            )
+            if missing_upload_cols:
+                return (
+                    None,
+                    missing_columns_message(
+                        missing_upload_cols
+                    ),
+                )
+        df = df.rename(
+            columns=lambda c: COLUMN_MAPPING.get(
+                str(c).strip(), str(c).strip()
+            )
+        )
+        missing_internal = [
+            col
+            for col in REQUIRED_INTERNAL_COLUMNS
+            if col not in df.columns
+        ]
+        if missing_internal:
+            original_missing_names = []
+            for internal_col_name in missing_internal:
+                found_original = False
+                for (
+                    original_name,
+                    mapped_name,
+                ) in COLUMN_MAPPING.items():
+                    if mapped_name == internal_col_name:
+                        original_missing_names.append(
+                            original_name
+                        )
+                        found_original = True
+                        break
+                if not found_original:
+                    original_missing_names.append(
+                        internal_col_name
+                    )
+            return (
+                None,
+                f"Colonnes requises manquantes après mappage : {', '.join(original_missing_names)}.",
+            )
+        for col in FLOAT_COLUMNS:
+            if col in df.columns:
+                converted = pd.to_numeric(
+                    df[col], errors="coerce"
+                )
+                if quality is not None:
+                    quality.coercion(
+                        df, col, df[col], converted
+                    )
+                df[col] = converted.fillna(0.0)
+            elif col in ItemData.__annotations__:
+                df[col] = 0.0
+        for col in INT_COLUMNS:
+            if col in df.columns:
+                converted = pd.to_numeric(
+                    df[col], errors="coerce"
+                )
+                if quality is not None:
+                    quality.coercion(
+                        df, col, df[col], converted
+                    )
+                df[col] = converted.fillna(0).astype(int)
+            elif col in ItemData.__annotations__:
+                df[col] = 0
+        if "annee" in df.columns:
+            raw_annee = df["annee"]
+            df["annee"] = df["annee"].apply(
+                lambda x: (
+                    int(x)
+                    if pd.notnull(x)
+                    and str(x).replace(".0", "").isdigit()
+                    else None
+                )
+            )
+            if quality is not None:
+                quality.coercion(
+                    df, "annee", raw_annee, df["annee"]
+                )
+        elif "annee" in ItemData.__annotations__:
+            df["annee"] = None
+        for col in STRING_COLUMNS:
+            if col in df.columns:
+                missing = df[col].isna()
+                if quality is not None:
+                    quality.missing(df, col, missing)
+                df[col] = (
+                    df[col].mask(missing, "").astype(str)
+                )
+            elif col in ItemData.__annotations__:
+                df[col] = ""
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                converted = parse_dates(df[col])
+                if quality is not None:
+                    quality.coercion(
+                        df, col, df[col], converted
+                    )
+                df[col] = converted.dt.strftime(
+                    "%Y-%m-%d"
+                ).fillna("")
+        final_columns = list(
+            ItemData.__annotations__.keys()
+        )
+        for col in final_columns:
+            if col not in df.columns:
+                col_type = ItemData.__annotations__[col]
+                if col_type == str:
+                    df[col] = ""
+                elif col_type == float:
+                    df[col] = 0.0
+                elif col_type == int:
+                    df[col] = 0
+                elif (
+                    str(col_type) == "typing.Optional[int]"
+                ):
+                    df[col] = None
+                else:
+                    df[col] = None
+        if quality is not None:
+            quality.check_prepared(df[final_columns])
+        return (df[final_columns], None)
+    except Exception as e:
+        return (
+            None,
+            f"Erreur de traitement des données: {str(e)}",
+        )
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""Data-quality report of an ingested workbook.
+
+`parse_and_prepare_df` fills a `QualityReport` while it coerces the
+columns: cells that were empty, cells that could not be converted to
+the column type, rates outside [0, 1] and rows repeating a
+(PN, A/C REG, année) key. Each issue carries its count and its rate,
+the share of the rows read that it affects. Every check is a vectorised mask over a
+column the preparation already holds, and a few offending rows per
+issue are kept as samples with their sheet row number.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import KEY_COLUMNS
+
+SAMPLE_ROWS = 5
+RATE_COLUMNS = ["percent_aog", "percent_nrc"]
+# A frame row's sheet row: the header is row 1, data starts at 2.
+FIRST_DATA_ROW = 2
+
+ISSUE_LABELS = {
+    "missing": "Valeurs manquantes",
+    "coerced": "Valeurs non converties",
+    "out_of_range": "Taux hors de [0, 1]",
+    "duplicate": "Clé PN + A/C + année en double",
+}
+
+
+def format_rate(rate: float) -> str:
+    """A share as a French percentage, e.g. "12,5 %"."""
+    return f"{rate * 100:.1f} %".replace(".", ",")
+
+
+@dataclass
+class QualityReport:
+    """Issue counts, rates and sample rows, as strings ready to display.
+
+    `rows_read` counts the sheet rows, `rows` those left after
+    preparation.
+    """
+
+    rows: int = 0
+    rows_read: int = 0
+    issues: list[dict[str, str]] = field(
+        default_factory=list
+    )
+    samples: list[dict[str, str]] = field(
+        default_factory=list
+    )
+    seconds: float = 0.0
+
+    def coercion(
+        self,
+        df: pd.DataFrame,
+        column: str,
+        raw: pd.Series,
+        converted: pd.Series,
+    ) -> None:
+        """Counts empty cells and cells `converted` lost."""
+        started = time.perf_counter()
+        self._read(df)
+        missing = raw.isna().to_numpy()
+        self._add("missing", column, missing, df)
+        self._add(
+            "coerced",
+            column,
+            converted.isna().to_numpy() & ~missing,
+            df,
+            raw,
+        )
+        self.seconds += time.perf_counter() - started
+
+    def missing(
+        self, df: pd.DataFrame, column: str, mask: pd.Series
+    ) -> None:
+        """Counts empty cells of a column kept as text."""
+        started = time.perf_counter()
+        self._read(df)
+        self._add("missing", column, mask.to_numpy(), df)
+        self.seconds += time.perf_counter() - started
+
+    def check_prepared(self, df: pd.DataFrame) -> None:
+        """Range and key checks on the prepared columns."""
+        started = time.perf_counter()
+        self._read(df)
+        self.rows = len(df)
+        for column in RATE_COLUMNS:
+            values = df[column].to_numpy()
+            self._add(
+                "out_of_range",
+                column,
+                (values < 0) | (values > 1),
+                df,
+                df[column],
+            )
+        self._add(
+            "duplicate",
+            " + ".join(KEY_COLUMNS),
+            df.duplicated(KEY_COLUMNS).to_numpy(),
+            df,
+        )
+        self.seconds += time.perf_counter() - started
+
+    def _read(self, df: pd.DataFrame) -> None:
+        self.rows_read = max(self.rows_read, len(df))
+
+    def _add(
+        self,
+        issue: str,
+        column: str,
+        mask: np.ndarray,
+        df: pd.DataFrame,
+        values: Optional[pd.Series] = None,
+    ) -> None:
+        count = int(np.count_nonzero(mask))
+        if not count:
+            return
+        label = ISSUE_LABELS[issue]
+        self.issues.append(
+            {
+                "issue": label,
+                "column": column,
+                "count": str(count),
+                "rate": format_rate(count / self.rows_read),
+            }
+        )
+        for position in np.flatnonzero(mask)[:SAMPLE_ROWS]:
+            row = df.index[position]
+            self.samples.append(
+                {
+                    "issue": label,
+                    "column": column,
+                    "row": (
+                        str(row + FIRST_DATA_ROW)
+                        if isinstance(
+                            row, (int, np.integer)
+                        )
+                        else str(row)
+                    ),
+                    "pn": (
+                        str(df["pn"].iat[position])
+                        if "pn" in df.columns
+                        else ""
+                    ),
+                    "value": (
+                        str(values.iat[position])
+                        if values is not None
+                        else ""
+                    ),
+                }
+            )
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "rows_read": self.rows_read,
+            "issues": self.issues,
+            "samples": self.samples,
+            "seconds": self.seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QualityReport":
+        return cls(**data)
\ No newline at end of file
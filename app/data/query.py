@@ -0,0 +1,797 @@
+"""Backend-agnostic query plans and the executors that run them.
+
+`AppState` describes what a view needs as a `QueryPlan` (predicates,
+optional grouping with aggregates, ordering, limit/offset) instead of
+filtering rows itself. The same plan runs on the in-memory dataset with
+NumPy and its posting indexes, on a pandas DataFrame, or as SQL against
+the persistent store, behind a result cache keyed on the normalised plan.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from app.data.aggregates import GroupedSums
+from app.data.dataset import COLUMN_DTYPES, Dataset
+from app.data.records import Records
+from app.data.registry import get_dataset
+from app.data.schema import ITEM_COLUMNS, NO_YEAR
+from app.data.store import AnalyticalStore, get_store
+from app.data.topk import top_k_indices
+
+QUERY_ENGINE_ENV = "DASHBOARD_QUERY_ENGINE"
+RESULT_CACHE_SIZE = 256
+
+Value = Union[str, int, float]
+Row = Mapping[str, Union[str, int, float, None]]
+Rows = Sequence[Row]
+
+PREDICATE_OPS = ("eq", "ne", "gte", "contains")
+AGGREGATE_FUNCS = ("count", "sum", "mean")
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """`column <op> value`; `contains` is a case-insensitive substring match."""
+
+    column: str
+    op: str
+    value: Value
+
+    def __post_init__(self):
+        if self.op not in PREDICATE_OPS:
+            raise ValueError(
+                f"Unknown predicate op: {self.op}"
+            )
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    func: str
+    column: Optional[str] = None
+    alias: str = ""
+
+    def __post_init__(self):
+        if self.func not in AGGREGATE_FUNCS:
+            raise ValueError(
+                f"Unknown aggregate function: {self.func}"
+            )
+
+
+@dataclass(frozen=True)
+class OrderBy:
+    """Sorts by the sum of the named output columns."""
+
+    keys: tuple[str, ...]
+    descending: bool = False
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Declarative description of a dashboard query.
+
+    Without aggregates the plan selects rows (`columns`, all by default);
+    with aggregates it returns one row per `group_by` value, or a single
+    row when `group_by` is None. `order_by` plus `limit` expresses top-k.
+    """
+
+    predicates: tuple[Predicate, ...] = ()
+    group_by: Optional[str] = None
+    aggregates: tuple[Aggregate, ...] = ()
+    columns: tuple[str, ...] = ()
+    order_by: Optional[OrderBy] = None
+    limit: Optional[int] = None
+    offset: int = 0
+
+    def where(self, *predicates: Predicate) -> "QueryPlan":
+        return replace(
+            self, predicates=self.predicates + predicates
+        )
+
+    def normalized(self) -> "QueryPlan":
+        """Canonical form used as cache key: sorted, deduplicated, no no-ops."""
+        predicates = set()
+        for predicate in self.predicates:
+            if predicate.op == "contains":
+                if not predicate.value:
+                    continue
+                predicate = replace(
+                    predicate,
+                    value=str(predicate.value).lower(),
+                )
+            if (
+                predicate.op == "gte"
+                and predicate.column == "score_criticite"
+                and predicate.value <= 0
+            ):
+                continue
+            predicates.add(predicate)
+        return replace(
+            self,
+            predicates=tuple(
+                sorted(
+                    predicates,
+                    key=lambda p: (
+                        p.column,
+                        p.op,
+                        repr(p.value),
+                    ),
+                )
+            ),
+            columns=(
+                ()
+                if self.aggregates
+                else self.columns or tuple(ITEM_COLUMNS)
+            ),
+        )
+
+
+def filter_predicates(
+    pn: str = "",
+    urgency: str = "",
+    ac_reg: str = "",
+    min_score: float = 0.0,
+    annee: str = "",
+) -> tuple[Predicate, ...]:
+    """Translates the sidebar filter values into plan predicates."""
+    predicates = []
+    if pn:
+        predicates.append(Predicate("pn", "contains", pn))
+    if urgency:
+        predicates.append(
+            Predicate("urgency", "eq", urgency)
+        )
+    if ac_reg:
+        predicates.append(Predicate("ac_reg", "eq", ac_reg))
+    if min_score > 0:
+        predicates.append(
+            Predicate("score_criticite", "gte", min_score)
+        )
+    if annee:
+        try:
+            predicates.append(
+                Predicate("annee", "eq", int(annee))
+            )
+        except ValueError:
+            pass
+    return tuple(predicates)
+
+
+def _slice(items, plan: QueryPlan):
+    end = (
+        plan.offset + plan.limit
+        if plan.limit is not None
+        else None
+    )
+    return items[plan.offset : end]
+
+
+def _ordered_indices(
+    keys: np.ndarray, plan: QueryPlan
+) -> np.ndarray:
+    """Indices kept by the plan's ordering and limit/offset, in output order.
+
+    With a limit only the first offset + limit entries are selected, by
+    partial partitioning rather than a full sort.
+    """
+    if plan.order_by is None:
+        return _slice(np.arange(len(keys)), plan)
+    if plan.limit is not None:
+        order = top_k_indices(
+            keys,
+            plan.offset + plan.limit,
+            descending=plan.order_by.descending,
+        )
+    else:
+        order = np.argsort(
+            -keys if plan.order_by.descending else keys,
+            kind="stable",
+        )
+    return order[plan.offset :]
+
+
+def _top_frame(
+    df: pd.DataFrame, plan: QueryPlan
+) -> pd.DataFrame:
+    """pandas counterpart of `_ordered_indices` using nlargest/nsmallest."""
+    if plan.order_by is None:
+        return _slice(df, plan)
+    keys = df[list(plan.order_by.keys)].sum(axis=1)
+    if plan.limit is not None:
+        count = plan.offset + plan.limit
+        keys = (
+            keys.nlargest(count, keep="first")
+            if plan.order_by.descending
+            else keys.nsmallest(count, keep="first")
+        )
+    else:
+        keys = keys.sort_values(
+            ascending=not plan.order_by.descending,
+            kind="stable",
+        )
+    return df.loc[keys.index[plan.offset :]]
+
+
+def _external_year(rows: list[dict]) -> list[dict]:
+    for row in rows:
+        if row.get("annee") == NO_YEAR:
+            row["annee"] = None
+    return rows
+
+
+class Executor:
+    """Runs a normalised plan against one dataset version."""
+
+    def execute(
+        self, dataset_id: str, version: int, plan: QueryPlan
+    ) -> Rows:
+        raise NotImplementedError
+
+
+class NumpyExecutor(Executor):
+    """In-memory execution on column arrays using the posting indexes."""
+
+    def select(
+        self,
+        dataset: Dataset,
+        predicates: tuple[Predicate, ...],
+    ) -> Optional[np.ndarray]:
+        """Positions matching all predicates, None meaning every row.
+
+        The most selective indexed equality seeds the candidate set and
+        every other predicate is evaluated on the candidates only.
+        """
+        postings = [
+            dataset.derived(
+                f"postings_{p.column}"
+            ).positions(p.value)
+            for p in predicates
+            if p.op == "eq"
+            and dataset.has_derived(f"postings_{p.column}")
+        ]
+        positions: Optional[np.ndarray] = (
+            min(postings, key=len) if postings else None
+        )
+        for predicate in predicates:
+            mask = self.predicate_mask(
+                dataset, predicate, positions
+            )
+            positions = (
+                np.flatnonzero(mask)
+                if positions is None
+                else positions[mask]
+            )
+        return positions
+
+    def predicate_mask(
+        self,
+        dataset: Dataset,
+        predicate: Predicate,
+        positions: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Boolean mask of `predicate` over `positions` (all rows if None)."""
+        if predicate.op != "gte" and dataset.has_derived(
+            f"codes_{predicate.column}"
+        ):
+            return self._code_mask(
+                dataset, predicate, positions
+            )
+        column = dataset.column(predicate.column)
+        values = (
+            column
+            if positions is None
+            else column[positions]
+        )
+        if predicate.op == "contains":
+            return self._contains(predicate, values)
+        if predicate.op == "eq":
+            return values == predicate.value
+        if predicate.op == "ne":
+            return values != predicate.value
+        return values >= predicate.value
+
+    def _code_mask(
+        self,
+        dataset: Dataset,
+        predicate: Predicate,
+        positions: Optional[np.ndarray],
+    ) -> np.ndarray:
+        """Evaluates eq/ne/contains on the column's dictionary codes.
+
+        The predicate is tested once per category; rows only gather a
+        boolean by code.
+        """
+        encoding = dataset.encoding(predicate.column)
+        codes = encoding.codes(len(dataset))
+        if positions is not None:
+            codes = codes[positions]
+        if predicate.op == "contains":
+            matches = np.fromiter(
+                (
+                    predicate.value in str(value).lower()
+                    for value in encoding.categories
+                ),
+                dtype=bool,
+                count=len(encoding.categories),
+            )
+        else:
+            matches = np.zeros(
+                len(encoding.categories), dtype=bool
+            )
+            code = encoding.code_of.get(predicate.value)
+            if code is not None:
+                matches[code] = True
+            if predicate.op == "ne":
+                matches = ~matches
+        return matches[codes]
+
+    def _contains(
+        self,
+        predicate: Predicate,
+        values: np.ndarray,
+    ) -> np.ndarray:
+        return (
+            pd.Series(values)
+            .astype(str)
+            .str.lower()
+            .str.contains(predicate.value, regex=False)
+            .to_numpy()
+        )
+
+    def execute(
+        self, dataset_id: str, version: int, plan: QueryPlan
+    ) -> Rows:
+        dataset = get_dataset(dataset_id, version)
+        if dataset is None:
+            return []
+        if plan.aggregates:
+            rows = self._grouped_sums(dataset, plan)
+            if rows is not None:
+                return rows
+        positions = self.select(dataset, plan.predicates)
+        if positions is None:
+            positions = np.arange(len(dataset))
+        if plan.aggregates:
+            return self._aggregate(dataset, positions, plan)
+        if plan.order_by is not None:
+            keys = sum(
+                dataset.column(key)[positions]
+                for key in plan.order_by.keys
+            )
+            positions = positions[
+                _ordered_indices(keys, plan)
+            ]
+        else:
+            positions = _slice(positions, plan)
+        return dataset.records(positions, plan.columns)
+
+    def _grouped_sums(
+        self, dataset: Dataset, plan: QueryPlan
+    ) -> Optional[Rows]:
+        """Answers a grouped plan from the precomputed group sums.
+
+        Applies when the group column has a `GroupedSums` table covering
+        the aggregated columns and the predicates are at most one
+        equality on a partial column plus a `contains` on the group
+        column; returns None otherwise.
+        """
+        name = f"sums_{plan.group_by}"
+        if (
+            plan.group_by is None
+            or not dataset.has_derived(name)
+        ):
+            return None
+        table = dataset.derived(name)
+        assert isinstance(table, GroupedSums)
+        if any(
+            a.func != "count"
+            and a.column not in table.value_columns
+            for a in plan.aggregates
+        ):
+            return None
+        equalities = [
+            p
+            for p in plan.predicates
+            if p.op == "eq"
+            and p.column in table.partial_columns
+        ]
+        contains = [
+            p
+            for p in plan.predicates
+            if p.op == "contains"
+            and p.column == plan.group_by
+        ]
+        if (
+            len(equalities) > 1
+            or len(contains) > 1
+            or len(equalities) + len(contains)
+            != len(plan.predicates)
+        ):
+            return None
+        if equalities:
+            groups, counts, sums = table.groups(
+                equalities[0].column, equalities[0].value
+            )
+        else:
+            groups, counts, sums = table.groups()
+        if contains:
+            mask = self._contains(contains[0], groups)
+            groups = groups[mask]
+            counts = counts[mask]
+            sums = {
+                col: values[mask]
+                for col, values in sums.items()
+            }
+        order = np.argsort(groups, kind="stable")
+        return self._grouped_rows(
+            plan,
+            groups[order],
+            counts[order].astype(np.int64),
+            {
+                col: values[order]
+                for col, values in sums.items()
+            },
+        )
+
+    def _aggregate(
+        self,
+        dataset: Dataset,
+        positions: np.ndarray,
+        plan: QueryPlan,
+    ) -> Rows:
+        if plan.group_by is None:
+            groups = None
+            inverse = np.zeros(
+                len(positions), dtype=np.int64
+            )
+            group_count = 1
+        else:
+            groups, inverse = np.unique(
+                dataset.column(plan.group_by)[positions],
+                return_inverse=True,
+            )
+            group_count = len(groups)
+        counts = np.bincount(inverse, minlength=group_count)
+        sums = {
+            aggregate.column: np.bincount(
+                inverse,
+                weights=dataset.column(aggregate.column)[
+                    positions
+                ],
+                minlength=group_count,
+            ).astype(np.float64)
+            for aggregate in plan.aggregates
+            if aggregate.func != "count"
+        }
+        return self._grouped_rows(
+            plan, groups, counts, sums
+        )
+
+    def _grouped_rows(
+        self,
+        plan: QueryPlan,
+        groups: Optional[np.ndarray],
+        counts: np.ndarray,
+        sums: dict[str, np.ndarray],
+    ) -> Rows:
+        outputs: dict[str, np.ndarray] = {}
+        for aggregate in plan.aggregates:
+            if aggregate.func == "count":
+                outputs[aggregate.alias] = counts
+            elif aggregate.func == "sum":
+                outputs[aggregate.alias] = sums[
+                    aggregate.column
+                ]
+            else:
+                outputs[aggregate.alias] = np.divide(
+                    sums[aggregate.column],
+                    counts,
+                    out=np.zeros(len(counts)),
+                    where=counts > 0,
+                )
+        if groups is not None:
+            outputs[plan.group_by] = groups
+        keys = (
+            sum(outputs[key] for key in plan.order_by.keys)
+            if plan.order_by is not None
+            else counts
+        )
+        kept = _ordered_indices(keys, plan)
+        return [
+            dict(zip(outputs.keys(), values))
+            for values in zip(
+                *(
+                    column[kept].tolist()
+                    for column in outputs.values()
+                )
+            )
+        ]
+
+
+class PandasExecutor(Executor):
+    """Execution on the dataset's cached DataFrame."""
+
+    def execute(
+        self, dataset_id: str, version: int, plan: QueryPlan
+    ) -> Rows:
+        dataset = get_dataset(dataset_id, version)
+        if dataset is None:
+            return []
+        df = dataset.frame()
+        mask = pd.Series(True, index=df.index)
+        for predicate in plan.predicates:
+            column = df[predicate.column]
+            if predicate.op == "contains":
+                mask &= column.str.lower().str.contains(
+                    predicate.value, regex=False
+                )
+            elif predicate.op == "eq":
+                mask &= column == predicate.value
+            elif predicate.op == "ne":
+                mask &= column != predicate.value
+            else:
+                mask &= column >= predicate.value
+        df = df[mask]
+        if not plan.aggregates:
+            return Records.from_frame(
+                _top_frame(df, plan), plan.columns
+            )
+        named = {}
+        for aggregate in plan.aggregates:
+            if aggregate.func == "count":
+                named[aggregate.alias] = ("pn", "size")
+            else:
+                named[aggregate.alias] = (
+                    aggregate.column,
+                    aggregate.func,
+                )
+        if plan.group_by is None:
+            grouped = (
+                df.assign(_all=0)
+                .groupby("_all")
+                .agg(**named)
+            )
+            if grouped.empty:
+                grouped = pd.DataFrame(
+                    [{alias: 0 for alias in named}]
+                )
+        else:
+            grouped = (
+                df.groupby(plan.group_by)
+                .agg(**named)
+                .reset_index()
+            )
+        return _top_frame(grouped, plan).to_dict(
+            orient="records"
+        )
+
+
+def _like_escaped(value: Value) -> str:
+    """`value` matched literally by LIKE with `ESCAPE '\\'`."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+class SQLExecutor(Executor):
+    """Translates plans to SQL for the persistent store."""
+
+    SQL_FUNCS = {
+        "count": "COUNT",
+        "sum": "SUM",
+        "mean": "AVG",
+    }
+
+    def __init__(self, store: AnalyticalStore):
+        self.store = store
+
+    def execute(
+        self, dataset_id: str, version: int, plan: QueryPlan
+    ) -> Rows:
+        clauses = ["dataset_id = ?"]
+        params: list = [dataset_id]
+        for predicate in plan.predicates:
+            if predicate.op == "contains":
+                clauses.append(
+                    f"LOWER({predicate.column}) LIKE ? ESCAPE '\\'"
+                )
+                params.append(
+                    f"%{_like_escaped(predicate.value)}%"
+                )
+            else:
+                operator = {
+                    "eq": "=",
+                    "ne": "!=",
+                    "gte": ">=",
+                }[predicate.op]
+                clauses.append(
+                    f"{predicate.column} {operator} ?"
+                )
+                params.append(predicate.value)
+        if plan.aggregates:
+            names = [a.alias for a in plan.aggregates]
+            selected = [
+                f"COALESCE({self.SQL_FUNCS[a.func]}"
+                f"({a.column or '*'}), 0) AS {a.alias}"
+                for a in plan.aggregates
+            ]
+            if plan.group_by is not None:
+                names.insert(0, plan.group_by)
+                selected.insert(0, plan.group_by)
+        else:
+            names = selected = list(plan.columns)
+        sql = (
+            f"SELECT {', '.join(selected)} FROM items "
+            f"WHERE {' AND '.join(clauses)}"
+        )
+        if plan.group_by is not None:
+            sql += f" GROUP BY {plan.group_by}"
+        if plan.order_by is not None:
+            direction = (
+                "DESC"
+                if plan.order_by.descending
+                else "ASC"
+            )
+            sql += (
+                f" ORDER BY {' + '.join(plan.order_by.keys)} "
+                f"{direction}"
+            )
+        if plan.limit is not None:
+            sql += f" LIMIT {int(plan.limit)}"
+        if plan.offset:
+            if (
+                plan.limit is None
+                and self.store.engine == "sqlite"
+            ):
+                sql += " LIMIT -1"
+            sql += f" OFFSET {int(plan.offset)}"
+        rows = [
+            dict(zip(names, row))
+            for row in self.store.query(sql, params)
+        ]
+        return (
+            rows
+            if plan.aggregates
+            else _external_year(rows)
+        )
+
+
+@dataclass
+class CachedExecutor(Executor):
+    """LRU cache of plan results in front of another executor.
+
+    Keys are (dataset id, dataset version, normalised plan), so an upsert
+    or a new upload naturally misses. Results are shared between sessions
+    and must be treated as read-only. Row selections without a limit
+    (exports, whole filtered columns) are as large as the dataset and
+    are not cached, as in `select_columns`.
+    """
+
+    executor: Executor
+    maxsize: int = RESULT_CACHE_SIZE
+    hits: int = 0
+    misses: int = 0
+    _cache: OrderedDict = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock
+    )
+
+    def execute(
+        self, dataset_id: str, version: int, plan: QueryPlan
+    ) -> Rows:
+        plan = plan.normalized()
+        if not plan.aggregates and plan.limit is None:
+            return self.executor.execute(
+                dataset_id, version, plan
+            )
+        key = (dataset_id, version, plan)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        result = self.executor.execute(
+            dataset_id, version, plan
+        )
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return result
+
+
+_executors: dict[str, CachedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """Cached executor for the configured engine.
+
+    The persistent store, when enabled, always runs SQL; otherwise
+    `DASHBOARD_QUERY_ENGINE` selects `numpy` (default) or `pandas`.
+    """
+    store = get_store()
+    engine = (
+        "sql"
+        if store is not None
+        else os.environ.get(QUERY_ENGINE_ENV, "numpy")
+    )
+    with _executors_lock:
+        if engine not in _executors:
+            if engine == "sql":
+                inner: Executor = SQLExecutor(store)
+            elif engine == "pandas":
+                inner = PandasExecutor()
+            else:
+                inner = NumpyExecutor()
+            _executors[engine] = CachedExecutor(inner)
+        return _executors[engine]
+
+
+def select_columns(
+    dataset_id: str,
+    version: int,
+    predicates: tuple[Predicate, ...],
+    columns: Sequence[str],
+) -> dict[str, np.ndarray]:
+    """One array per column of the filtered rows, bypassing the cache.
+
+    For whole-column computations (re-scoring, comparisons) whose inputs
+    would crowd the result cache: gathered from the worker's in-memory
+    dataset, or fetched from the persistent store when the dataset
+    lives there. `predicates` are normalized first, as for a plan.
+    """
+    predicates = (
+        QueryPlan(predicates=predicates)
+        .normalized()
+        .predicates
+    )
+    dataset = get_dataset(dataset_id, version)
+    if dataset is not None:
+        positions = NumpyExecutor().select(
+            dataset, predicates
+        )
+        return {
+            col: (
+                dataset.column(col)
+                if positions is None
+                else dataset.column(col)[positions]
+            )
+            for col in columns
+        }
+    store = get_store()
+    rows = (
+        SQLExecutor(store).execute(
+            dataset_id,
+            version,
+            QueryPlan(
+                predicates=predicates,
+                columns=tuple(columns),
+            ),
+        )
+        if store is not None
+        else []
+    )
+    return {
+        col: np.array(
+            [
+                (
+                    NO_YEAR
+                    if col == "annee" and row[col] is None
+                    else row[col]
+                )
+                for row in rows
+            ],
+            dtype=COLUMN_DTYPES[col],
+        )
+        for col in columns
+    }
\ No newline at end of file
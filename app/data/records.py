@@ -0,0 +1,148 @@
+"""Compact row access over column arrays.
+
+Row-oriented consumers (table pages, exports, chart rows) used to get
+one 15-key dict per row with its own boxed floats and ints. `Records`
+instead keeps one gathered array per column and hands out `Record`
+views: a `__slots__` object holding the arrays and a position, readable
+like the dict it replaces. Categorical string columns are interned at
+ingestion (`intern_strings`) so repeated values share one object.
+"""
+
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import NO_YEAR
+
+Value = Union[str, int, float, None]
+
+
+def intern_strings(values: np.ndarray) -> np.ndarray:
+    """Object array whose equal strings are one interned object."""
+    codes, uniques = pd.factorize(values)
+    shared = np.array(
+        [sys.intern(str(value)) for value in uniques],
+        dtype=object,
+    )
+    if (codes < 0).any():
+        shared = np.append(shared, "")
+    return shared[codes]
+
+
+def _python_value(column: str, value) -> Value:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if column == "annee" and value == NO_YEAR:
+        return None
+    return value
+
+
+class Record(Mapping):
+    """Read-only view of one row of a `Records` set."""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(
+        self, columns: dict[str, np.ndarray], index: int
+    ):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key: str) -> Value:
+        return _python_value(
+            key, self._columns[key][self._index]
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return f"Record({dict(self)!r})"
+
+
+class Records(Sequence):
+    """Rows stored as one array per column."""
+
+    __slots__ = ("columns", "_length")
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        self.columns = columns
+        self._length = len(next(iter(columns.values()), []))
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "Records":
+        return cls(
+            {
+                col: df[col].to_numpy()
+                for col in (columns or df.columns)
+            }
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Records(
+                {
+                    col: values[index]
+                    for col, values in self.columns.items()
+                }
+            )
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return Record(self.columns, index)
+
+    def to_dicts(self) -> list[dict[str, Value]]:
+        """Plain dicts, e.g. for a Reflex state var."""
+        values = [
+            (
+                [
+                    _python_value(col, value)
+                    for value in array.tolist()
+                ]
+                if col == "annee"
+                else array.tolist()
+            )
+            for col, array in self.columns.items()
+        ]
+        return [
+            dict(zip(self.columns, row))
+            for row in zip(*values)
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.columns)
+        if "annee" in df.columns:
+            df["annee"] = (
+                df["annee"]
+                .astype(object)
+                .where(df["annee"] != NO_YEAR, None)
+            )
+        return df
+
+
+def as_dicts(rows: Sequence[Mapping]) -> list[dict]:
+    if isinstance(rows, Records):
+        return rows.to_dicts()
+    return [dict(row) for row in rows]
+
+
+def as_frame(
+    rows: Sequence[Mapping], columns: list[str]
+) -> pd.DataFrame:
+    if isinstance(rows, Records):
+        return rows.to_frame()[columns]
+    return pd.DataFrame(list(rows), columns=columns)
\ No newline at end of file
@@ -0,0 +1,684 @@
+"""Datasets shared by the sessions of a worker and across workers.
+
+Each worker keeps the datasets it uses in memory, keyed by id. Every
+registered or upserted version is also published once to a directory
+on local disk (`DASHBOARD_DATASET_DIR`, a temp directory by default) so
+another worker receiving a session that only carries the id and version
+can map it instead of re-parsing the upload:
+
+    <root>/<dataset_id>/v<version>/meta.json
+                                  /<column>.npy           numeric columns
+                                  /<column>.codes.npy     string and
+                                  /<column>.categories.json  encoded codes
+                                  /<column>.postings.npy  posting lists
+                                  /<column>.bounds.npy
+                                  /summaries.json         summary tables
+                                  /summaries.npz          and sketches
+
+Numeric columns, codes and posting lists are opened with
+`mmap_mode="r"`, so they are shared through the page cache and a
+reopened dataset starts without a pass over its rows: the dictionary
+encodings and posting indexes wrap the mapped arrays, the summary
+tables and sketches are restored from their arrays, string columns are decoded from
+their small category list only when a whole column is read, and the
+key index is built on the first upsert. A version is written to a
+private temporary directory and renamed into place, so readers never
+see a partial one. Files of the columns unchanged since the version
+last published are hard-links to it, so a re-scoring or an update-only
+upsert writes only what it changed; inserted rows rewrite every column.
+Nothing on disk is unpickled: summaries are JSON
+keys and plain arrays, loaded with `allow_pickle=False`. The default
+root is created private to the user (mode 0700), and a version
+directory the process does not own is never read.
+`collect_garbage` removes superseded versions and datasets idle for
+longer than `DASHBOARD_DATASET_TTL` seconds, under an exclusive lock
+file so concurrent workers do not collect the same directory twice.
+
+In memory, a worker keeps its datasets in least-recently-used order and
+holds their private bytes under `DASHBOARD_MEMORY_BUDGET_MB`: past the
+budget, the idlest datasets are dropped. Every version is on disk
+already, so a later `get_dataset` maps it back transparently.
+`memory_stats` reports the worker's resident dataset bytes.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Collection, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.data.aggregates import (
+    GroupedSums,
+    register_summaries,
+)
+from app.data.dataset import (
+    COLUMN_DTYPES,
+    ENCODED_COLUMNS,
+    POSTING_COLUMNS,
+    Dataset,
+    DictionaryEncoding,
+    PostingIndex,
+)
+from app.data.schema import STORED_COLUMNS
+from app.data.sketches import ScoreSketches
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DATASET_DIR_ENV = "DASHBOARD_DATASET_DIR"
+DATASET_TTL_ENV = "DASHBOARD_DATASET_TTL"
+DEFAULT_DATASET_TTL = 24 * 3600
+GC_INTERVAL_SECONDS = 600
+TOUCH_INTERVAL_SECONDS = 60
+LAST_USED_FILE = "last_used"
+MEMORY_BUDGET_ENV = "DASHBOARD_MEMORY_BUDGET_MB"
+DEFAULT_MEMORY_BUDGET_MB = 1024
+DATASET_FORMAT = 3
+SUMMARIES_FILE = "summaries.json"
+SUMMARY_ARRAYS_FILE = "summaries.npz"
+SUMMARY_KINDS = {
+    "grouped_sums": GroupedSums,
+    "score_sketches": ScoreSketches,
+}
+
+_lock = threading.Lock()
+_datasets: OrderedDict[str, Dataset] = OrderedDict()
+_sizes: dict[str, tuple[int, int]] = {}
+_evictions = 0
+_last_gc = 0.0
+_last_touched: dict[str, float] = {}
+
+
+def dataset_root() -> Path:
+    root = Path(
+        os.environ.get(DATASET_DIR_ENV, "")
+        or Path(tempfile.gettempdir())
+        / "critical-parts-datasets"
+    )
+    root.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return root
+
+
+def _owned(path: Path) -> bool:
+    """Whether the process's user owns `path`; always true off POSIX."""
+    return (
+        not hasattr(os, "getuid")
+        or path.stat().st_uid == os.getuid()
+    )
+
+
+def _plain(value):
+    """JSON form of the NumPy scalars found in summary keys."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {value!r}")
+
+
+def _version_dir(dataset_id: str, version: int) -> Path:
+    return dataset_root() / dataset_id / f"v{version}"
+
+
+def _touch(dataset_id: str) -> None:
+    """Marks a dataset as used, at most once a minute per worker."""
+    now = time.time()
+    if (
+        now - _last_touched.get(dataset_id, 0.0)
+        < TOUCH_INTERVAL_SECONDS
+    ):
+        return
+    _last_touched[dataset_id] = now
+    marker = dataset_root() / dataset_id / LAST_USED_FILE
+    try:
+        marker.touch()
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def _exclusive() -> Iterator[None]:
+    """Cross-process lock on the registry directory (no-op off POSIX)."""
+    with open(dataset_root() / ".lock", "w") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def memory_budget() -> int:
+    """Bytes of datasets a worker keeps resident; 0 means no limit."""
+    megabytes = float(
+        os.environ.get(
+            MEMORY_BUDGET_ENV, DEFAULT_MEMORY_BUDGET_MB
+        )
+    )
+    return int(megabytes * 1024 * 1024)
+
+
+def _resident_bytes(dataset: Dataset) -> int:
+    """`resident_bytes`, remembered per version. Call with `_lock` held."""
+    cached = _sizes.get(dataset.dataset_id)
+    if cached is None or cached[0] != dataset.version:
+        cached = (dataset.version, dataset.resident_bytes())
+        _sizes[dataset.dataset_id] = cached
+    return cached[1]
+
+
+def _evict_over_budget(keep: str) -> None:
+    """Drops least recently used datasets other than `keep`.
+
+    Called with `_lock` held, after `keep` was moved to the end.
+    """
+    global _evictions
+    budget = memory_budget()
+    if not budget:
+        return
+    total = sum(
+        _resident_bytes(dataset)
+        for dataset in _datasets.values()
+    )
+    for dataset_id in list(_datasets):
+        if total <= budget:
+            break
+        if dataset_id == keep:
+            continue
+        total -= _resident_bytes(_datasets.pop(dataset_id))
+        _sizes.pop(dataset_id, None)
+        _evictions += 1
+
+
+def _keep(dataset: Dataset) -> Dataset:
+    """Makes `dataset` the most recently used one, within budget."""
+    with _lock:
+        _datasets[dataset.dataset_id] = dataset
+        _datasets.move_to_end(dataset.dataset_id)
+        _evict_over_budget(dataset.dataset_id)
+    return dataset
+
+
+def memory_stats() -> dict:
+    """Resident datasets of this worker, for the metrics endpoint."""
+    with _lock:
+        sizes = [
+            _resident_bytes(dataset)
+            for dataset in _datasets.values()
+        ]
+        evictions = _evictions
+    return {
+        "pid": os.getpid(),
+        "resident_datasets": len(sizes),
+        "resident_dataset_bytes": sum(sizes),
+        "memory_budget_bytes": memory_budget(),
+        "evictions": evictions,
+    }
+
+
+def _codes(
+    dataset: Dataset, col: str
+) -> Optional[tuple[np.ndarray, list]]:
+    """Codes and categories to save for `col`, None if numeric."""
+    if dataset.has_derived(f"codes_{col}"):
+        encoding = dataset.encoding(col)
+        return (
+            encoding.codes(len(dataset)),
+            encoding.categories,
+        )
+    if COLUMN_DTYPES[col] is object:
+        codes, categories = pd.factorize(
+            dataset.column(col)
+        )
+        return codes.astype(np.int32), categories.tolist()
+    return None
+
+
+def _column_files(col: str) -> list[str]:
+    """Names of the files `write_dataset` saves for a column."""
+    names = []
+    if COLUMN_DTYPES[col] is not object:
+        names.append(f"{col}.npy")
+    if (
+        COLUMN_DTYPES[col] is object
+        or col in ENCODED_COLUMNS
+    ):
+        names += [
+            f"{col}.codes.npy",
+            f"{col}.categories.json",
+        ]
+    if col in POSTING_COLUMNS:
+        names += [
+            f"{col}.postings.npy",
+            f"{col}.bounds.npy",
+        ]
+    return names
+
+
+def _link_column(
+    base: Path, staging: Path, col: str
+) -> bool:
+    """Hard-links a column's files from a previous version.
+
+    False, with nothing left linked, if the previous version lacks one
+    of them (older format, collected) or it cannot be linked.
+    """
+    linked = []
+    try:
+        for name in _column_files(col):
+            os.link(base / name, staging / name)
+            linked.append(staging / name)
+        return True
+    except OSError:
+        # Never let a later np.save write through a link into `base`.
+        for path in linked:
+            path.unlink(missing_ok=True)
+        return False
+
+
+def write_dataset(
+    dataset: Dataset,
+    target: Path,
+    base: Optional[Path] = None,
+    reuse: Collection[str] = (),
+) -> None:
+    """Writes the dataset's columns and indexes to `target` unless it exists.
+
+    The files go to a private staging directory renamed into place, so
+    readers never see a partial dataset. The `reuse` columns are
+    unchanged since the version in `base`: their files are hard-linked
+    from there instead of written again.
+    """
+    if target.exists():
+        return
+    register_summaries(dataset)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(
+        tempfile.mkdtemp(
+            prefix=".staging-", dir=target.parent
+        )
+    )
+    try:
+        summaries = {}
+        for col in STORED_COLUMNS:
+            if (
+                base is not None
+                and col in reuse
+                and _link_column(base, staging, col)
+            ):
+                continue
+            if COLUMN_DTYPES[col] is not object:
+                np.save(
+                    staging / f"{col}.npy",
+                    dataset.column(col),
+                )
+            encoded = _codes(dataset, col)
+            if encoded is None:
+                continue
+            codes, categories = encoded
+            np.save(staging / f"{col}.codes.npy", codes)
+            (staging / f"{col}.categories.json").write_text(
+                json.dumps(categories)
+            )
+            if dataset.has_derived(f"postings_{col}"):
+                # Postings are the positions of each code, in order.
+                np.save(
+                    staging / f"{col}.postings.npy",
+                    np.argsort(codes, kind="stable"),
+                )
+                np.save(
+                    staging / f"{col}.bounds.npy",
+                    np.concatenate(
+                        [
+                            [0],
+                            np.cumsum(
+                                np.bincount(
+                                    codes,
+                                    minlength=len(
+                                        categories
+                                    ),
+                                )
+                            ),
+                        ]
+                    ),
+                )
+        arrays = {}
+        for (
+            name,
+            index,
+        ) in dataset.derived_indexes().items():
+            for kind, cls in SUMMARY_KINDS.items():
+                if isinstance(index, cls):
+                    meta, index_arrays = index.dump()
+                    summaries[name] = {
+                        "kind": kind,
+                        "meta": meta,
+                    }
+                    arrays.update(
+                        (f"{name}.{key}", array)
+                        for key, array in index_arrays.items()
+                    )
+        (staging / SUMMARIES_FILE).write_text(
+            json.dumps(summaries, default=_plain)
+        )
+        np.savez(staging / SUMMARY_ARRAYS_FILE, **arrays)
+        (staging / "meta.json").write_text(
+            json.dumps(
+                {
+                    "dataset_id": dataset.dataset_id,
+                    "version": dataset.version,
+                    "size": len(dataset),
+                    "format": DATASET_FORMAT,
+                }
+            )
+        )
+        os.rename(staging, target)
+    except OSError:
+        if not target.exists():
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _load_summaries(directory: Path) -> dict:
+    """Summary tables saved by `write_dataset`, empty if unreadable."""
+    try:
+        summaries = json.loads(
+            (directory / SUMMARIES_FILE).read_text()
+        )
+        with np.load(
+            directory / SUMMARY_ARRAYS_FILE,
+            allow_pickle=False,
+        ) as data:
+            arrays = {key: data[key] for key in data.files}
+        return {
+            name: SUMMARY_KINDS[entry["kind"]].restore(
+                entry["meta"],
+                {
+                    key[len(name) + 1 :]: array
+                    for key, array in arrays.items()
+                    if key.startswith(f"{name}.")
+                },
+            )
+            for name, entry in summaries.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def read_dataset(
+    directory: Path, dataset_id: str, version: int
+) -> Optional[Dataset]:
+    """Maps a dataset written by `write_dataset`, None if missing.
+
+    Also None for a directory another user owns, which may hold planted
+    files.
+
+    Indexes missing from older versions of the format are rebuilt.
+    """
+    try:
+        if not _owned(directory):
+            return None
+        meta = json.loads(
+            (directory / "meta.json").read_text()
+        )
+        current = meta.get("format", 1) >= DATASET_FORMAT
+        columns = {}
+        encoded = {}
+        derived = {}
+        for col in STORED_COLUMNS:
+            if COLUMN_DTYPES[col] is not object:
+                columns[col] = np.load(
+                    directory / f"{col}.npy", mmap_mode="r"
+                )
+            codes_path = directory / f"{col}.codes.npy"
+            if COLUMN_DTYPES[col] is not object and not (
+                current and codes_path.exists()
+            ):
+                continue
+            codes = np.load(codes_path, mmap_mode="r")
+            categories = json.loads(
+                (
+                    directory / f"{col}.categories.json"
+                ).read_text()
+            )
+            if COLUMN_DTYPES[col] is object:
+                encoded[col] = (
+                    codes,
+                    np.array(
+                        categories + [""], dtype=object
+                    ),
+                )
+            if not current or col not in ENCODED_COLUMNS:
+                continue
+            derived[f"codes_{col}"] = (
+                DictionaryEncoding.from_codes(
+                    col, codes, categories
+                )
+            )
+            postings_path = (
+                directory / f"{col}.postings.npy"
+            )
+            if postings_path.exists():
+                derived[f"postings_{col}"] = (
+                    PostingIndex.from_bounds(
+                        col,
+                        categories,
+                        np.load(
+                            postings_path, mmap_mode="r"
+                        ),
+                        np.load(
+                            directory / f"{col}.bounds.npy"
+                        ),
+                    )
+                )
+    except FileNotFoundError:
+        return None
+    if current:
+        derived.update(_load_summaries(directory))
+    return Dataset(
+        columns,
+        dataset_id=dataset_id,
+        version=version,
+        encoded=encoded,
+        derived=derived,
+    )
+
+
+def publish_dataset(dataset: Dataset) -> None:
+    """Writes the current version to disk unless it is already there.
+
+    Columns unchanged since the version last published or loaded are
+    hard-linked from it, so re-scoring or an upsert that only updates
+    rows writes the columns it changed and the summaries. Inserted rows
+    change every column, and the whole dataset is then written again,
+    in O(rows).
+    """
+    target = _version_dir(
+        dataset.dataset_id, dataset.version
+    )
+    if target.exists():
+        return
+    base, reuse = None, set()
+    if dataset.published_version:
+        changed = dataset.changed_since(
+            dataset.published_version
+        )
+        if changed is not None:
+            base = _version_dir(
+                dataset.dataset_id,
+                dataset.published_version,
+            )
+            reuse = set(STORED_COLUMNS) - changed
+    write_dataset(dataset, target, base, reuse)
+    dataset.published_version = dataset.version
+    _touch(dataset.dataset_id)
+
+
+def _published_versions(dataset_id: str) -> list[int]:
+    directory = dataset_root() / dataset_id
+    if not directory.is_dir():
+        return []
+    return sorted(
+        int(child.name[1:])
+        for child in directory.iterdir()
+        if child.name.startswith("v")
+        and (child / "meta.json").exists()
+    )
+
+
+def _load_published(
+    dataset_id: str, version: int
+) -> Optional[Dataset]:
+    dataset = read_dataset(
+        _version_dir(dataset_id, version),
+        dataset_id,
+        version,
+    )
+    if dataset is not None:
+        dataset.published_version = version
+        _touch(dataset_id)
+    return dataset
+
+
+def register_dataset(
+    dataset: Dataset, publish: bool = True
+) -> str:
+    """Makes a dataset reachable from any session of any worker.
+
+    With `publish` False it is only kept in this process, which then
+    cannot reload it once evicted; batch runs use that.
+    """
+    global _last_gc
+    register_summaries(dataset)
+    if publish:
+        publish_dataset(dataset)
+    _keep(dataset)
+    with _lock:
+        collect = (
+            time.time() - _last_gc > GC_INTERVAL_SECONDS
+        )
+        if collect:
+            _last_gc = time.time()
+    if collect:
+        collect_garbage()
+    return dataset.dataset_id
+
+
+def get_dataset(
+    dataset_id: str, version: Optional[int] = None
+) -> Optional[Dataset]:
+    """The dataset at `version` or later, mapped from disk if needed.
+
+    A worker that has not seen the dataset yet, or holds an older
+    version than the session asks for, loads the newest published one.
+    """
+    with _lock:
+        dataset = _datasets.get(dataset_id)
+    if dataset is not None and (
+        version is None or dataset.version >= version
+    ):
+        _touch(dataset_id)
+        return _keep(dataset)
+    versions = _published_versions(dataset_id)
+    if not versions or (
+        version is not None and versions[-1] < version
+    ):
+        return dataset
+    loaded = _load_published(dataset_id, versions[-1])
+    if loaded is None:
+        return dataset
+    register_summaries(loaded)
+    with _lock:
+        current = _datasets.get(dataset_id)
+    if current is not None and (
+        current.version >= loaded.version
+    ):
+        return _keep(current)
+    return _keep(loaded)
+
+
+def release_dataset(dataset_id: str) -> None:
+    """Forgets a dataset in this worker and removes it from disk."""
+    with _lock:
+        _datasets.pop(dataset_id, None)
+        _sizes.pop(dataset_id, None)
+        _last_touched.pop(dataset_id, None)
+    with _exclusive():
+        shutil.rmtree(
+            dataset_root() / dataset_id, ignore_errors=True
+        )
+
+
+def _remove_stale(
+    directory: Path, now: float, max_idle_seconds: float
+) -> int:
+    """Removes a staging directory left by a crashed write; 1 if removed."""
+    if now - directory.stat().st_mtime <= max_idle_seconds:
+        return 0
+    shutil.rmtree(directory, ignore_errors=True)
+    return 1
+
+
+def collect_garbage(
+    max_idle_seconds: Optional[float] = None,
+) -> int:
+    """Removes superseded versions and idle datasets; returns dirs removed.
+
+    Staging directories older than the idle limit, at the root or in a
+    dataset's directory where `write_dataset` creates them, are left by
+    a crashed write and removed too.
+
+    A worker that still maps a removed version keeps reading it (the
+    files live on until unmapped); it reloads the dataset from disk
+    only if a session asks for it again.
+    """
+    if max_idle_seconds is None:
+        max_idle_seconds = float(
+            os.environ.get(
+                DATASET_TTL_ENV, DEFAULT_DATASET_TTL
+            )
+        )
+    now = time.time()
+    removed = 0
+    root = dataset_root()
+    with _exclusive():
+        for directory in root.iterdir():
+            if not directory.is_dir():
+                continue
+            if directory.name.startswith(".staging-"):
+                removed += _remove_stale(
+                    directory, now, max_idle_seconds
+                )
+                continue
+            for staging in directory.glob(".staging-*"):
+                removed += _remove_stale(
+                    staging, now, max_idle_seconds
+                )
+            marker = directory / LAST_USED_FILE
+            last_used = (
+                marker.stat().st_mtime
+                if marker.exists()
+                else directory.stat().st_mtime
+            )
+            if now - last_used > max_idle_seconds:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed += 1
+                continue
+            versions = _published_versions(directory.name)
+            for version in versions[:-1]:
+                shutil.rmtree(
+                    directory / f"v{version}",
+                    ignore_errors=True,
+                )
+                removed += 1
+    return removed
\ No newline at end of file
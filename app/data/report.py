@@ -0,0 +1,206 @@
+"""Report bundle of a dashboard view: KPIs, chart series and filters.
+
+`build_report` collects the view-models through `app.data.views.view`,
+so a report of what is on screen is read from the shared view cache
+rather than recomputed from the rows. The report is written as a
+multi-sheet workbook (`report_xlsx`) or as JSON (`report_json`).
+`export_frame` gives the filtered rows the columns of the CSV export.
+"""
+
+import io
+import json
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+from app.data.timeline import GRANULARITY_LABELS
+from app.data.views import (
+    DEFAULT_VIEW_OPTIONS,
+    Predicates,
+    Run,
+    view,
+)
+
+REPORT_FORMATS = ("xlsx", "json")
+REPORT_SERIES = {
+    "top_critical_parts": "Top pièces",
+    "aog_nrc_by_part": "AOG NRC par pièce",
+    "urgency_distribution": "Urgences",
+    "evolution": "Évolution",
+    "score_histogram": "Distribution scores",
+}
+KPI_LABELS = {
+    "filtered_count": "Lignes filtrées",
+    "avg_score_criticite": "Score criticité moyen",
+    "median_score_criticite": "Score criticité médian",
+    "p90_score_criticite": "Score criticité P90",
+    "p99_score_criticite": "Score criticité P99",
+    "avg_percent_aog": "% moyen AOG",
+    "avg_percent_nrc": "% moyen NRC",
+}
+EXPORT_COLUMNS = {
+    "pn": "PN",
+    "description": "Description",
+    "score_criticite": "Score criticité",
+    "percent_aog": "% AOG",
+    "percent_nrc": "% NRC",
+    "quantite_moyenne": "Quantité Moyenne",
+    "urgency": "URGENCY",
+    "segment": "Segment",
+    "annee": "Année",
+    "date": "Date",
+}
+FILTER_LABELS = {
+    ("pn", "contains"): "PN contient",
+    ("urgency", "eq"): "Urgence",
+    ("ac_reg", "eq"): "A/C REG",
+    ("score_criticite", "gte"): "Score criticité ≥",
+    ("annee", "eq"): "Année",
+}
+
+
+def describe_filters(
+    predicates: Predicates,
+) -> list[dict[str, str]]:
+    """French label and value of each predicate."""
+    return [
+        {
+            "filter": FILTER_LABELS.get(
+                (p.column, p.op), f"{p.column} {p.op}"
+            ),
+            "value": str(p.value),
+        }
+        for p in predicates
+    ]
+
+
+def describe_options(
+    options: dict[str, tuple],
+) -> list[dict[str, str]]:
+    """The display options the chart series were computed with."""
+    top_k, *_ = options["top_critical_parts"]
+    granularity, full_detail = options["evolution"]
+    return [
+        {"filter": "Top pièces", "value": str(top_k)},
+        {
+            "filter": "Granularité de l'évolution",
+            "value": GRANULARITY_LABELS[granularity],
+        },
+        {
+            "filter": "Détail complet des graphiques",
+            "value": "oui" if full_detail else "non",
+        },
+    ]
+
+
+def build_report(
+    dataset_id: str,
+    version: int,
+    run: Run,
+    predicates: Predicates,
+    options: Optional[dict[str, tuple]] = None,
+) -> dict:
+    """KPIs, chart series and filter description of one view.
+
+    `options` are the display options per view name, as in
+    `DEFAULT_VIEW_OPTIONS` which fills in any missing one.
+    """
+    options = {**DEFAULT_VIEW_OPTIONS, **(options or {})}
+
+    def get(name: str):
+        return view(
+            name,
+            dataset_id,
+            version,
+            run,
+            predicates,
+            *options[name],
+        )
+
+    return {
+        "generated_at": datetime.now().isoformat(
+            timespec="seconds"
+        ),
+        "dataset_id": dataset_id,
+        "dataset_version": version,
+        "filters": describe_filters(predicates),
+        "options": describe_options(options),
+        "kpis": {
+            "filtered_count": get("filtered_count"),
+            **get("kpis"),
+            **get("score_percentiles"),
+        },
+        "series": {
+            name: get(name) for name in REPORT_SERIES
+        },
+    }
+
+
+def report_json(report: dict) -> bytes:
+    return json.dumps(
+        report, ensure_ascii=False, indent=2
+    ).encode("utf-8")
+
+
+def report_xlsx(report: dict) -> bytes:
+    """One sheet for the KPIs and filters, one per chart series."""
+    summary = pd.DataFrame(
+        [
+            {
+                "Rubrique": "Indicateur",
+                "Nom": KPI_LABELS.get(key, key),
+                "Valeur": value,
+            }
+            for key, value in report["kpis"].items()
+        ]
+        + [
+            {
+                "Rubrique": "Filtre",
+                "Nom": item["filter"],
+                "Valeur": item["value"],
+            }
+            for item in report["filters"]
+        ]
+        + [
+            {
+                "Rubrique": "Option",
+                "Nom": item["filter"],
+                "Valeur": item["value"],
+            }
+            for item in report["options"]
+        ]
+        + [
+            {
+                "Rubrique": "Rapport",
+                "Nom": "Généré le",
+                "Valeur": report["generated_at"],
+            }
+        ]
+    )
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(
+        buffer, engine="openpyxl"
+    ) as writer:
+        summary.to_excel(
+            writer, sheet_name="Indicateurs", index=False
+        )
+        for name, sheet in REPORT_SERIES.items():
+            pd.DataFrame(report["series"][name]).to_excel(
+                writer, sheet_name=sheet, index=False
+            )
+    return buffer.getvalue()
+
+
+def export_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The exported columns present in `df`, under their French names."""
+    present = [
+        col for col in EXPORT_COLUMNS if col in df.columns
+    ]
+    return df[present].rename(columns=EXPORT_COLUMNS)
+
+
+def write_report(report: dict, report_format: str) -> bytes:
+    if report_format == "json":
+        return report_json(report)
+    return report_xlsx(report)
\ No newline at end of file
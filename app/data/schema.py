@@ -0,0 +1,92 @@
+from typing import TypedDict, Optional
+
+COL_REF_PIECE = "Réfèrence pièce"
+COL_PN_ALT = "PN"
+COL_DESC = "Description"
+COL_QTY_AVG = "Quantité Moyenne"
+COL_VISITS = "Nombre de visites"
+COL_FREQ_TOTAL = "Fréquence totale"
+COL_FREQ_NRC = "Fréquence NRC"
+COL_FREQ_AOG = "Fréquence AOG"
+COL_PERCENT_NRC = "% NRC"
+COL_PERCENT_AOG = "% AOG"
+COL_SCORE = "Score de criticité"
+COL_AC_REG = "A/C REG"
+COL_ANNEE = "Année"
+COL_URGENCY = "URGENCY"
+COL_SEGMENT = "Segment"
+COL_DATE = "Date"
+COLUMN_MAPPING = {
+    COL_REF_PIECE: "pn",
+    COL_PN_ALT: "pn",
+    COL_DESC: "description",
+    COL_QTY_AVG: "quantite_moyenne",
+    COL_VISITS: "nombre_visites",
+    COL_FREQ_TOTAL: "frequence_totale",
+    COL_FREQ_NRC: "frequence_nrc",
+    COL_FREQ_AOG: "frequence_aog",
+    COL_PERCENT_NRC: "percent_nrc",
+    COL_PERCENT_AOG: "percent_aog",
+    COL_SCORE: "score_criticite",
+    COL_AC_REG: "ac_reg",
+    COL_ANNEE: "annee",
+    COL_URGENCY: "urgency",
+    COL_SEGMENT: "segment",
+    COL_DATE: "date",
+}
+REQUIRED_UPLOAD_COLUMNS_FR = [
+    COL_REF_PIECE,
+    COL_DESC,
+    COL_SCORE,
+    COL_SEGMENT,
+]
+REQUIRED_INTERNAL_COLUMNS = [
+    COLUMN_MAPPING[col_fr]
+    for col_fr in REQUIRED_UPLOAD_COLUMNS_FR
+]
+FLOAT_COLUMNS = [
+    "quantite_moyenne",
+    "percent_nrc",
+    "percent_aog",
+    "score_criticite",
+]
+INT_COLUMNS = [
+    "nombre_visites",
+    "frequence_totale",
+    "frequence_nrc",
+    "frequence_aog",
+]
+STRING_COLUMNS = [
+    "pn",
+    "description",
+    "ac_reg",
+    "urgency",
+    "segment",
+]
+DATE_COLUMNS = ["date"]
+KEY_COLUMNS = ["pn", "ac_reg", "annee"]
+NO_YEAR = -1
+MONTH_COLUMN = "mois"
+NO_MONTH = -1
+
+
+class ItemData(TypedDict):
+    pn: str
+    description: str
+    quantite_moyenne: float
+    nombre_visites: int
+    frequence_totale: int
+    frequence_nrc: int
+    frequence_aog: int
+    percent_nrc: float
+    percent_aog: float
+    score_criticite: float
+    ac_reg: str
+    annee: Optional[int]
+    urgency: str
+    segment: str
+    date: str
+
+
+ITEM_COLUMNS = list(ItemData.__annotations__.keys())
+STORED_COLUMNS = [*ITEM_COLUMNS, MONTH_COLUMN]
\ No newline at end of file
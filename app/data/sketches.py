@@ -0,0 +1,371 @@
+"""Mergeable quantile sketches of the criticality score.
+
+`QuantileSketch` is a merging t-digest: the sorted values are folded
+into centroids (mean, weight) whose size follows the arcsine scale
+function, small in the tails and large around the median, so p99 stays
+accurate with about a hundred centroids. Two sketches merge by sorting
+their centroids together and folding again.
+
+`ScoreSketches` keeps one sketch per partition of the posting-index
+columns, i.e. per (urgency, ac_reg, annee) combination. The score
+percentiles and histogram of any combination of equality filters on
+those columns are read from the merge of the matching partitions'
+sketches, and a minimum score filter is applied on the merged sketch,
+without touching the rows. Inserted rows are merged into their
+partition's sketch; partitions with updated rows are rebuilt.
+"""
+
+from dataclasses import dataclass
+from typing import Collection, Hashable
+
+import numpy as np
+import pandas as pd
+
+from app.data.dataset import (
+    EMPTY_POSITIONS,
+    POSTING_COLUMNS,
+    Dataset,
+    DatasetChange,
+    DerivedIndex,
+)
+
+COMPRESSION = 200
+SKETCH_COLUMN = "score_criticite"
+
+
+@dataclass
+class QuantileSketch:
+    """Centroids sorted by mean, with the exact minimum and maximum."""
+
+    means: np.ndarray
+    weights: np.ndarray
+    minimum: float = 0.0
+    maximum: float = 0.0
+
+    @classmethod
+    def empty(cls) -> "QuantileSketch":
+        return cls(np.zeros(0), np.zeros(0))
+
+    @classmethod
+    def from_values(
+        cls, values: np.ndarray
+    ) -> "QuantileSketch":
+        if len(values) == 0:
+            return cls.empty()
+        values = np.sort(values.astype(np.float64))
+        return cls._folded(
+            values,
+            np.ones(len(values)),
+            float(values[0]),
+            float(values[-1]),
+        )
+
+    @classmethod
+    def merge(
+        cls, sketches: list["QuantileSketch"]
+    ) -> "QuantileSketch":
+        sketches = [s for s in sketches if s.count]
+        if not sketches:
+            return cls.empty()
+        if len(sketches) == 1:
+            return sketches[0]
+        means = np.concatenate([s.means for s in sketches])
+        order = np.argsort(means, kind="stable")
+        return cls._folded(
+            means[order],
+            np.concatenate([s.weights for s in sketches])[
+                order
+            ],
+            min(s.minimum for s in sketches),
+            max(s.maximum for s in sketches),
+        )
+
+    @classmethod
+    def _folded(
+        cls,
+        means: np.ndarray,
+        weights: np.ndarray,
+        minimum: float,
+        maximum: float,
+    ) -> "QuantileSketch":
+        """Folds sorted centroids into at most ~COMPRESSION / 2 ones."""
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        centers = (cumulative - weights / 2) / total
+        scale = (
+            COMPRESSION
+            / (2 * np.pi)
+            * np.arcsin(2 * centers - 1)
+        )
+        bins = np.floor(scale - scale[0]).astype(np.int64)
+        starts = np.flatnonzero(
+            np.concatenate([[True], bins[1:] != bins[:-1]])
+        )
+        folded = np.add.reduceat(weights, starts)
+        return cls(
+            np.add.reduceat(means * weights, starts)
+            / folded,
+            folded,
+            minimum,
+            maximum,
+        )
+
+    @property
+    def count(self) -> int:
+        return int(round(self.weights.sum()))
+
+    def _curve(self) -> tuple[np.ndarray, np.ndarray]:
+        """Piecewise-linear CDF: values and their cumulative weights."""
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return (
+            np.concatenate(
+                [[self.minimum], self.means, [self.maximum]]
+            ),
+            np.concatenate(
+                [[0.0], centers, [self.weights.sum()]]
+            ),
+        )
+
+    def rank(self, value: float) -> float:
+        """Approximate weight of the values below `value`."""
+        if not self.count:
+            return 0.0
+        values, ranks = self._curve()
+        return float(np.interp(value, values, ranks))
+
+    def quantiles(
+        self, qs: list[float], lower: float = -np.inf
+    ) -> list[float]:
+        """Approximate quantiles of the values at least `lower`.
+
+        All 0.0, as for an empty sketch, when no value is at least
+        `lower`.
+        """
+        if not self.count or lower > self.maximum:
+            return [0.0 for _ in qs]
+        values, ranks = self._curve()
+        below = self.rank(lower) if lower > -np.inf else 0.0
+        targets = below + np.asarray(qs) * (
+            ranks[-1] - below
+        )
+        return np.interp(targets, ranks, values).tolist()
+
+    def histogram(self, edges: np.ndarray) -> np.ndarray:
+        """Approximate number of values between consecutive edges.
+
+        Each centroid's weight goes to the bin of its mean, which is
+        exact for the single-value centroids of small sketches and of
+        the tails.
+        """
+        counts, _ = np.histogram(
+            self.means, bins=edges, weights=self.weights
+        )
+        return counts
+
+    def nbytes(self) -> int:
+        return self.means.nbytes + self.weights.nbytes
+
+
+class ScoreSketches(DerivedIndex):
+    """Score sketch per (urgency, ac_reg, annee) partition."""
+
+    def __init__(self, column: str = SKETCH_COLUMN):
+        self.column = column
+        self.partitions: dict[Hashable, QuantileSketch] = {}
+
+    def depends_on(self, columns: Collection[str]) -> bool:
+        return any(
+            col in columns
+            for col in [*POSTING_COLUMNS, self.column]
+        )
+
+    def build(self, dataset: Dataset) -> None:
+        frame = pd.DataFrame(
+            {
+                col: dataset.column(col)
+                for col in [*POSTING_COLUMNS, self.column]
+            }
+        )
+        values = frame[self.column].to_numpy()
+        self.partitions = {
+            key: QuantileSketch.from_values(
+                values[positions]
+            )
+            for key, positions in frame.groupby(
+                POSTING_COLUMNS, sort=False
+            ).indices.items()
+        }
+
+    def _partition_positions(
+        self, dataset: Dataset, key: tuple
+    ) -> np.ndarray:
+        """Rows of a partition.
+
+        Starts from the shortest of its posting lists and keeps the rows
+        whose codes match on the other columns, in time proportional to
+        that list rather than to the dataset.
+        """
+        lists = [
+            dataset.derived(f"postings_{col}").positions(
+                value
+            )
+            for col, value in zip(POSTING_COLUMNS, key)
+        ]
+        shortest = int(np.argmin([len(p) for p in lists]))
+        positions = lists[shortest]
+        for i, (col, value) in enumerate(
+            zip(POSTING_COLUMNS, key)
+        ):
+            if i == shortest or not len(positions):
+                continue
+            encoding = dataset.encoding(col)
+            code = encoding.code_of.get(value)
+            if code is None:
+                return EMPTY_POSITIONS
+            positions = positions[
+                encoding.codes(len(dataset))[positions]
+                == code
+            ]
+        return positions
+
+    def apply(
+        self, dataset: Dataset, change: DatasetChange
+    ) -> None:
+        # Runs after the encodings and posting indexes, registered
+        # first, are updated. A sketch cannot retract a value, so the
+        # partitions an updated row left or changed its score in are
+        # rebuilt; rows updated without such a change are skipped.
+        values = dataset.column(self.column)
+        updated = change.updated
+        if len(updated):
+            changed = (
+                change.previous[self.column]
+                != values[updated]
+            )
+            for col in POSTING_COLUMNS:
+                changed |= (
+                    change.previous[col]
+                    != dataset.column(col)[updated]
+                )
+            rebuilt = set(
+                zip(
+                    *(
+                        change.previous[col][
+                            changed
+                        ].tolist()
+                        for col in POSTING_COLUMNS
+                    )
+                )
+            ) | set(
+                zip(
+                    *(
+                        dataset.column(col)[
+                            updated[changed]
+                        ].tolist()
+                        for col in POSTING_COLUMNS
+                    )
+                )
+            )
+        else:
+            rebuilt = set()
+        for key in rebuilt:
+            self.partitions[key] = (
+                QuantileSketch.from_values(
+                    values[
+                        self._partition_positions(
+                            dataset, key
+                        )
+                    ]
+                )
+            )
+        inserted = pd.DataFrame(
+            {
+                col: dataset.column(col)[change.inserted]
+                for col in POSTING_COLUMNS
+            }
+        )
+        for key, positions in inserted.groupby(
+            POSTING_COLUMNS, sort=False
+        ).indices.items():
+            if key in rebuilt:
+                continue
+            self.partitions[key] = QuantileSketch.merge(
+                [
+                    self.partitions.get(
+                        key, QuantileSketch.empty()
+                    ),
+                    QuantileSketch.from_values(
+                        values[change.inserted[positions]]
+                    ),
+                ]
+            )
+
+    def dump(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """JSON-ready description and arrays to save, see `restore`."""
+        sketches = list(self.partitions.values())
+        return {
+            "column": self.column,
+            "keys": [list(key) for key in self.partitions],
+        }, {
+            "means": np.concatenate(
+                [np.zeros(0)] + [s.means for s in sketches]
+            ),
+            "weights": np.concatenate(
+                [np.zeros(0)]
+                + [s.weights for s in sketches]
+            ),
+            "bounds": np.cumsum(
+                [0] + [len(s.means) for s in sketches]
+            ),
+            "minimum": np.array(
+                [s.minimum for s in sketches],
+                dtype=np.float64,
+            ),
+            "maximum": np.array(
+                [s.maximum for s in sketches],
+                dtype=np.float64,
+            ),
+        }
+
+    @classmethod
+    def restore(
+        cls, meta: dict, arrays: dict[str, np.ndarray]
+    ) -> "ScoreSketches":
+        index = cls(meta["column"])
+        bounds = arrays["bounds"].tolist()
+        index.partitions = {
+            tuple(key): QuantileSketch(
+                arrays["means"][start:end],
+                arrays["weights"][start:end],
+                float(arrays["minimum"][i]),
+                float(arrays["maximum"][i]),
+            )
+            for i, (key, start, end) in enumerate(
+                zip(meta["keys"], bounds, bounds[1:])
+            )
+        }
+        return index
+
+    def sketch(
+        self, equalities: dict[str, Hashable]
+    ) -> QuantileSketch:
+        """Merged sketch of the partitions matching `equalities`."""
+        slots = [
+            (POSTING_COLUMNS.index(col), value)
+            for col, value in equalities.items()
+        ]
+        return QuantileSketch.merge(
+            [
+                sketch
+                for key, sketch in self.partitions.items()
+                if all(
+                    key[i] == value for i, value in slots
+                )
+            ]
+        )
+
+    def nbytes(self) -> int:
+        return sum(
+            sketch.nbytes()
+            for sketch in self.partitions.values()
+        )
\ No newline at end of file
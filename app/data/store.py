@@ -0,0 +1,435 @@
+"""Optional persistent analytical store (SQLite, or DuckDB if installed).
+
+Enabled by pointing the `DASHBOARD_STORE_PATH` environment variable at a
+database file; a `.duckdb` suffix selects DuckDB when the `duckdb`
+package is available, anything else uses the standard library SQLite.
+Datasets are ingested once and every dashboard query runs as an indexed
+SQL statement, so a restarted worker reopens the file instead of
+re-parsing Excel and datasets do not have to fit in memory. Queries
+are generated from plans by `app.data.query.SQLExecutor`.
+"""
+
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from app.data.dataset import coerce_columns
+from app.data.schema import (
+    ITEM_COLUMNS,
+    KEY_COLUMNS,
+    FLOAT_COLUMNS,
+    INT_COLUMNS,
+    MONTH_COLUMN,
+    STORED_COLUMNS,
+)
+
+STORE_PATH_ENV = "DASHBOARD_STORE_PATH"
+SOURCE_DEFAULT = "default"
+SOURCE_SAMPLE = "sample"
+SOURCE_UPLOAD = "upload"
+INSERT_CHUNK_ROWS = 50_000
+
+
+def _sql_type(col: str) -> str:
+    if col in FLOAT_COLUMNS:
+        return "DOUBLE"
+    if col in INT_COLUMNS or col in ("annee", MONTH_COLUMN):
+        return "BIGINT"
+    return "TEXT"
+
+
+def file_signature(path: Path) -> str:
+    """Identifies a file version without reading it."""
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class AnalyticalStore:
+    """Datasets persisted as rows of one `items` table keyed by dataset id."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._distinct_cache: dict[
+            tuple[str, str], tuple[int, list]
+        ] = {}
+        self.engine = "sqlite"
+        if path.endswith(".duckdb"):
+            try:
+                import duckdb
+
+                self._conn = duckdb.connect(path)
+                self.engine = "duckdb"
+            except ImportError:
+                self._conn = None
+        else:
+            self._conn = None
+        if self._conn is None:
+            import sqlite3
+
+            self._conn = sqlite3.connect(
+                path,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        columns = ", ".join(
+            f"{col} {_sql_type(col)}"
+            for col in STORED_COLUMNS
+        )
+        statements = [
+            "CREATE TABLE IF NOT EXISTS datasets ("
+            "dataset_id TEXT PRIMARY KEY, source TEXT, "
+            "signature TEXT, version BIGINT, created_at DOUBLE)",
+            f"CREATE TABLE IF NOT EXISTS items (dataset_id TEXT, {columns})",
+            "CREATE INDEX IF NOT EXISTS items_key ON items "
+            "(dataset_id, pn, ac_reg, annee)",
+            "CREATE INDEX IF NOT EXISTS items_urgency ON items "
+            "(dataset_id, urgency)",
+            "CREATE INDEX IF NOT EXISTS items_ac_reg ON items "
+            "(dataset_id, ac_reg)",
+            "CREATE INDEX IF NOT EXISTS items_annee ON items "
+            "(dataset_id, annee)",
+            "CREATE INDEX IF NOT EXISTS items_score ON items "
+            "(dataset_id, score_criticite)",
+        ]
+        with self._lock:
+            for statement in statements[:2]:
+                self._conn.execute(statement)
+            existing = {
+                row[1]
+                for row in self._conn.execute(
+                    "PRAGMA table_info('items')"
+                ).fetchall()
+            }
+            for col in STORED_COLUMNS:
+                if col not in existing:
+                    self._conn.execute(
+                        f"ALTER TABLE items ADD COLUMN {col} "
+                        f"{_sql_type(col)}"
+                    )
+            for statement in statements[2:]:
+                self._conn.execute(statement)
+
+    def query(self, sql: str, params: list) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                sql, params
+            ).fetchall()
+
+    def _insert_rows(
+        self, dataset_id: str, df: pd.DataFrame
+    ):
+        columns = coerce_columns(df)
+        placeholders = ", ".join(
+            "?" for _ in range(len(STORED_COLUMNS) + 1)
+        )
+        sql = (
+            f"INSERT INTO items (dataset_id, {', '.join(STORED_COLUMNS)}) "
+            f"VALUES ({placeholders})"
+        )
+        total = len(columns["pn"])
+        for start in range(0, total, INSERT_CHUNK_ROWS):
+            chunk = [
+                columns[col][
+                    start : start + INSERT_CHUNK_ROWS
+                ].tolist()
+                for col in STORED_COLUMNS
+            ]
+            self._conn.executemany(
+                sql,
+                [(dataset_id, *row) for row in zip(*chunk)],
+            )
+
+    def find_dataset(
+        self, source: str, signature: str
+    ) -> Optional[str]:
+        rows = self.query(
+            "SELECT dataset_id FROM datasets WHERE source = ? "
+            "AND signature = ? ORDER BY created_at DESC LIMIT 1",
+            [source, signature],
+        )
+        return rows[0][0] if rows else None
+
+    def version(self, dataset_id: str) -> int:
+        rows = self.query(
+            "SELECT version FROM datasets WHERE dataset_id = ?",
+            [dataset_id],
+        )
+        return int(rows[0][0]) if rows else 0
+
+    def source(self, dataset_id: str) -> Optional[str]:
+        rows = self.query(
+            "SELECT source FROM datasets WHERE dataset_id = ?",
+            [dataset_id],
+        )
+        return rows[0][0] if rows else None
+
+    def copy(self, dataset_id: str) -> str:
+        """Copies a dataset's rows into a new uploaded dataset.
+
+        Default and sample datasets are shared by every session, so a
+        session changes its own copy of them instead.
+        """
+        copy_id = uuid.uuid4().hex
+        columns = ", ".join(STORED_COLUMNS)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    f"INSERT INTO items (dataset_id, {columns}) "
+                    f"SELECT ?, {columns} FROM items "
+                    "WHERE dataset_id = ?",
+                    [copy_id, dataset_id],
+                )
+                self._conn.execute(
+                    "INSERT INTO datasets VALUES (?, ?, ?, ?, ?)",
+                    [
+                        copy_id,
+                        SOURCE_UPLOAD,
+                        "",
+                        1,
+                        time.time(),
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return copy_id
+
+    def ingest(
+        self,
+        df: pd.DataFrame,
+        source: str = SOURCE_UPLOAD,
+        signature: str = "",
+    ) -> str:
+        """Stores a prepared DataFrame as a new dataset and returns its id."""
+        dataset_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if source != SOURCE_UPLOAD:
+                    self._delete(source=source)
+                self._insert_rows(dataset_id, df)
+                self._conn.execute(
+                    "INSERT INTO datasets VALUES (?, ?, ?, ?, ?)",
+                    [
+                        dataset_id,
+                        source,
+                        signature,
+                        1,
+                        time.time(),
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dataset_id
+
+    def upsert(
+        self, dataset_id: str, df: pd.DataFrame
+    ) -> tuple[int, int]:
+        """Merges rows keyed on pn + ac_reg + annee, returns (inserted, updated).
+
+        Stored rows sharing a key with the delta are replaced by its
+        last row for that key.
+        """
+        df = df.drop_duplicates(
+            subset=KEY_COLUMNS, keep="last"
+        )
+        keys = coerce_columns(df[ITEM_COLUMNS])
+        key_rows = list(
+            zip(
+                *(keys[col].tolist() for col in KEY_COLUMNS)
+            )
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS delta_keys "
+                    "(pn TEXT, ac_reg TEXT, annee BIGINT)"
+                )
+                self._conn.execute("DELETE FROM delta_keys")
+                self._conn.executemany(
+                    "INSERT INTO delta_keys VALUES (?, ?, ?)",
+                    key_rows,
+                )
+                in_delta = (
+                    "dataset_id = ? AND (pn, ac_reg, annee) IN "
+                    "(SELECT pn, ac_reg, annee FROM delta_keys)"
+                )
+                updated = self._conn.execute(
+                    "SELECT COUNT(*) FROM (SELECT DISTINCT pn, ac_reg, "
+                    f"annee FROM items WHERE {in_delta})",
+                    [dataset_id],
+                ).fetchone()[0]
+                self._conn.execute(
+                    f"DELETE FROM items WHERE {in_delta}",
+                    [dataset_id],
+                )
+                self._insert_rows(dataset_id, df)
+                self._conn.execute(
+                    "UPDATE datasets SET version = version + 1 "
+                    "WHERE dataset_id = ?",
+                    [dataset_id],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(key_rows) - updated, updated
+
+    def replace_columns(
+        self,
+        dataset_id: str,
+        inputs: Sequence[str],
+        compute: Callable[
+            [dict[str, np.ndarray]], dict[str, np.ndarray]
+        ],
+    ) -> int:
+        """Rewrites columns of every row from its `inputs` columns.
+
+        `compute` maps the `inputs` arrays to the new arrays by column.
+        Bumps the version and returns the number of rows rewritten.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {', '.join(inputs)} FROM items "
+                    "WHERE dataset_id = ?",
+                    [dataset_id],
+                ).fetchall()
+                values = list(zip(*rows)) or [
+                    () for _ in range(len(inputs) + 1)
+                ]
+                outputs = compute(
+                    {
+                        col: np.asarray(
+                            values[i + 1], dtype=np.float64
+                        )
+                        for i, col in enumerate(inputs)
+                    }
+                )
+                assignments = ", ".join(
+                    f"{col} = ?" for col in outputs
+                )
+                self._conn.executemany(
+                    f"UPDATE items SET {assignments} "
+                    "WHERE rowid = ?",
+                    list(
+                        zip(
+                            *(
+                                array.tolist()
+                                for array in outputs.values()
+                            ),
+                            values[0],
+                        )
+                    ),
+                )
+                self._conn.execute(
+                    "UPDATE datasets SET version = version + 1 "
+                    "WHERE dataset_id = ?",
+                    [dataset_id],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _delete(
+        self,
+        dataset_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ):
+        if source is not None:
+            ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT dataset_id FROM datasets WHERE source = ?",
+                    [source],
+                ).fetchall()
+            ]
+        else:
+            ids = [dataset_id]
+        for stale_id in ids:
+            for key in [
+                key
+                for key in self._distinct_cache
+                if key[0] == stale_id
+            ]:
+                del self._distinct_cache[key]
+            self._conn.execute(
+                "DELETE FROM items WHERE dataset_id = ?",
+                [stale_id],
+            )
+            self._conn.execute(
+                "DELETE FROM datasets WHERE dataset_id = ?",
+                [stale_id],
+            )
+
+    def release(self, dataset_id: str):
+        """Drops an uploaded dataset; default and sample data are kept."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source FROM datasets WHERE dataset_id = ?",
+                [dataset_id],
+            ).fetchall()
+            if rows and rows[0][0] == SOURCE_UPLOAD:
+                self._delete(dataset_id=dataset_id)
+
+    def distinct(
+        self, dataset_id: str, column: str
+    ) -> list[Union[str, int]]:
+        """Sorted distinct values, cached until the dataset version changes."""
+        version = self.version(dataset_id)
+        cached = self._distinct_cache.get(
+            (dataset_id, column)
+        )
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        values = [
+            row[0]
+            for row in self.query(
+                f"SELECT DISTINCT {column} FROM items "
+                f"WHERE dataset_id = ? ORDER BY {column}",
+                [dataset_id],
+            )
+        ]
+        self._distinct_cache[(dataset_id, column)] = (
+            version,
+            values,
+        )
+        return values
+
+
+_store: Optional[AnalyticalStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[AnalyticalStore]:
+    """Returns the process-wide store, or None when it is not configured."""
+    global _store
+    path = os.environ.get(STORE_PATH_ENV, "")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            Path(path).parent.mkdir(
+                parents=True, exist_ok=True
+            )
+            _store = AnalyticalStore(path)
+    return _store
\ No newline at end of file
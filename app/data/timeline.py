@@ -0,0 +1,63 @@
+"""Evolution chart granularities and the month → quarter rollup.
+
+Year granularity groups on the `annee` column. Quarter and month
+granularities group on the YYYYMM `mois` key derived from the optional
+date column; quarters are summed from the month groups, which the
+per-month summary table answers without scanning rows.
+"""
+
+from typing import Union
+
+from app.data.schema import NO_MONTH
+
+GRANULARITY_YEAR = "annee"
+GRANULARITY_QUARTER = "trimestre"
+GRANULARITY_MONTH = "mois"
+GRANULARITY_LABELS = {
+    GRANULARITY_YEAR: "Année",
+    GRANULARITY_QUARTER: "Trimestre",
+    GRANULARITY_MONTH: "Mois",
+}
+
+Row = dict[str, Union[str, int, float, None]]
+
+
+def period_of(month_key: int, granularity: str) -> str:
+    """Chart label of a YYYYMM key, e.g. `2024-03` or `2024-T1`."""
+    year, month = divmod(month_key, 100)
+    if granularity == GRANULARITY_QUARTER:
+        return f"{year}-T{(month - 1) // 3 + 1}"
+    return f"{year}-{month:02d}"
+
+
+def roll_up_months(
+    rows: list[Row],
+    granularity: str,
+    sum_keys: list[str],
+    month_key: str = "mois",
+) -> list[Row]:
+    """Sums per-month aggregate rows into periods, oldest first.
+
+    Rows must carry additive aggregates only (counts and sums) so
+    means can be recomputed per period afterwards.
+    """
+    periods: dict[str, Row] = {}
+    for row in sorted(
+        (
+            row
+            for row in rows
+            if row[month_key] not in (None, NO_MONTH)
+        ),
+        key=lambda row: row[month_key],
+    ):
+        label = period_of(int(row[month_key]), granularity)
+        period = periods.setdefault(
+            label,
+            {
+                "period": label,
+                **{key: 0 for key in sum_keys},
+            },
+        )
+        for key in sum_keys:
+            period[key] += row[key]
+    return list(periods.values())
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Top-k selection by partial partitioning instead of a full sort."""
+
+import numpy as np
+
+TOP_K_CHOICES = [10, 25, 100]
+
+
+def top_k_indices(
+    values: np.ndarray, k: int, descending: bool = True
+) -> np.ndarray:
+    """Indices of the `k` best values, best first.
+
+    `np.argpartition` finds the k-th best value in O(n); only the k
+    selected entries are then sorted. Ties are broken by position, so
+    the result matches a stable full sort truncated to `k`.
+    """
+    count = len(values)
+    if k <= 0 or count == 0:
+        return np.empty(0, dtype=np.int64)
+    keys = -values if descending else values
+    if k < count:
+        threshold = keys[
+            np.argpartition(keys, k - 1)[k - 1]
+        ]
+        better = np.flatnonzero(keys < threshold)
+        ties = np.flatnonzero(keys == threshold)
+        selected = np.concatenate(
+            [better, ties[: k - len(better)]]
+        )
+    else:
+        selected = np.arange(count)
+    return selected[np.lexsort((selected, keys[selected]))]
\ No newline at end of file
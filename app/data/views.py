@@ -0,0 +1,499 @@
+"""View-models of the dashboard: KPIs, chart series and table pages.
+
+Each function turns the sidebar predicates and display options into
+the plain data a component renders, running its plans through `run`
+(the session's cached executor). Living outside the Reflex state, they
+can also be computed before any session exists, see `app.warmup`.
+
+`view` serves them from one LRU per worker shared by all sessions,
+keyed by dataset id and version, view name, normalised predicates and
+options, so sessions looking at the same filters compute a view once.
+Only the first table page is cached. `invalidate_views` drops a
+dataset's entries when it is replaced or changed.
+
+The score percentiles and histogram and the comparison with a previous
+dataset (`DATASET_VIEWS`) also receive the dataset id and version, to
+read the dataset's quantile sketches or whole columns.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Union
+
+import numpy as np
+
+from app.data.chart_data import (
+    downsample_line,
+    top_n_with_other,
+)
+from app.data.compare import comparison
+from app.data.dataset import POSTING_COLUMNS
+from app.data.query import (
+    Aggregate,
+    OrderBy,
+    Predicate,
+    QueryPlan,
+    Rows,
+    select_columns,
+)
+from app.data.records import as_dicts
+from app.data.registry import get_dataset
+from app.data.schema import MONTH_COLUMN, NO_YEAR
+from app.data.sketches import SKETCH_COLUMN, QuantileSketch
+from app.data.timeline import (
+    GRANULARITY_YEAR,
+    roll_up_months,
+)
+from app.data.topk import TOP_K_CHOICES
+
+TABLE_PAGE_SIZE = 50
+VIEW_CACHE_SIZE = 512
+KPI_AGGREGATES = (
+    Aggregate("mean", "score_criticite", "avg_score"),
+    Aggregate("mean", "percent_aog", "avg_aog"),
+    Aggregate("mean", "percent_nrc", "avg_nrc"),
+)
+SCORE_PERCENTILES = {"median": 0.5, "p90": 0.9, "p99": 0.99}
+HISTOGRAM_BINS = 20
+
+Run = Callable[[QueryPlan], Rows]
+Predicates = tuple[Predicate, ...]
+Series = list[dict[str, Union[str, int, float]]]
+
+
+def filtered_count(run: Run, predicates: Predicates) -> int:
+    rows = run(
+        QueryPlan(
+            predicates=predicates,
+            aggregates=(Aggregate("count", alias="count"),),
+        )
+    )
+    return int(rows[0]["count"]) if rows else 0
+
+
+def table_rows(
+    run: Run, predicates: Predicates, page: int = 0
+) -> list[dict]:
+    return as_dicts(
+        run(
+            QueryPlan(
+                predicates=predicates,
+                limit=TABLE_PAGE_SIZE,
+                offset=page * TABLE_PAGE_SIZE,
+            )
+        )
+    )
+
+
+def kpis(
+    run: Run, predicates: Predicates
+) -> dict[str, float]:
+    """Mean score, and mean AOG and NRC rates in percent."""
+    rows = run(
+        QueryPlan(
+            predicates=predicates, aggregates=KPI_AGGREGATES
+        )
+    )
+    row = rows[0] if rows else {}
+    return {
+        "avg_score_criticite": round(
+            row.get("avg_score", 0.0), 2
+        ),
+        "avg_percent_aog": round(
+            row.get("avg_aog", 0.0) * 100, 2
+        ),
+        "avg_percent_nrc": round(
+            row.get("avg_nrc", 0.0) * 100, 2
+        ),
+    }
+
+
+def top_critical_parts(
+    run: Run, predicates: Predicates, top_k: int
+) -> Series:
+    rows = run(
+        QueryPlan(
+            predicates=predicates,
+            columns=("pn", "score_criticite"),
+            order_by=OrderBy(
+                ("score_criticite",), descending=True
+            ),
+            limit=top_k,
+        )
+    )
+    return [
+        {
+            "name": str(row["pn"]),
+            "Score": row["score_criticite"],
+        }
+        for row in rows
+    ]
+
+
+def aog_nrc_by_part(
+    run: Run, predicates: Predicates, top_k: int
+) -> Series:
+    rows = run(
+        QueryPlan(
+            predicates=predicates,
+            group_by="pn",
+            aggregates=(
+                Aggregate("mean", "percent_aog", "avg_aog"),
+                Aggregate("mean", "percent_nrc", "avg_nrc"),
+            ),
+            order_by=OrderBy(
+                ("avg_aog", "avg_nrc"), descending=True
+            ),
+            limit=top_k,
+        )
+    )
+    return [
+        {
+            "name": str(row["pn"]),
+            "% AOG": round(row["avg_aog"] * 100, 2),
+            "% NRC": round(row["avg_nrc"] * 100, 2),
+        }
+        for row in rows
+    ]
+
+
+def urgency_distribution(
+    run: Run, predicates: Predicates, full_detail: bool
+) -> Series:
+    rows = run(
+        QueryPlan(
+            predicates=predicates,
+            group_by="urgency",
+            aggregates=(Aggregate("count", alias="count"),),
+            order_by=OrderBy(("count",), descending=True),
+        )
+    )
+    data = [
+        {
+            "name": str(row["urgency"]),
+            "value": row["count"],
+        }
+        for row in rows
+    ]
+    if full_detail:
+        return data
+    return top_n_with_other(data, "value")
+
+
+def evolution(
+    run: Run,
+    predicates: Predicates,
+    granularity: str,
+    full_detail: bool,
+) -> Series:
+    group_by = (
+        "annee"
+        if granularity == GRANULARITY_YEAR
+        else MONTH_COLUMN
+    )
+    rows = run(
+        QueryPlan(
+            predicates=predicates,
+            group_by=group_by,
+            aggregates=(
+                Aggregate("count", alias="count"),
+                Aggregate(
+                    "sum",
+                    "score_criticite",
+                    "total_score_criticite",
+                ),
+                Aggregate(
+                    "sum",
+                    "quantite_moyenne",
+                    "total_quantite_moyenne",
+                ),
+            ),
+            order_by=OrderBy((group_by,)),
+        )
+    )
+    sum_keys = [
+        "count",
+        "total_score_criticite",
+        "total_quantite_moyenne",
+    ]
+    if group_by == "annee":
+        periods = [
+            {
+                "period": str(int(row["annee"])),
+                **{key: row[key] for key in sum_keys},
+            }
+            for row in rows
+            if row["annee"] not in (None, NO_YEAR)
+        ]
+    else:
+        periods = roll_up_months(
+            rows, granularity, sum_keys
+        )
+    data = [
+        {
+            "name": period["period"],
+            "Score Moyen": round(
+                period["total_score_criticite"]
+                / period["count"],
+                2,
+            ),
+            "Quantité Totale": round(
+                period["total_quantite_moyenne"], 2
+            ),
+        }
+        for period in periods
+        if period["count"]
+    ]
+    if full_detail:
+        return data
+    return downsample_line(
+        data, ["Score Moyen", "Quantité Totale"]
+    )
+
+
+def score_sketch(
+    dataset_id: str,
+    version: int,
+    run: Run,
+    predicates: Predicates,
+) -> tuple[QuantileSketch, float]:
+    """Sketch of the filtered scores and the minimum score to apply.
+
+    Equality filters on the partition columns and a minimum score are
+    answered by merging the dataset's partition sketches; any other
+    filter, or a dataset without sketches, sketches the selected rows.
+    """
+    dataset = get_dataset(dataset_id, version)
+    name = f"sketches_{SKETCH_COLUMN}"
+    if dataset is not None and dataset.has_derived(name):
+        equalities = {
+            p.column: p.value
+            for p in predicates
+            if p.op == "eq" and p.column in POSTING_COLUMNS
+        }
+        lower = [
+            p.value
+            for p in predicates
+            if p.op == "gte" and p.column == SKETCH_COLUMN
+        ]
+        if len(lower) <= 1 and len(equalities) + len(
+            lower
+        ) == len(predicates):
+            return dataset.derived(name).sketch(
+                equalities
+            ), (float(lower[0]) if lower else -np.inf)
+    values = select_columns(
+        dataset_id, version, predicates, (SKETCH_COLUMN,)
+    )[SKETCH_COLUMN]
+    return QuantileSketch.from_values(values), -np.inf
+
+
+def score_percentiles(
+    dataset_id: str,
+    version: int,
+    run: Run,
+    predicates: Predicates,
+) -> dict[str, float]:
+    """Median, p90 and p99 of the score."""
+    sketch, lower = score_sketch(
+        dataset_id, version, run, predicates
+    )
+    values = sketch.quantiles(
+        list(SCORE_PERCENTILES.values()), lower
+    )
+    return {
+        f"{name}_score_criticite": round(value, 2)
+        for name, value in zip(SCORE_PERCENTILES, values)
+    }
+
+
+def score_histogram(
+    dataset_id: str,
+    version: int,
+    run: Run,
+    predicates: Predicates,
+) -> Series:
+    """Row counts of `HISTOGRAM_BINS` equal score ranges."""
+    sketch, lower = score_sketch(
+        dataset_id, version, run, predicates
+    )
+    start = max(sketch.minimum, lower)
+    if not sketch.count or sketch.maximum < start:
+        return []
+    stop = max(sketch.maximum, start + 1)
+    edges = np.linspace(start, stop, HISTOGRAM_BINS + 1)
+    counts = sketch.histogram(edges)
+    return [
+        {
+            "name": f"{low:.1f}–{high:.1f}",
+            "Lignes": int(round(count)),
+        }
+        for low, high, count in zip(
+            edges[:-1], edges[1:], counts.tolist()
+        )
+    ]
+
+
+def dataset_comparison(
+    dataset_id: str,
+    version: int,
+    run: Run,
+    predicates: Predicates,
+    previous_id: str,
+    previous_version: int,
+    top_k: int,
+) -> dict:
+    """Changes since a previous dataset, see `app.data.compare`."""
+    return comparison(
+        dataset_id,
+        version,
+        predicates,
+        previous_id,
+        previous_version,
+        top_k,
+    )
+
+
+CHART_VIEWS = (
+    "top_critical_parts",
+    "aog_nrc_by_part",
+    "urgency_distribution",
+    "evolution",
+    "score_histogram",
+)
+VIEWS: dict[str, Callable] = {
+    "filtered_count": filtered_count,
+    "table_rows": table_rows,
+    "kpis": kpis,
+    "top_critical_parts": top_critical_parts,
+    "aog_nrc_by_part": aog_nrc_by_part,
+    "urgency_distribution": urgency_distribution,
+    "evolution": evolution,
+}
+DATASET_VIEWS: dict[str, Callable] = {
+    "score_percentiles": score_percentiles,
+    "score_histogram": score_histogram,
+    "comparison": dataset_comparison,
+}
+
+
+@dataclass
+class ViewCache:
+    """LRU of view-models shared by the sessions of a worker.
+
+    Values are shared between sessions and must be treated as
+    read-only.
+    """
+
+    maxsize: int = VIEW_CACHE_SIZE
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    _cache: OrderedDict = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock
+    )
+
+    def get(self, key: tuple, compute: Callable):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return value
+
+    def invalidate(self, dataset_id: str) -> None:
+        with self._lock:
+            for key in [
+                key
+                for key in self._cache
+                if key[0] == dataset_id
+            ]:
+                del self._cache[key]
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+view_cache = ViewCache()
+
+
+def view(
+    name: str,
+    dataset_id: str,
+    version: int,
+    run: Run,
+    predicates: Predicates,
+    *options: Hashable,
+):
+    """View `name` of a dataset, from the shared cache when possible.
+
+    `predicates` are normalized first, so the views compute what the
+    cache key says whatever form the caller passed them in.
+    """
+    predicates = (
+        QueryPlan(predicates=predicates)
+        .normalized()
+        .predicates
+    )
+    if name == "table_rows" and options and options[0]:
+        return table_rows(run, predicates, *options)
+    key = (dataset_id, version, name, predicates, options)
+    if name in DATASET_VIEWS:
+        return view_cache.get(
+            key,
+            lambda: DATASET_VIEWS[name](
+                dataset_id,
+                version,
+                run,
+                predicates,
+                *options,
+            ),
+        )
+    return view_cache.get(
+        key, lambda: VIEWS[name](run, predicates, *options)
+    )
+
+
+def invalidate_views(dataset_id: str) -> None:
+    view_cache.invalidate(dataset_id)
+
+
+DEFAULT_VIEW_OPTIONS: dict[str, tuple] = {
+    "filtered_count": (),
+    "table_rows": (0,),
+    "kpis": (),
+    "score_percentiles": (),
+    "score_histogram": (),
+    "top_critical_parts": (TOP_K_CHOICES[0],),
+    "aog_nrc_by_part": (TOP_K_CHOICES[0],),
+    "urgency_distribution": (False,),
+    "evolution": (GRANULARITY_YEAR, False),
+}
+
+
+def default_views(
+    dataset_id: str, version: int, run: Run
+) -> dict:
+    """The views of a fresh session: no filter, default options."""
+    return {
+        name: view(
+            name, dataset_id, version, run, (), *options
+        )
+        for name, options in DEFAULT_VIEW_OPTIONS.items()
+    }
\ No newline at end of file
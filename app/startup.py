@@ -0,0 +1,134 @@
+"""Cold-start timings of a worker.
+
+`mark` records, the first time a worker reaches a milestone, the
+seconds elapsed since its process started: `app_imported` once the
+app module is built, `first_page` once the first page load has its
+data. `/metrics/startup` serves them.
+
+`python -m app.startup` prints the import time of the app's modules
+and of its heaviest dependencies (from `python -X importtime`), then
+the time to load the default dataset from its artifacts and by
+parsing the workbook.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+IMPORT_REPORT_LIMIT = 10
+
+
+def _process_start() -> float:
+    """Wall-clock start of this process (import time off Linux)."""
+    try:
+        with open("/proc/self/stat") as handle:
+            fields = handle.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as handle:
+            uptime = float(handle.read().split()[0])
+        started_ticks = int(fields[19])
+    except (OSError, ValueError, IndexError):
+        return time.time()
+    return (
+        time.time()
+        - uptime
+        + started_ticks / os.sysconf("SC_CLK_TCK")
+    )
+
+
+PROCESS_START = _process_start()
+_marks: dict[str, float] = {}
+
+
+def mark(milestone: str) -> None:
+    """Records the first time this worker reaches `milestone`."""
+    if milestone not in _marks:
+        _marks[milestone] = round(
+            time.time() - PROCESS_START, 3
+        )
+
+
+def startup_stats() -> dict:
+    return {"pid": os.getpid(), **_marks}
+
+
+def import_times(
+    module: str = "app.app",
+) -> list[tuple[str, float]]:
+    """(module, cumulative seconds) for a fresh `import module`.
+
+    Lists the app's own modules and the slowest top-level packages.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {module}",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    app_modules, packages = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split("|")
+        if (
+            len(fields) != 3
+            or not fields[1].strip().isdigit()
+        ):
+            continue
+        name = fields[2].strip()
+        seconds = int(fields[1]) / 1e6
+        if name == "app" or name.startswith("app."):
+            app_modules.append((name, seconds))
+        elif "." not in name and not name.startswith("_"):
+            packages.append((name, seconds))
+    packages.sort(key=lambda item: item[1], reverse=True)
+    return app_modules + packages[:IMPORT_REPORT_LIMIT]
+
+
+def _timed(action) -> float:
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    for name, seconds in import_times():
+        print(f"import {name:<45} {seconds * 1000:8.1f} ms")
+    from app.data.aggregates import register_summaries
+    from app.data.artifacts import (
+        ARTIFACT_VERSION,
+        DEFAULT_WORKBOOK,
+        artifact_dir,
+        build_default_dataset,
+        default_dataset_id,
+    )
+    from app.data.registry import read_dataset
+
+    if DEFAULT_WORKBOOK.exists():
+        dataset_id = default_dataset_id(DEFAULT_WORKBOOK)
+        parse = _timed(
+            lambda: build_default_dataset(DEFAULT_WORKBOOK)
+        )
+        load = _timed(
+            lambda: register_summaries(
+                read_dataset(
+                    artifact_dir() / dataset_id,
+                    dataset_id,
+                    ARTIFACT_VERSION,
+                )
+            )
+        )
+        print(
+            f"default dataset, workbook parse: {parse:.3f}s"
+        )
+        print(
+            f"default dataset, artifacts:      {load:.3f}s"
+        )
+    else:
+        print(f"{DEFAULT_WORKBOOK} not found")
\ No newline at end of file
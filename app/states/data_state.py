@@ -1,75 +1,125 @@
+import asyncio
 import reflex as rx
+import numpy as np
 import pandas as pd
-from pathlib import Path
 from typing import (
-    TypedDict,
-    List,
     Optional,
-    Dict,
     Union,
     Tuple,
 )
-import io
-
-COL_REF_PIECE = "Réfèrence pièce"
-COL_PN_ALT = "PN"
-COL_DESC = "Description"
-COL_QTY_AVG = "Quantité Moyenne"
-COL_VISITS = "Nombre de visites"
-COL_FREQ_TOTAL = "Fréquence totale"
-COL_FREQ_NRC = "Fréquence NRC"
-COL_FREQ_AOG = "Fréquence AOG"
-COL_PERCENT_NRC = "% NRC"
-COL_PERCENT_AOG = "% AOG"
-COL_SCORE = "Score de criticité"
-COL_AC_REG = "A/C REG"
-COL_ANNEE = "Année"
-COL_URGENCY = "URGENCY"
-COL_SEGMENT = "Segment"
-COLUMN_MAPPING = {
-    COL_REF_PIECE: "pn",
-    COL_PN_ALT: "pn",
-    COL_DESC: "description",
-    COL_QTY_AVG: "quantite_moyenne",
-    COL_VISITS: "nombre_visites",
-    COL_FREQ_TOTAL: "frequence_totale",
-    COL_FREQ_NRC: "frequence_nrc",
-    COL_FREQ_AOG: "frequence_aog",
-    COL_PERCENT_NRC: "percent_nrc",
-    COL_PERCENT_AOG: "percent_aog",
-    COL_SCORE: "score_criticite",
-    COL_AC_REG: "ac_reg",
-    COL_ANNEE: "annee",
-    COL_URGENCY: "urgency",
-    COL_SEGMENT: "segment",
-}
-REQUIRED_UPLOAD_COLUMNS_FR = [
+from app.data.schema import (
     COL_REF_PIECE,
+    COL_PN_ALT,
     COL_DESC,
+    COL_QTY_AVG,
+    COL_VISITS,
+    COL_FREQ_TOTAL,
+    COL_FREQ_NRC,
+    COL_FREQ_AOG,
+    COL_PERCENT_NRC,
+    COL_PERCENT_AOG,
     COL_SCORE,
+    COL_AC_REG,
+    COL_ANNEE,
+    COL_URGENCY,
     COL_SEGMENT,
-]
-REQUIRED_INTERNAL_COLUMNS = [
-    COLUMN_MAPPING[col_fr]
-    for col_fr in REQUIRED_UPLOAD_COLUMNS_FR
-]
-
-
-class ItemData(TypedDict):
-    pn: str
-    description: str
-    quantite_moyenne: float
-    nombre_visites: int
-    frequence_totale: int
-    frequence_nrc: int
-    frequence_aog: int
-    percent_nrc: float
-    percent_aog: float
-    score_criticite: float
-    ac_reg: str
-    annee: Optional[int]
-    urgency: str
-    segment: str
+    COLUMN_MAPPING,
+    REQUIRED_UPLOAD_COLUMNS_FR,
+    ITEM_COLUMNS,
+    ItemData,
+)
+from app.data.dataset import MISSING_VALUES, Dataset
+from app.data.quality import QualityReport
+from app.data.ingest import (
+    missing_columns_message,
+    missing_upload_columns,
+    parse_and_prepare_df,
+    read_header,
+    spool_upload,
+    too_many_rows_message,
+    upload_max_rows,
+)
+from app.data.artifacts import (
+    DEFAULT_WORKBOOK,
+    build_default_dataset,
+    default_quality_report,
+    is_shared_dataset,
+    load_default_dataset,
+)
+from app.data.registry import (
+    register_dataset,
+    get_dataset,
+    publish_dataset,
+    release_dataset,
+)
+from app.data.records import as_frame
+from app.data.query import (
+    Predicate,
+    QueryPlan,
+    Rows,
+    filter_predicates,
+    get_executor,
+)
+from app.data.topk import TOP_K_CHOICES
+from app.data.scoring import (
+    FACTOR_LABELS,
+    SCORE_INPUTS,
+    ScoreWeights,
+    criticality_scores,
+    scoring_columns,
+    what_if,
+)
+from app.data.views import (
+    CHART_VIEWS,
+    TABLE_PAGE_SIZE,
+    invalidate_views,
+    view,
+)
+from app.data.report import (
+    REPORT_FORMATS,
+    build_report,
+    export_frame,
+    write_report,
+)
+from app.data.facets import (
+    facet_counts,
+    facet_counts_from_plans,
+)
+from app.data.drilldown import (
+    DRILL_LEVELS,
+    DRILL_LEVEL_LABELS,
+    DRILL_NODE_LIMIT,
+    drilldown_count_plan,
+    drilldown_plan,
+)
+from app.data.timeline import (
+    GRANULARITY_LABELS,
+    GRANULARITY_YEAR,
+)
+from app.startup import mark
+from app.data.store import (
+    AnalyticalStore,
+    get_store,
+    file_signature,
+    SOURCE_DEFAULT,
+    SOURCE_SAMPLE,
+    SOURCE_UPLOAD,
+)
+
+UPLOAD_MODE_REPLACE = "replace"
+UPLOAD_MODE_UPSERT = "upsert"
+UPLOAD_MODE_COMPARE = "compare"
+SAMPLE_SIGNATURE = "sample-v1"
+
+
+def _weight_texts(
+    weights: dict[str, float],
+) -> dict[str, str]:
+    """Weights as the text of their inputs."""
+    return {
+        name: f"{weight:g}"
+        for name, weight in weights.items()
+    }
 
 
 def create_sample_data() -> list[ItemData]:
@@ -89,6 +139,7 @@ def create_sample_data() -> list[ItemData]:
             "annee": 2023,
             "urgency": "Critical",
             "segment": "Engine",
+            "date": "2023-03-15",
         },
         {
             "pn": "PN002",
@@ -105,6 +156,7 @@ def create_sample_data() -> list[ItemData]:
             "annee": 2023,
             "urgency": "AOG",
             "segment": "Avionics",
+            "date": "2023-08-02",
         },
     ]
     for i in range(3, 15):
@@ -149,13 +201,28 @@ def create_sample_data() -> list[ItemData]:
                     "Cabin",
                     "Landing Gear",
                 ][i % 3],
+                "date": f"{[2022, 2023, 2024][i % 3]}-{i % 12 + 1:02d}-01",
             }
         )
     return sample_list
 
 
+def _runner(dataset_id: str, version: int):
+    """Plan runner on a dataset version, for use off the state."""
+    executor = get_executor()
+
+    def run(plan: QueryPlan) -> Rows:
+        if not dataset_id or not version:
+            return []
+        return executor.execute(dataset_id, version, plan)
+
+    return run
+
+
 class AppState(rx.State):
-    raw_data: list[ItemData] = []
+    dataset_id: str = ""
+    dataset_version: int = 0
+    upload_mode: str = UPLOAD_MODE_REPLACE
     data_load_error_message: str = ""
     is_loading: bool = False
     filter_pn: str = ""
@@ -163,198 +230,322 @@ class AppState(rx.State):
     filter_ac_reg: str = ""
     filter_min_score: float = 0.0
     filter_annee: str = ""
+    table_page: int = 0
+    top_k: int = TOP_K_CHOICES[0]
+    chart_full_detail: bool = False
+    evolution_granularity: str = GRANULARITY_YEAR
+    drill_path: list[str] = []
+    drill_search: str = ""
+    drill_page: int = 0
+    top_critical_parts_data: list[
+        dict[str, Union[str, float]]
+    ] = []
+    aog_nrc_by_part_data: list[
+        dict[str, Union[str, float]]
+    ] = []
+    urgency_distribution_data: list[
+        dict[str, Union[str, int]]
+    ] = []
+    evolution_data: list[dict[str, Union[str, float]]] = []
+    score_histogram_data: list[
+        dict[str, Union[str, int]]
+    ] = []
+    charts_refreshing: bool = False
+    quality_rows_checked: int = 0
+    quality_issues: list[dict[str, str]] = []
+    quality_samples: list[dict[str, str]] = []
+    _chart_generation: int = 0
+    score_weights: dict[str, float] = (
+        ScoreWeights().to_dict()
+    )
+    score_weight_inputs: dict[str, str] = _weight_texts(
+        ScoreWeights().to_dict()
+    )
+    score_applying: bool = False
+    score_simulation_active: bool = False
+    score_simulation_rows: list[dict[str, str]] = []
+    score_simulation_row_count: int = 0
+    score_simulation_avg_current: float = 0.0
+    score_simulation_avg_simulated: float = 0.0
+    score_simulation_ms: float = 0.0
+    _simulation_generation: int = 0
+    previous_dataset_id: str = ""
+    previous_dataset_version: int = 0
+    comparison_refreshing: bool = False
+    comparison_summary: dict[str, int] = {}
+    comparison_increases: list[dict[str, str]] = []
+    comparison_new: list[dict[str, str]] = []
+    comparison_removed: list[dict[str, str]] = []
+    comparison_urgency_changed: list[dict[str, str]] = []
+    comparison_chart_data: list[
+        dict[str, Union[str, float]]
+    ] = []
+    comparison_ms: float = 0.0
+    _comparison_generation: int = 0
     selected_file_name: str = ""
 
-    def _parse_and_prepare_df(
+    def _dataset(self) -> Optional[Dataset]:
+        """Returns the session dataset from the worker registry."""
+        if not self.dataset_id or not self.dataset_version:
+            return None
+        return get_dataset(
+            self.dataset_id, self.dataset_version
+        )
+
+    def _set_dataset(self, dataset: Dataset):
+        """Registers a dataset and makes it the one this session reads."""
+        if (
+            self.dataset_id
+            and self.dataset_id != dataset.dataset_id
+            and self.dataset_id != self.previous_dataset_id
+            and not is_shared_dataset(self.dataset_id)
+        ):
+            release_dataset(self.dataset_id)
+            invalidate_views(self.dataset_id)
+        self.dataset_id = register_dataset(dataset)
+        self.dataset_version = dataset.version
+        self.table_page = 0
+        self._set_drill_path([])
+
+    def _store(self) -> Optional[AnalyticalStore]:
+        return get_store()
+
+    def _use_stored_dataset(self, dataset_id: str):
+        """Points this session at a dataset of the persistent store."""
+        store = get_store()
+        if (
+            store is not None
+            and self.dataset_id
+            and self.dataset_id != dataset_id
+            and self.dataset_id != self.previous_dataset_id
+        ):
+            store.release(self.dataset_id)
+            invalidate_views(self.dataset_id)
+        self.dataset_id = dataset_id
+        self.dataset_version = (
+            store.version(dataset_id) if store else 0
+        )
+        self.table_page = 0
+        self._set_drill_path([])
+
+    def _use_prepared_df(
         self,
         df: pd.DataFrame,
-        is_uploaded_file: bool = False,
-    ) -> Tuple[Optional[List[ItemData]], Optional[str]]:
-        """
-        Parses and prepares a Pandas DataFrame.
-        Renames columns, validates required columns, cleans data, and converts to list of dicts.
-        If is_uploaded_file is True, it performs stricter validation for required columns.
-        """
-        try:
-            if is_uploaded_file:
-                current_columns_stripped = {
-                    str(col).strip() for col in df.columns
-                }
-                missing_upload_cols = [
-                    col_fr
-                    for col_fr in REQUIRED_UPLOAD_COLUMNS_FR
-                    if col_fr
-                    not in current_columns_stripped
-                ]
-                if (
-                    COL_REF_PIECE in missing_upload_cols
-                    and COL_PN_ALT
-                    in current_columns_stripped
-                ):
-                    missing_upload_cols.remove(
-                        COL_REF_PIECE
-                    )
-                if missing_upload_cols:
-                    return (
-                        None,
-                        f"Colonnes requises manquantes dans le fichier téléversé : {', '.join(missing_upload_cols)}.",
-                    )
-            df = df.rename(
-                columns=lambda c: COLUMN_MAPPING.get(
-                    str(c).strip(), str(c).strip()
-                )
-            )
-            missing_internal = [
-                col
-                for col in REQUIRED_INTERNAL_COLUMNS
-                if col not in df.columns
-            ]
-            if missing_internal:
-                original_missing_names = []
-                for internal_col_name in missing_internal:
-                    found_original = False
-                    for (
-                        original_name,
-                        mapped_name,
-                    ) in COLUMN_MAPPING.items():
-                        if mapped_name == internal_col_name:
-                            original_missing_names.append(
-                                original_name
-                            )
-                            found_original = True
-                            break
-                    if not found_original:
-                        original_missing_names.append(
-                            internal_col_name
-                        )
-                return (
-                    None,
-                    f"Colonnes requises manquantes après mappage : {', '.join(original_missing_names)}.",
-                )
-            numeric_cols_float = [
-                "quantite_moyenne",
-                "percent_nrc",
-                "percent_aog",
-                "score_criticite",
-            ]
-            numeric_cols_int = [
-                "nombre_visites",
-                "frequence_totale",
-                "frequence_nrc",
-                "frequence_aog",
-            ]
-            for col in numeric_cols_float:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(
-                        df[col], errors="coerce"
-                    ).fillna(0.0)
-                elif col in ItemData.__annotations__:
-                    df[col] = 0.0
-            for col in numeric_cols_int:
-                if col in df.columns:
-                    df[col] = (
-                        pd.to_numeric(
-                            df[col], errors="coerce"
-                        )
-                        .fillna(0)
-                        .astype(int)
-                    )
-                elif col in ItemData.__annotations__:
-                    df[col] = 0
-            if "annee" in df.columns:
-                df["annee"] = df["annee"].apply(
-                    lambda x: (
-                        int(x)
-                        if pd.notnull(x)
-                        and str(x)
-                        .replace(".0", "")
-                        .isdigit()
-                        else None
-                    )
+        source: str = SOURCE_UPLOAD,
+        signature: str = "",
+    ):
+        """Makes a prepared DataFrame the session dataset, in the store when enabled."""
+        store = get_store()
+        if store is None:
+            self._set_dataset(Dataset.from_frame(df))
+        else:
+            self._use_stored_dataset(
+                store.ingest(
+                    df, source=source, signature=signature
                 )
-            elif "annee" in ItemData.__annotations__:
-                df["annee"] = None
-            string_cols = [
-                "pn",
-                "description",
-                "ac_reg",
-                "urgency",
-                "segment",
-            ]
-            for col in string_cols:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).fillna("")
-                elif col in ItemData.__annotations__:
-                    df[col] = ""
-            final_columns = list(
-                ItemData.__annotations__.keys()
-            )
-            for col in final_columns:
-                if col not in df.columns:
-                    col_type = ItemData.__annotations__[col]
-                    if col_type == str:
-                        df[col] = ""
-                    elif col_type == float:
-                        df[col] = 0.0
-                    elif col_type == int:
-                        df[col] = 0
-                    elif (
-                        str(col_type)
-                        == "typing.Optional[int]"
-                    ):
-                        df[col] = None
-                    else:
-                        df[col] = None
-            return (
-                df[final_columns].to_dict(orient="records"),
-                None,
             )
-        except Exception as e:
-            return (
-                None,
-                f"Erreur de traitement des données: {str(e)}",
+
+    def _keep_as_previous(self):
+        """Keeps the session dataset to compare the next one with."""
+        self._release_previous()
+        self.previous_dataset_id = self.dataset_id
+        self.previous_dataset_version = self.dataset_version
+
+    def _release_previous(self):
+        """Ends the comparison, forgetting the previous dataset."""
+        previous = self.previous_dataset_id
+        self.previous_dataset_id = ""
+        self.previous_dataset_version = 0
+        self.comparison_summary = {}
+        self.comparison_increases = []
+        self.comparison_new = []
+        self.comparison_removed = []
+        self.comparison_urgency_changed = []
+        self.comparison_chart_data = []
+        if not previous or previous == self.dataset_id:
+            return
+        store = get_store()
+        if store is not None:
+            store.release(previous)
+        elif not is_shared_dataset(previous):
+            release_dataset(previous)
+        invalidate_views(previous)
+
+    def _load_sample_data(self):
+        self._set_quality(None)
+        self._release_previous()
+        store = get_store()
+        stored_id = (
+            store.find_dataset(
+                SOURCE_SAMPLE, SAMPLE_SIGNATURE
             )
+            if store is not None
+            else None
+        )
+        if stored_id is not None:
+            self._use_stored_dataset(stored_id)
+            return
+        self._use_prepared_df(
+            pd.DataFrame(create_sample_data()),
+            source=SOURCE_SAMPLE,
+            signature=SAMPLE_SIGNATURE,
+        )
+
+    def _filter_plan(self, **plan_fields) -> QueryPlan:
+        """Query plan restricted by the sidebar filters."""
+        return QueryPlan(
+            predicates=filter_predicates(
+                pn=self.filter_pn,
+                urgency=self.filter_urgency,
+                ac_reg=self.filter_ac_reg,
+                min_score=self.filter_min_score,
+                annee=self.filter_annee,
+            ),
+            **plan_fields,
+        )
+
+    def _predicates(self) -> tuple[Predicate, ...]:
+        return self._filter_plan().predicates
+
+    def _view(self, name: str, *options):
+        """A view-model of the session dataset, see `app.data.views`."""
+        return view(
+            name,
+            self.dataset_id,
+            self.dataset_version,
+            self._run,
+            self._predicates(),
+            *options,
+        )
+
+    def _run(self, plan: QueryPlan) -> Rows:
+        """Executes a plan on the session dataset through the cached executor."""
+        if not self.dataset_id or not self.dataset_version:
+            return []
+        return get_executor().execute(
+            self.dataset_id, self.dataset_version, plan
+        )
+
+    def _parse_and_prepare_df(
+        self,
+        df: pd.DataFrame,
+        is_uploaded_file: bool = False,
+        quality: Optional[QualityReport] = None,
+    ) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        return parse_and_prepare_df(
+            df, is_uploaded_file, quality
+        )
+
+    def _set_quality(self, report: Optional[QualityReport]):
+        """Shows the data-quality report of the loaded data, if any."""
+        report = report or QualityReport()
+        self.quality_rows_checked = report.rows
+        self.quality_issues = report.issues
+        self.quality_samples = report.samples
 
     @rx.event
     def load_data(self):
         """Loads initial data from the default Excel file or sample data if not found/error."""
         self.is_loading = True
-        self.raw_data = []
         self.data_load_error_message = ""
         self.selected_file_name = ""
-        excel_file_path = Path(
-            "assets/Tableau_Final_Items_Critiques.xlsx"
-        )
+        excel_file_path = DEFAULT_WORKBOOK
         df_loaded = False
         try:
-            if excel_file_path.exists():
+            store = get_store()
+            stored_id = (
+                store.find_dataset(
+                    SOURCE_DEFAULT,
+                    file_signature(excel_file_path),
+                )
+                if store is not None
+                and excel_file_path.exists()
+                else None
+            )
+            if stored_id is not None:
+                self._use_stored_dataset(stored_id)
+                self._set_quality(None)
+                df_loaded = True
+            elif excel_file_path.exists() and store is None:
+                dataset = load_default_dataset(
+                    excel_file_path
+                )
+                error = None
+                if dataset is None:
+                    dataset, error = build_default_dataset(
+                        excel_file_path
+                    )
+                if error:
+                    self.data_load_error_message = f"Erreur fichier par défaut: {error}. Chargement données exemples."
+                else:
+                    self._set_dataset(dataset)
+                    self._set_quality(
+                        default_quality_report(
+                            dataset.dataset_id
+                        )
+                    )
+                    df_loaded = True
+            elif excel_file_path.exists():
                 df = pd.read_excel(excel_file_path)
-                processed_data, error = (
+                quality = QualityReport()
+                prepared_df, error = (
                     self._parse_and_prepare_df(
-                        df, is_uploaded_file=False
+                        df,
+                        is_uploaded_file=False,
+                        quality=quality,
                     )
                 )
                 if error:
                     self.data_load_error_message = f"Erreur fichier par défaut: {error}. Chargement données exemples."
                 else:
-                    self.raw_data = (
-                        processed_data
-                        if processed_data is not None
-                        else []
+                    self._use_prepared_df(
+                        (
+                            prepared_df
+                            if prepared_df is not None
+                            else pd.DataFrame(
+                                columns=ITEM_COLUMNS
+                            )
+                        ),
+                        source=SOURCE_DEFAULT,
+                        signature=file_signature(
+                            excel_file_path
+                        ),
                     )
+                    self._set_quality(quality)
                     df_loaded = True
             else:
                 self.data_load_error_message = f"Fichier {excel_file_path.name} introuvable. Chargement données exemples."
             if not df_loaded:
-                self.raw_data = create_sample_data()
+                self._load_sample_data()
                 if not self.data_load_error_message:
                     self.data_load_error_message += (
                         " Chargement des données exemples."
                     )
         except Exception as e:
             self.data_load_error_message = f"Erreur chargement initial: {str(e)}. Chargement données exemples."
-            self.raw_data = create_sample_data()
+            self._load_sample_data()
         self.is_loading = False
+        mark("first_page")
+        return AppState.refresh_charts
+
+    def _read_upload(
+        self, path
+    ) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """Reads a spooled upload within the column and row limits."""
+        header, declared_rows = read_header(path)
+        missing = missing_upload_columns(header)
+        if missing:
+            return None, missing_columns_message(missing)
+        max_rows = upload_max_rows()
+        if (
+            declared_rows is not None
+            and declared_rows > max_rows
+        ):
+            return None, too_many_rows_message(max_rows)
+        df = pd.read_excel(path, nrows=max_rows + 1)
+        if len(df) > max_rows:
+            return None, too_many_rows_message(max_rows)
+        return df, None
 
     @rx.event
     async def handle_file_upload(
@@ -370,7 +561,7 @@ class AppState(rx.State):
         uploaded_file = files[0]
         self.selected_file_name = uploaded_file.name
         if not uploaded_file.name.lower().endswith(".xlsx"):
-            self.raw_data = create_sample_data()
+            self._load_sample_data()
             self.is_loading = False
             self.selected_file_name = ""
             yield rx.toast.error(
@@ -381,65 +572,402 @@ class AppState(rx.State):
         self.is_loading = True
         yield
         try:
-            file_content = await uploaded_file.read()
-            excel_buffer = io.BytesIO(file_content)
-            df = pd.read_excel(excel_buffer)
-            processed_data, error_message = (
+            spooled, error_message = await spool_upload(
+                uploaded_file
+            )
+            if error_message is None:
+                try:
+                    df, error_message = self._read_upload(
+                        spooled
+                    )
+                finally:
+                    spooled.unlink(missing_ok=True)
+            if error_message:
+                self._load_sample_data()
+                self.is_loading = False
+                yield rx.toast.error(
+                    f"Erreur: {error_message} Données exemples chargées.",
+                    duration=6000,
+                )
+                return
+            quality = QualityReport()
+            prepared_df, error_message = (
                 self._parse_and_prepare_df(
-                    df, is_uploaded_file=True
+                    df,
+                    is_uploaded_file=True,
+                    quality=quality,
                 )
             )
             if error_message:
-                self.raw_data = create_sample_data()
+                self._load_sample_data()
                 self.is_loading = False
                 yield rx.toast.error(
                     f"Erreur: {error_message} Données exemples chargées.",
                     duration=6000,
                 )
                 return
-            if processed_data is not None:
-                self.raw_data = processed_data
+            dataset = self._dataset()
+            store = self._store()
+            if (
+                prepared_df is not None
+                and self.upload_mode == UPLOAD_MODE_UPSERT
+                and (
+                    dataset is not None or store is not None
+                )
+            ):
+                if store is not None:
+                    if (
+                        store.source(self.dataset_id)
+                        != SOURCE_UPLOAD
+                    ):
+                        self._use_stored_dataset(
+                            store.copy(self.dataset_id)
+                        )
+                    inserted, updated = store.upsert(
+                        self.dataset_id, prepared_df
+                    )
+                    invalidate_views(self.dataset_id)
+                    self.dataset_version = store.version(
+                        self.dataset_id
+                    )
+                else:
+                    if is_shared_dataset(
+                        dataset.dataset_id
+                    ):
+                        dataset = dataset.copy()
+                        self._set_dataset(dataset)
+                    change = dataset.upsert(prepared_df)
+                    publish_dataset(dataset)
+                    invalidate_views(dataset.dataset_id)
+                    inserted, updated = len(
+                        change.inserted
+                    ), len(change.updated)
+                    self.dataset_version = dataset.version
+                self._set_quality(quality)
                 self.data_load_error_message = ""
                 yield rx.toast.success(
-                    "Fichier téléversé et traité avec succès!",
+                    f"Fichier fusionné: {inserted} lignes ajoutées, {updated} mises à jour.",
+                    duration=3000,
+                )
+            elif prepared_df is not None:
+                comparing = (
+                    self.upload_mode == UPLOAD_MODE_COMPARE
+                    and bool(self.dataset_id)
+                )
+                if comparing:
+                    self._keep_as_previous()
+                else:
+                    self._release_previous()
+                self._use_prepared_df(prepared_df)
+                self._set_quality(quality)
+                self.data_load_error_message = ""
+                yield rx.toast.success(
+                    (
+                        "Fichier téléversé : comparaison avec les données précédentes."
+                        if comparing
+                        else "Fichier téléversé et traité avec succès!"
+                    ),
                     duration=3000,
                 )
             else:
-                self.raw_data = create_sample_data()
+                self._load_sample_data()
                 yield rx.toast.error(
                     "Erreur inconnue lors du traitement du fichier. Données exemples chargées.",
                     duration=5000,
                 )
         except pd.errors.ParserError as pe:
-            self.raw_data = create_sample_data()
+            self._load_sample_data()
             yield rx.toast.error(
                 f"Fichier Excel corrompu ou format invalide: {str(pe)}. Données exemples chargées.",
                 duration=6000,
             )
         except ValueError as ve:
-            self.raw_data = create_sample_data()
+            self._load_sample_data()
             yield rx.toast.error(
                 f"Erreur de lecture du fichier Excel (possiblement corrompu): {str(ve)}. Données exemples chargées.",
                 duration=6000,
             )
         except Exception as e:
-            self.raw_data = create_sample_data()
+            self._load_sample_data()
             yield rx.toast.error(
                 f"Échec du téléversement: {str(e)}. Données exemples chargées.",
                 duration=5000,
             )
         finally:
             self.is_loading = False
-            yield
+            yield AppState.refresh_charts
+
+    def _chart_options(self) -> dict[str, tuple]:
+        """Display options of each chart view, see `CHART_VIEWS`."""
+        return {
+            "top_critical_parts": (self.top_k,),
+            "aog_nrc_by_part": (self.top_k,),
+            "urgency_distribution": (
+                self.chart_full_detail,
+            ),
+            "evolution": (
+                self.evolution_granularity,
+                self.chart_full_detail,
+            ),
+            "score_histogram": (),
+        }
+
+    @rx.event(background=True)
+    async def refresh_charts(self):
+        """Recomputes the chart series off the event loop.
+
+        The previous series stay on screen until the new ones are
+        ready. A later refresh supersedes this one, which then stops
+        before its next chart and publishes nothing.
+        """
+        async with self:
+            self._chart_generation += 1
+            generation = self._chart_generation
+            self.charts_refreshing = True
+            dataset_id = self.dataset_id
+            version = self.dataset_version
+            predicates = self._predicates()
+            options = self._chart_options()
+        run = _runner(dataset_id, version)
+        series = {}
+        for name in CHART_VIEWS:
+            async with self:
+                if self._chart_generation != generation:
+                    return
+            series[name] = await asyncio.to_thread(
+                view,
+                name,
+                dataset_id,
+                version,
+                run,
+                predicates,
+                *options[name],
+            )
+        async with self:
+            if self._chart_generation != generation:
+                return
+            for name, data in series.items():
+                setattr(self, f"{name}_data", data)
+            self.charts_refreshing = False
+            simulate = self.score_simulation_active
+            compare = bool(self.previous_dataset_id)
+        if simulate:
+            yield AppState.simulate_scores
+        if compare:
+            yield AppState.refresh_comparison
+
+    @rx.event(background=True)
+    async def refresh_comparison(self):
+        """Recomputes the changes since the previous dataset.
+
+        See `app.data.compare`; a later refresh supersedes this one.
+        """
+        async with self:
+            if not self.previous_dataset_id:
+                return
+            self._comparison_generation += 1
+            generation = self._comparison_generation
+            self.comparison_refreshing = True
+            dataset_id = self.dataset_id
+            version = self.dataset_version
+            predicates = self._predicates()
+            options = (
+                self.previous_dataset_id,
+                self.previous_dataset_version,
+                self.top_k,
+            )
+        result = await asyncio.to_thread(
+            view,
+            "comparison",
+            dataset_id,
+            version,
+            _runner(dataset_id, version),
+            predicates,
+            *options,
+        )
+        async with self:
+            if self._comparison_generation != generation:
+                return
+            self.comparison_summary = result["summary"]
+            self.comparison_increases = result["increases"]
+            self.comparison_new = result["new"]
+            self.comparison_removed = result["removed"]
+            self.comparison_urgency_changed = result[
+                "urgency_changed"
+            ]
+            self.comparison_chart_data = result["chart"]
+            self.comparison_ms = round(
+                result["seconds"] * 1000, 1
+            )
+            self.comparison_refreshing = False
+
+    def stop_comparison(self):
+        self._release_previous()
+
+    @rx.event(background=True)
+    async def simulate_scores(self):
+        """Re-scores the filtered rows with the what-if weights.
+
+        See `app.data.scoring`; a later simulation supersedes this one.
+        """
+        async with self:
+            self._simulation_generation += 1
+            generation = self._simulation_generation
+            self.score_simulation_active = True
+            dataset_id = self.dataset_id
+            version = self.dataset_version
+            predicates = self._predicates()
+            weights = ScoreWeights.from_dict(
+                self.score_weights
+            )
+            top_k = self.top_k
+
+        def simulate() -> dict:
+            return what_if(
+                scoring_columns(
+                    dataset_id, version, predicates
+                ),
+                weights,
+                top_k,
+            )
+
+        result = await asyncio.to_thread(simulate)
+        async with self:
+            if self._simulation_generation != generation:
+                return
+            self.score_simulation_rows = result["top"]
+            self.score_simulation_row_count = result["rows"]
+            self.score_simulation_avg_current = result[
+                "avg_current"
+            ]
+            self.score_simulation_avg_simulated = result[
+                "avg_simulated"
+            ]
+            self.score_simulation_ms = round(
+                result["seconds"] * 1000, 1
+            )
+
+    @rx.event(background=True)
+    async def apply_score_weights(self):
+        """Writes the scores of the what-if weights into the dataset.
+
+        Every row, not only the filtered ones, is re-scored and its
+        `score_criticite`, `percent_nrc` and `percent_aog` replaced in a
+        new version of the dataset, which the KPIs, charts and table
+        then read. A shared dataset is copied first.
+        """
+        async with self:
+            store = self._store()
+            dataset = self._dataset()
+            if self.score_applying or (
+                store is None and dataset is None
+            ):
+                return
+            self.score_applying = True
+            weights = ScoreWeights.from_dict(
+                self.score_weights
+            )
+            if store is not None:
+                if (
+                    store.source(self.dataset_id)
+                    != SOURCE_UPLOAD
+                ):
+                    self._use_stored_dataset(
+                        store.copy(self.dataset_id)
+                    )
+            elif dataset is not None and is_shared_dataset(
+                dataset.dataset_id
+            ):
+                dataset = dataset.copy()
+                self._set_dataset(dataset)
+            dataset_id = self.dataset_id
+
+        def rescore(
+            columns: dict[str, np.ndarray],
+        ) -> dict[str, np.ndarray]:
+            return criticality_scores(columns, weights)
+
+        def apply() -> int:
+            if store is not None:
+                store.replace_columns(
+                    dataset_id, SCORE_INPUTS, rescore
+                )
+                return store.version(dataset_id)
+            dataset.replace_columns(
+                rescore(
+                    {
+                        col: dataset.column(col)
+                        for col in SCORE_INPUTS
+                    }
+                )
+            )
+            publish_dataset(dataset)
+            return dataset.version
+
+        try:
+            version = await asyncio.to_thread(apply)
+        except Exception as e:
+            async with self:
+                self.score_applying = False
+            yield rx.toast.error(
+                f"Échec du recalcul des scores: {str(e)}",
+                duration=5000,
+            )
+            return
+        async with self:
+            invalidate_views(dataset_id)
+            if self.dataset_id == dataset_id:
+                self.dataset_version = version
+            self.score_applying = False
+        yield rx.toast.success(
+            "Scores recalculés avec les poids simulés.",
+            duration=3000,
+        )
+        yield AppState.refresh_charts
+
+    def set_score_weight(self, name: str, value: str):
+        if name not in FACTOR_LABELS:
+            return
+        self.score_weight_inputs = {
+            **self.score_weight_inputs,
+            name: value,
+        }
+        try:
+            weight = (
+                max(float(value), 0.0) if value else 0.0
+            )
+        except ValueError:
+            return
+        self.score_weights = {
+            **self.score_weights,
+            name: weight,
+        }
+        return AppState.simulate_scores
+
+    def reset_score_weights(self):
+        self.score_weights = ScoreWeights().to_dict()
+        self.score_weight_inputs = _weight_texts(
+            self.score_weights
+        )
+        return AppState.simulate_scores
+
+    def set_upload_mode(self, value: str):
+        self.upload_mode = value
 
     def set_filter_pn(self, value: str):
         self.filter_pn = value
+        self.table_page = 0
+        return AppState.refresh_charts
 
     def set_filter_urgency(self, value: str):
         self.filter_urgency = value
+        self.table_page = 0
+        return AppState.refresh_charts
 
     def set_filter_ac_reg(self, value: str):
         self.filter_ac_reg = value
+        self.table_page = 0
+        return AppState.refresh_charts
 
     def set_filter_min_score(self, value: str):
         try:
@@ -448,416 +976,297 @@ class AppState(rx.State):
             )
         except ValueError:
             self.filter_min_score = 0.0
+        self.table_page = 0
+        return AppState.refresh_charts
+
+    def set_top_k(self, value: str):
+        try:
+            self.top_k = int(value)
+        except ValueError:
+            self.top_k = TOP_K_CHOICES[0]
+        return AppState.refresh_charts
+
+    def set_evolution_granularity(self, value: str):
+        if value in GRANULARITY_LABELS:
+            self.evolution_granularity = value
+        return AppState.refresh_charts
+
+    def _set_drill_path(self, path: list[str]):
+        self.drill_path = path
+        self.drill_search = ""
+        self.drill_page = 0
+
+    def drill_into(self, value: str):
+        if len(self.drill_path) + 1 < len(DRILL_LEVELS):
+            self._set_drill_path([*self.drill_path, value])
+
+    def drill_to(self, depth: int):
+        self._set_drill_path(self.drill_path[:depth])
+
+    def set_drill_search(self, value: str):
+        self.drill_search = value
+        self.drill_page = 0
+
+    def next_drill_page(self):
+        if self.drill_page + 1 < self.drilldown_page_count:
+            self.drill_page += 1
+
+    def previous_drill_page(self):
+        if self.drill_page > 0:
+            self.drill_page -= 1
+
+    def toggle_chart_full_detail(self):
+        self.chart_full_detail = not self.chart_full_detail
+        return AppState.refresh_charts
+
+    def next_table_page(self):
+        if self.table_page + 1 < self.table_page_count:
+            self.table_page += 1
+
+    def previous_table_page(self):
+        if self.table_page > 0:
+            self.table_page -= 1
 
     def set_filter_annee(self, value: str):
         self.filter_annee = value
+        self.table_page = 0
+        return AppState.refresh_charts
+
+    def _distinct_options(self, column: str) -> list[str]:
+        """Sorted present values of a dictionary-encoded column."""
+        store = self._store()
+        if store is not None:
+            values = [
+                value
+                for value in store.distinct(
+                    self.dataset_id, column
+                )
+                if value is not None
+                and value not in MISSING_VALUES
+            ]
+        else:
+            dataset = self._dataset()
+            if dataset is None:
+                return []
+            values = dataset.distinct_values(column)
+        return [str(value) for value in values]
 
     @rx.var
     def unique_pns(self) -> list[str]:
-        if not self.raw_data:
-            return []
-        return sorted(
-            list(
-                set(
-                    (
-                        str(item["pn"])
-                        for item in self.raw_data
-                        if item.get("pn")
-                    )
-                )
-            )
-        )
+        return self._distinct_options("pn")
 
     @rx.var
     def unique_urgencies(self) -> list[str]:
-        if not self.raw_data:
-            return []
-        return sorted(
-            list(
-                set(
-                    (
-                        str(item["urgency"])
-                        for item in self.raw_data
-                        if item.get("urgency")
-                    )
-                )
-            )
-        )
+        return self._distinct_options("urgency")
 
     @rx.var
     def unique_ac_regs(self) -> list[str]:
-        if not self.raw_data:
-            return []
-        return sorted(
-            list(
-                set(
-                    (
-                        str(item["ac_reg"])
-                        for item in self.raw_data
-                        if item.get("ac_reg")
-                    )
-                )
-            )
-        )
+        return self._distinct_options("ac_reg")
 
     @rx.var
     def unique_annees(self) -> list[str]:
-        if not self.raw_data:
-            return []
-        valid_annees: list[int] = []
-        for item in self.raw_data:
-            annee = item.get("annee")
-            if annee is not None:
-                try:
-                    valid_annees.append(int(annee))
-                except (ValueError, TypeError):
-                    pass
-        return sorted(
-            list(set((str(yr) for yr in valid_annees)))
-        )
+        return self._distinct_options("annee")
 
     @rx.var
-    def filtered_data(self) -> list[ItemData]:
-        data = self.raw_data
-        if not data:
-            return []
-        if self.filter_pn:
-            data = [
-                item
-                for item in data
-                if isinstance(item, dict)
-                and self.filter_pn.lower()
-                in str(item.get("pn", "")).lower()
-            ]
-        if self.filter_urgency:
-            data = [
-                item
-                for item in data
-                if isinstance(item, dict)
-                and str(item.get("urgency", ""))
-                == self.filter_urgency
-            ]
-        if self.filter_ac_reg:
-            data = [
-                item
-                for item in data
-                if isinstance(item, dict)
-                and str(item.get("ac_reg", ""))
-                == self.filter_ac_reg
-            ]
-        if self.filter_min_score > 0:
-            data = [
-                item
-                for item in data
-                if isinstance(item, dict)
-                and item.get("score_criticite", 0.0)
-                >= self.filter_min_score
+    def filter_options(
+        self,
+    ) -> dict[str, list[dict[str, str]]]:
+        """Sidebar select options labelled with their faceted row counts."""
+        predicates = (
+            self._filter_plan().normalized().predicates
+        )
+        dataset = self._dataset()
+        if self._store() is not None:
+            counts = facet_counts_from_plans(
+                self._run, predicates
+            )
+        elif dataset is not None:
+            counts = facet_counts(dataset, predicates)
+        else:
+            counts = {}
+        options = {}
+        for column, values in (
+            ("urgency", self.unique_urgencies),
+            ("ac_reg", self.unique_ac_regs),
+            ("annee", self.unique_annees),
+        ):
+            column_counts = counts.get(column, {})
+            options[column] = [
+                {
+                    "value": value,
+                    "label": f"{value} ({column_counts.get(value, 0)})",
+                }
+                for value in values
             ]
-        if self.filter_annee:
-            try:
-                year_int = int(self.filter_annee)
-                data = [
-                    item
-                    for item in data
-                    if isinstance(item, dict)
-                    and item.get("annee") is not None
-                    and (item.get("annee") == year_int)
-                ]
-            except ValueError:
-                pass
-        return data
+        return options
 
     @rx.var
-    def total_references_tracked(self) -> int:
-        return len(self.unique_pns)
+    def filtered_count(self) -> int:
+        return self._view("filtered_count")
 
     @rx.var
-    def avg_score_criticite(self) -> float:
-        if not self.filtered_data:
-            return 0.0
-        scores = [
-            item["score_criticite"]
-            for item in self.filtered_data
-            if isinstance(item, dict)
-            and isinstance(
-                item.get("score_criticite"), (int, float)
-            )
-        ]
-        return (
-            round(sum(scores) / len(scores), 2)
-            if scores
-            else 0.0
+    def table_page_count(self) -> int:
+        return max(
+            1, -(-self.filtered_count // TABLE_PAGE_SIZE)
         )
 
     @rx.var
-    def avg_percent_aog(self) -> float:
-        if not self.filtered_data:
-            return 0.0
-        aog_percents = [
-            item["percent_aog"]
-            for item in self.filtered_data
-            if isinstance(item, dict)
-            and isinstance(
-                item.get("percent_aog"), (int, float)
-            )
-        ]
+    def table_rows(self) -> list[ItemData]:
+        return self._view("table_rows", self.table_page)
+
+    @rx.var
+    def total_references_tracked(self) -> int:
+        store = self._store()
+        if store is not None:
+            return len(self.unique_pns)
+        dataset = self._dataset()
         return (
-            round(
-                sum(aog_percents) / len(aog_percents) * 100,
-                2,
-            )
-            if aog_percents
-            else 0.0
+            dataset.distinct_count("pn")
+            if dataset is not None
+            else 0
         )
 
+    def _kpis(self) -> dict:
+        return self._view("kpis")
+
+    @rx.var
+    def avg_score_criticite(self) -> float:
+        return self._kpis()["avg_score_criticite"]
+
+    @rx.var
+    def avg_percent_aog(self) -> float:
+        return self._kpis()["avg_percent_aog"]
+
     @rx.var
     def avg_percent_nrc(self) -> float:
-        if not self.filtered_data:
-            return 0.0
-        nrc_percents = [
-            item["percent_nrc"]
-            for item in self.filtered_data
-            if isinstance(item, dict)
-            and isinstance(
-                item.get("percent_nrc"), (int, float)
-            )
-        ]
-        return (
-            round(
-                sum(nrc_percents) / len(nrc_percents) * 100,
-                2,
-            )
-            if nrc_percents
-            else 0.0
-        )
+        return self._kpis()["avg_percent_nrc"]
+
+    def _score_percentiles(self) -> dict:
+        return self._view("score_percentiles")
 
     @rx.var
-    def top_10_critical_parts_data(
-        self,
-    ) -> list[dict[str, Union[str, float]]]:
-        if not self.filtered_data:
-            return []
-        valid_data = [
-            item
-            for item in self.filtered_data
-            if isinstance(item, dict)
-            and "score_criticite" in item
-            and ("pn" in item)
+    def median_score_criticite(self) -> float:
+        return self._score_percentiles()[
+            "median_score_criticite"
         ]
-        sorted_data = sorted(
-            valid_data,
-            key=lambda x: x.get("score_criticite", 0.0),
-            reverse=True,
-        )
-        top_10 = sorted_data[:10]
-        return [
-            {
-                "name": str(item.get("pn", "N/A")),
-                "Score": item.get("score_criticite", 0.0),
-            }
-            for item in top_10
+
+    @rx.var
+    def p90_score_criticite(self) -> float:
+        return self._score_percentiles()[
+            "p90_score_criticite"
         ]
 
     @rx.var
-    def aog_nrc_by_part_data(
-        self,
-    ) -> list[dict[str, Union[str, float]]]:
-        if not self.filtered_data:
-            return []
-        valid_data_for_df = [
-            item
-            for item in self.filtered_data
-            if isinstance(item, dict)
-            and all(
-                (
-                    k in item
-                    for k in [
-                        "pn",
-                        "percent_aog",
-                        "percent_nrc",
-                    ]
-                )
-            )
+    def p99_score_criticite(self) -> float:
+        return self._score_percentiles()[
+            "p99_score_criticite"
         ]
-        if not valid_data_for_df:
-            return []
-        df = pd.DataFrame(valid_data_for_df)
-        if df.empty:
-            return []
-        df["percent_aog"] = pd.to_numeric(
-            df["percent_aog"], errors="coerce"
-        ).fillna(0.0)
-        df["percent_nrc"] = pd.to_numeric(
-            df["percent_nrc"], errors="coerce"
-        ).fillna(0.0)
-        grouped = (
-            df.groupby("pn")
-            .agg(
-                avg_aog=("percent_aog", "mean"),
-                avg_nrc=("percent_nrc", "mean"),
-            )
-            .reset_index()
-        )
-        grouped["total_aog_nrc_sum_for_sort"] = (
-            grouped["avg_aog"] + grouped["avg_nrc"]
-        )
-        top_parts_df = grouped.sort_values(
-            by=["total_aog_nrc_sum_for_sort"],
-            ascending=False,
-        ).head(10)
-        chart_data: list[dict[str, Union[str, float]]] = []
-        for _, row in top_parts_df.iterrows():
-            chart_data.append(
-                {
-                    "name": str(row["pn"]),
-                    "% AOG": round(row["avg_aog"] * 100, 2),
-                    "% NRC": round(row["avg_nrc"] * 100, 2),
-                }
-            )
-        return chart_data
 
     @rx.var
-    def urgency_distribution_data(
-        self,
-    ) -> list[dict[str, Union[str, int]]]:
-        if not self.filtered_data:
-            return []
-        urgencies = [
-            str(item.get("urgency", "Unknown"))
-            for item in self.filtered_data
-            if isinstance(item, dict)
+    def evolution_granularity_label(self) -> str:
+        return GRANULARITY_LABELS[
+            self.evolution_granularity
         ]
-        if not urgencies:
-            return []
-        urgency_counts = (
-            pd.Series(urgencies).value_counts().to_dict()
-        )
-        return [
-            {"name": str(urgency), "value": count}
-            for urgency, count in urgency_counts.items()
+
+    @rx.var
+    def drilldown_level_label(self) -> str:
+        return DRILL_LEVEL_LABELS[
+            DRILL_LEVELS[len(self.drill_path)]
         ]
 
     @rx.var
-    def evolution_data(
+    def drilldown_can_expand(self) -> bool:
+        return len(self.drill_path) + 1 < len(DRILL_LEVELS)
+
+    @rx.var
+    def drilldown_rows(
         self,
-    ) -> list[dict[str, Union[str, float]]]:
-        if not self.filtered_data:
-            return []
-        data_with_year = [
-            item
-            for item in self.filtered_data
-            if isinstance(item, dict)
-            and item.get("annee") is not None
-            and all(
-                (
-                    k in item
-                    for k in [
-                        "score_criticite",
-                        "quantite_moyenne",
-                    ]
+    ) -> list[dict[str, Union[str, int, float]]]:
+        group_by = DRILL_LEVELS[len(self.drill_path)]
+        return [
+            {
+                "name": str(row[group_by]),
+                "count": row["count"],
+                "avg_score": round(row["avg_score"], 2),
+                "avg_aog": round(row["avg_aog"] * 100, 2),
+                "avg_nrc": round(row["avg_nrc"] * 100, 2),
+            }
+            for row in self._run(
+                drilldown_plan(
+                    self.drill_path,
+                    self.drill_search,
+                    self.drill_page,
                 )
             )
         ]
-        if not data_with_year:
-            return []
-        df = pd.DataFrame(data_with_year)
-        try:
-            df["annee"] = (
-                pd.to_numeric(df["annee"], errors="coerce")
-                .dropna()
-                .astype(int)
-            )
-        except Exception:
-            return []
-        df["score_criticite"] = pd.to_numeric(
-            df["score_criticite"], errors="coerce"
-        ).fillna(0.0)
-        df["quantite_moyenne"] = pd.to_numeric(
-            df["quantite_moyenne"], errors="coerce"
-        ).fillna(0.0)
-        df = df.dropna(subset=["annee"])
-        if df.empty:
-            return []
-        evolution = (
-            df.groupby("annee")
-            .agg(
-                avg_score_criticite=(
-                    "score_criticite",
-                    "mean",
-                ),
-                total_quantite_moyenne=(
-                    "quantite_moyenne",
-                    "sum",
-                ),
+
+    @rx.var
+    def drilldown_node_count(self) -> int:
+        return len(
+            self._run(
+                drilldown_count_plan(
+                    self.drill_path, self.drill_search
+                )
             )
-            .reset_index()
         )
-        evolution = evolution.sort_values(by="annee")
-        result_data: list[dict[str, Union[str, float]]] = []
-        for _, row in evolution.iterrows():
-            result_data.append(
-                {
-                    "name": str(int(row["annee"])),
-                    "Score Moyen": round(
-                        row["avg_score_criticite"], 2
-                    ),
-                    "Quantité Totale": round(
-                        row["total_quantite_moyenne"], 2
-                    ),
-                }
-            )
-        return result_data
+
+    @rx.var
+    def drilldown_page_count(self) -> int:
+        return max(
+            1,
+            -(
+                -self.drilldown_node_count
+                // DRILL_NODE_LIMIT
+            ),
+        )
+
+    @rx.var
+    def drilldown_more_count(self) -> int:
+        """Nodes after the current page."""
+        return max(
+            0,
+            self.drilldown_node_count
+            - (self.drill_page + 1) * DRILL_NODE_LIMIT,
+        )
 
     @rx.event
     def download_filtered_data(self):
-        if not self.filtered_data:
+        return self._download_frame(
+            as_frame(
+                self._run(self._filter_plan()),
+                ITEM_COLUMNS,
+            )
+        )
+
+    @rx.event
+    def download_report(self, report_format: str):
+        """Downloads the KPIs and chart series of the current view."""
+        if report_format not in REPORT_FORMATS:
+            report_format = REPORT_FORMATS[0]
+        report = build_report(
+            self.dataset_id,
+            self.dataset_version,
+            self._run,
+            self._predicates(),
+            self._chart_options(),
+        )
+        return rx.download(
+            data=write_report(report, report_format),
+            filename=f"rapport_tableau_de_bord.{report_format}",
+        )
+
+    def _download_frame(self, df_to_download: pd.DataFrame):
+        if df_to_download.empty:
             return rx.toast.info(
                 "Aucune donnée filtrée à télécharger.",
                 duration=3000,
             )
-        valid_data_for_df = [
-            item
-            for item in self.filtered_data
-            if isinstance(item, dict)
-        ]
-        if not valid_data_for_df:
-            return rx.toast.error(
-                "Erreur: Données filtrées non valides pour le téléchargement.",
-                duration=3000,
-            )
-        df_to_download = pd.DataFrame(valid_data_for_df)
-        cols_to_download_map = {
-            "pn": "PN",
-            "description": "Description",
-            "score_criticite": "Score criticité",
-            "percent_aog": "% AOG",
-            "percent_nrc": "% NRC",
-            "quantite_moyenne": "Quantité Moyenne",
-            "urgency": "URGENCY",
-            "segment": "Segment",
-            "annee": "Année",
-        }
-        download_cols_internal = [
-            col_internal
-            for col_internal in cols_to_download_map.keys()
-            if col_internal in df_to_download.columns
-        ]
-        if not download_cols_internal:
+        df_to_download = export_frame(df_to_download)
+        if df_to_download.columns.empty:
             return rx.toast.info(
                 "Aucune colonne pertinente à télécharger.",
                 duration=3000,
             )
-        df_to_download = df_to_download[
-            download_cols_internal
-        ]
-        current_rename_map = {
-            k: v
-            for k, v in cols_to_download_map.items()
-            if k in download_cols_internal
-        }
-        df_to_download = df_to_download.rename(
-            columns=current_rename_map
-        )
         csv_string = df_to_download.to_csv(
             index=False, encoding="utf-8"
         )
@@ -0,0 +1,128 @@
+"""Warm-up of a worker before it reports ready.
+
+At server start a lifespan task loads the default dataset (building its
+indexes and summary tables) and computes the views of a fresh,
+unfiltered session into the shared view cache, so the first
+visitor does not pay for them. `/ready` answers 503 until the warm-up
+finished, failed, or ran longer than `DASHBOARD_WARMUP_TIMEOUT` seconds;
+past the timeout the worker reports ready and the warm-up carries on in
+the background.
+"""
+
+import asyncio
+import os
+import time
+
+from app.data.artifacts import (
+    DEFAULT_WORKBOOK,
+    build_default_dataset,
+    load_default_dataset,
+)
+from app.data.query import get_executor
+from app.data.store import (
+    SOURCE_DEFAULT,
+    file_signature,
+    get_store,
+)
+from app.data.views import default_views
+from app.startup import mark
+
+WARMUP_TIMEOUT_ENV = "DASHBOARD_WARMUP_TIMEOUT"
+DEFAULT_WARMUP_TIMEOUT = 120.0
+PENDING_STATUSES = ("starting", "warming")
+
+_status: dict = {"status": "starting"}
+
+
+def default_dataset_ref() -> tuple[str, int]:
+    """(id, version) of the default dataset, loading it if needed."""
+    store = get_store()
+    if store is None:
+        dataset = load_default_dataset(DEFAULT_WORKBOOK)
+        if dataset is None:
+            dataset, error = build_default_dataset(
+                DEFAULT_WORKBOOK
+            )
+            if error:
+                raise ValueError(error)
+        return dataset.dataset_id, dataset.version
+    import pandas as pd
+
+    from app.data.ingest import parse_and_prepare_df
+
+    signature = file_signature(DEFAULT_WORKBOOK)
+    dataset_id = store.find_dataset(
+        SOURCE_DEFAULT, signature
+    )
+    if dataset_id is None:
+        prepared_df, error = parse_and_prepare_df(
+            pd.read_excel(DEFAULT_WORKBOOK)
+        )
+        if error:
+            raise ValueError(error)
+        dataset_id = store.ingest(
+            prepared_df,
+            source=SOURCE_DEFAULT,
+            signature=signature,
+        )
+    return dataset_id, store.version(dataset_id)
+
+
+def warm_up() -> dict:
+    """Loads the default dataset and computes its default views."""
+    if not DEFAULT_WORKBOOK.exists():
+        return {"dataset_id": None}
+    started = time.perf_counter()
+    dataset_id, version = default_dataset_ref()
+    loaded = time.perf_counter()
+    executor = get_executor()
+    default_views(
+        dataset_id,
+        version,
+        lambda plan: executor.execute(
+            dataset_id, version, plan
+        ),
+    )
+    return {
+        "dataset_id": dataset_id,
+        "load_seconds": round(loaded - started, 3),
+        "views_seconds": round(
+            time.perf_counter() - loaded, 3
+        ),
+    }
+
+
+def _warm_up_and_record() -> None:
+    try:
+        _status.update(status="ready", **warm_up())
+    except Exception as error:
+        _status.update(status="failed", error=str(error))
+    mark("warmed_up")
+
+
+async def warm_up_task() -> None:
+    """Lifespan task running `warm_up` off the event loop."""
+    timeout = float(
+        os.environ.get(
+            WARMUP_TIMEOUT_ENV, DEFAULT_WARMUP_TIMEOUT
+        )
+    )
+    _status["status"] = "warming"
+    warming = asyncio.ensure_future(
+        asyncio.to_thread(_warm_up_and_record)
+    )
+    try:
+        await asyncio.wait_for(
+            asyncio.shield(warming), timeout
+        )
+    except asyncio.TimeoutError:
+        if _status["status"] == "warming":
+            _status["status"] = "timeout"
+
+
+def readiness() -> tuple[bool, dict]:
+    """Whether the worker may take traffic, and the warm-up status."""
+    return (
+        _status["status"] not in PENDING_STATUSES,
+        dict(_status),
+    )
\ No newline at end of file
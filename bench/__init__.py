@@ -0,0 +1,10 @@
+"""Benchmarks of the data engine on synthetic rows.
+
+Run from the repository root, e.g. `python -m bench.sketches`:
+
+- `bench.records`: memory per row, dicts vs. `Records`;
+- `bench.quality`: overhead of the data-quality report at ingestion;
+- `bench.scoring`: re-scoring a million rows;
+- `bench.sketches`: sketch vs. exact score percentiles;
+- `bench.compare`: diff of two datasets.
+"""
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""Memory per row of dict rows vs. `Records`, via tracemalloc."""
+
+import tracemalloc
+
+import pandas as pd
+
+from app.data.dataset import coerce_columns
+from app.data.records import Records
+from app.data.schema import ITEM_COLUMNS
+from bench.synthetic import synthetic_rows
+
+
+def measure_row_memory(
+    count: int = 500_000,
+) -> tuple[float, float]:
+    """Bytes per row held as dicts vs. as `Records`.
+
+    Both are built from the same parsed frame and charged for every
+    object they allocate, strings included: dict rows come from
+    `to_dict("records")` as row queries used to return them, `Records`
+    from the interned ingestion arrays.
+    """
+    frame = pd.DataFrame(
+        synthetic_rows(count), columns=ITEM_COLUMNS
+    )
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    rows = frame.to_dict("records")
+    dict_bytes = tracemalloc.get_traced_memory()[0] - start
+    del rows
+    start = tracemalloc.get_traced_memory()[0]
+    records = Records(
+        {
+            col: values.copy()
+            for col, values in coerce_columns(frame).items()
+            if col in ITEM_COLUMNS
+        }
+    )
+    records_bytes = (
+        tracemalloc.get_traced_memory()[0] - start
+    )
+    tracemalloc.stop()
+    del frame, records
+    return dict_bytes / count, records_bytes / count
+
+
+if __name__ == "__main__":
+    dict_per_row, records_per_row = measure_row_memory()
+    print(
+        f"dict rows: {dict_per_row:.0f} B/row, "
+        f"Records: {records_per_row:.0f} B/row "
+        f"({dict_per_row / records_per_row:.1f}x smaller)"
+    )
\ No newline at end of file
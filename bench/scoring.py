@@ -0,0 +1,23 @@
+"""Time of a what-if re-score of synthetic rows."""
+
+from app.data.dataset import Dataset
+from app.data.scoring import (
+    SCORE_INPUTS,
+    ScoreWeights,
+    what_if,
+)
+from bench.synthetic import synthetic_rows
+
+
+def measure_rescore(count: int = 1_000_000) -> float:
+    """Seconds to re-score `count` synthetic rows."""
+    dataset = Dataset.from_records(synthetic_rows(count))
+    columns = {
+        name: dataset.column(name)
+        for name in (*SCORE_INPUTS, "pn", "score_criticite")
+    }
+    return what_if(columns, ScoreWeights(), 10)["seconds"]
+
+
+if __name__ == "__main__":
+    print(f"re-score of 1M rows: {measure_rescore():.3f}s")
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""Sketch vs. exact score percentiles on synthetic rows."""
+
+import time
+
+import numpy as np
+
+from app.data.aggregates import register_summaries
+from app.data.dataset import Dataset
+from app.data.sketches import SKETCH_COLUMN
+from bench.synthetic import synthetic_rows
+
+
+def measure_accuracy(count: int = 1_000_000) -> None:
+    dataset = Dataset.from_records(synthetic_rows(count))
+    started = time.perf_counter()
+    register_summaries(dataset)
+    sketches = dataset.derived(f"sketches_{SKETCH_COLUMN}")
+    print(
+        f"{len(sketches.partitions)} partitions, "
+        f"summaries built in {time.perf_counter() - started:.2f}s"
+    )
+    scores = dataset.column(SKETCH_COLUMN)
+    started = time.perf_counter()
+    estimated = sketches.sketch({}).quantiles(
+        [0.5, 0.9, 0.99]
+    )
+    merged = time.perf_counter() - started
+    exact = np.quantile(scores, [0.5, 0.9, 0.99])
+    print(f"merge of all partitions: {merged * 1000:.1f}ms")
+    for label, e, x in zip(
+        ["p50", "p90", "p99"], estimated, exact
+    ):
+        print(f"{label}: sketch {e:.3f}, exact {x:.3f}")
+
+
+if __name__ == "__main__":
+    measure_accuracy()
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Synthetic item rows shared by the benchmarks."""
+
+import numpy as np
+
+URGENCIES = ["Routine", "Critical", "AOG"]
+SEGMENTS = ["Airframe", "Cabin", "Engine", "Landing Gear"]
+
+
+def synthetic_rows(count: int) -> list[dict]:
+    """`count` rows over 20k PNs, 300 aircraft and 5 years.
+
+    Strings are built per row, with one object per cell, the way a
+    parsed sheet produces them.
+    """
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "pn": f"PN{i % 20000:05d}",
+            "description": f"Part {i % 20000}",
+            "quantite_moyenne": float(rng.random() * 20),
+            "nombre_visites": int(i % 7),
+            "frequence_totale": int(i % 50),
+            "frequence_nrc": int(i % 11),
+            "frequence_aog": int(i % 5),
+            "percent_nrc": float(rng.random()),
+            "percent_aog": float(rng.random()),
+            "score_criticite": float(rng.random() * 100),
+            "ac_reg": "".join(["F-G", f"{i % 300:03d}"]),
+            "annee": 2020 + i % 5,
+            "urgency": "".join(URGENCIES[i % 3]),
+            "segment": "".join(SEGMENTS[i % 4]),
+            "date": f"{2020 + i % 5}-{i % 12 + 1:02d}-01",
+        }
+        for i in range(count)
+    ]
\ No newline at end of file
@@ -0,0 +1,52 @@
+import pytest
+
+URGENCIES = ["Routine", "Critical", "AOG"]
+SEGMENTS = ["Airframe", "Cabin", "Engine", "Landing Gear"]
+
+
+def item_rows(count: int, pns: int = 40) -> list[dict]:
+    """Deterministic item rows, unique on pn + ac_reg + annee.
+
+    Some part numbers hold `_`, `%` or `\\`, which a LIKE pattern
+    would treat as wildcards or escapes.
+    """
+    specials = ["AB_1", "AB%1", "AB\\1", "ab_12"]
+    rows = []
+    for i in range(count):
+        pn = (
+            specials[i // 10 % len(specials)]
+            if i % 10 == 0
+            else f"PN{i % pns:04d}1"
+        )
+        rows.append(
+            {
+                "pn": pn,
+                "description": f"Part {pn}",
+                "quantite_moyenne": float(i % 13),
+                "nombre_visites": i % 7 + 1,
+                "frequence_totale": i % 50,
+                "frequence_nrc": i % 11,
+                "frequence_aog": i % 5,
+                "percent_nrc": (i % 11) / 50,
+                "percent_aog": (i % 5) / 50,
+                "score_criticite": float((i * 37) % 101),
+                "ac_reg": f"F-G{i % 9:03d}",
+                "annee": 2020 + i % 4,
+                "urgency": URGENCIES[i % 3],
+                "segment": SEGMENTS[i % 4],
+                "date": f"{2020 + i % 4}-{i % 12 + 1:02d}-01",
+            }
+        )
+    seen = set()
+    unique = []
+    for row in rows:
+        key = (row["pn"], row["ac_reg"], row["annee"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+    return unique
+
+
+@pytest.fixture
+def rows() -> list[dict]:
+    return item_rows(600)
\ No newline at end of file
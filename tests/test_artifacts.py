@@ -0,0 +1,29 @@
+import hashlib
+import os
+
+from app.data import artifacts
+from app.data.artifacts import default_dataset_id
+
+
+def test_workbook_digest_is_computed_once_per_version(
+    tmp_path, monkeypatch
+):
+    workbook = tmp_path / "items.xlsx"
+    workbook.write_bytes(b"first")
+    digests = []
+    original = hashlib.sha1
+
+    def sha1():
+        digests.append(1)
+        return original()
+
+    monkeypatch.setattr(artifacts.hashlib, "sha1", sha1)
+    first = default_dataset_id(workbook)
+    assert default_dataset_id(workbook) == first
+    assert len(digests) == 1
+    workbook.write_bytes(b"second!")
+    os.utime(workbook, ns=(0, 10**9))
+    second = default_dataset_id(workbook)
+    assert second != first
+    assert second.startswith(artifacts.SHARED_PREFIX)
+    assert len(digests) == 2
\ No newline at end of file
@@ -0,0 +1,91 @@
+import numpy as np
+
+from app.data.chart_data import (
+    OTHER_LABEL,
+    downsample_line,
+    lttb_indices,
+    top_n_with_other,
+)
+from app.data.topk import top_k_indices
+
+
+def test_top_n_keeps_largest_and_sums_the_rest():
+    rows = [
+        {"name": f"P{i}", "value": float(i)}
+        for i in range(10)
+    ]
+    result = top_n_with_other(
+        rows, "value", max_categories=4
+    )
+    assert [row["name"] for row in result] == [
+        "P9",
+        "P8",
+        "P7",
+        OTHER_LABEL,
+    ]
+    assert result[-1]["value"] == sum(range(7))
+    assert sum(row["value"] for row in result) == sum(
+        row["value"] for row in rows
+    )
+
+
+def test_top_n_leaves_short_series_alone():
+    rows = [
+        {"name": "A", "value": 1},
+        {"name": "B", "value": 2},
+    ]
+    assert top_n_with_other(rows, "value") == rows
+
+
+def test_top_k_indices_matches_a_stable_sort():
+    values = np.array(
+        [3, 1, 3, 2, 3, 0, 2], dtype=np.float64
+    )
+    for k in range(1, len(values) + 2):
+        expected = np.argsort(-values, kind="stable")[:k]
+        assert top_k_indices(values, k).tolist() == (
+            expected.tolist()
+        )
+        expected = np.argsort(values, kind="stable")[:k]
+        assert (
+            top_k_indices(
+                values, k, descending=False
+            ).tolist()
+            == expected.tolist()
+        )
+
+
+def test_lttb_keeps_ends_and_peaks():
+    values = np.sin(np.linspace(0, 20, 5000))
+    values[1234] = 50.0
+    values[3210] = -50.0
+    kept = lttb_indices(values, 100)
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == len(values) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert {1234, 3210} <= set(kept.tolist())
+
+
+def test_lttb_keeps_short_series():
+    assert lttb_indices(np.arange(5.0), 10).tolist() == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_downsample_line_shares_the_budget():
+    rows = [
+        {"period": i, "a": float(i % 17), "b": float(i % 5)}
+        for i in range(1000)
+    ]
+    kept = downsample_line(rows, ["a", "b"], max_points=100)
+    assert len(kept) <= 100
+    assert kept[0] is rows[0] and kept[-1] is rows[-1]
+    periods = [row["period"] for row in kept]
+    assert periods == sorted(periods)
+    assert (
+        downsample_line(rows[:50], ["a"], 100) == rows[:50]
+    )
\ No newline at end of file
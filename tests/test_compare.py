@@ -0,0 +1,78 @@
+import pytest
+
+from app.data.compare import comparison
+from app.data.dataset import Dataset
+from app.data.registry import (
+    register_dataset,
+    release_dataset,
+)
+
+
+@pytest.fixture
+def compared(rows):
+    """Comparison of `rows` with a changed copy of them."""
+    previous = Dataset.from_records(rows)
+    removed = {row["pn"] for row in rows[:40:10]}
+    current_rows = [
+        {
+            **row,
+            "urgency": (
+                "AOG"
+                if row["ac_reg"] == "F-G001"
+                else row["urgency"]
+            ),
+        }
+        for row in rows
+        if row["pn"] not in removed
+    ]
+    current_rows.append(
+        {**rows[1], "pn": "NEW1", "score_criticite": 99.0}
+    )
+    current = Dataset.from_records(current_rows)
+    ids = [
+        register_dataset(dataset, publish=False)
+        for dataset in (previous, current)
+    ]
+    yield comparison(ids[1], 1, (), ids[0], 1, 100), removed
+    for dataset_id in ids:
+        release_dataset(dataset_id)
+
+
+def test_comparison_lists_removed_parts(compared):
+    result, removed = compared
+    assert result["summary"]["removed"] == len(
+        result["removed"]
+    )
+    assert {
+        row["pn"] for row in result["removed"]
+    } == removed
+    assert all(
+        row["current_score"] == ""
+        and row["status"] == "Retirée"
+        for row in result["removed"]
+    )
+    scores = [
+        float(row["previous_score"])
+        for row in result["removed"]
+    ]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_comparison_lists_urgency_changes(compared):
+    result, _ = compared
+    changed = result["urgency_changed"]
+    assert changed
+    assert result["summary"]["urgency_changed"] == len(
+        changed
+    )
+    assert all(
+        row["ac_reg"] == "F-G001"
+        and row["urgency"].endswith("→ AOG")
+        for row in changed
+    )
+
+
+def test_comparison_lists_new_parts(compared):
+    result, _ = compared
+    assert [row["pn"] for row in result["new"]] == ["NEW1"]
+    assert result["new"][0]["previous_score"] == ""
\ No newline at end of file
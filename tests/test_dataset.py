@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.aggregates import register_summaries
+from app.data.dataset import (
+    ENCODED_COLUMNS,
+    POSTING_COLUMNS,
+    Dataset,
+)
+from app.data.schema import ITEM_COLUMNS, KEY_COLUMNS
+from app.data.sketches import SKETCH_COLUMN
+
+
+def _key(row) -> tuple:
+    return tuple(row[col] for col in KEY_COLUMNS)
+
+
+@pytest.fixture
+def merged(rows):
+    """A dataset upserted with a delta, and one built from the result."""
+    delta = [
+        {
+            **row,
+            "score_criticite": row["score_criticite"] + 0.5,
+            "urgency": "AOG",
+            "segment": "Cabin",
+        }
+        for row in rows[::7]
+    ]
+    delta += [
+        {**row, "ac_reg": "F-NEW01", "annee": 2030}
+        for row in rows[:25]
+    ]
+    delta.append({**delta[0], "score_criticite": 1.0})
+    expected = {_key(row): row for row in rows}
+    expected.update((_key(row), row) for row in delta)
+    upserted = Dataset.from_records(rows)
+    register_summaries(upserted)
+    change = upserted.upsert(
+        pd.DataFrame(delta, columns=ITEM_COLUMNS)
+    )
+    rebuilt = Dataset.from_records(list(expected.values()))
+    register_summaries(rebuilt)
+    return upserted, rebuilt, change
+
+
+def _row_keys(dataset: Dataset, positions) -> list[tuple]:
+    return sorted(
+        zip(
+            *(
+                dataset.column(col)[positions].tolist()
+                for col in KEY_COLUMNS
+            )
+        )
+    )
+
+
+def test_upsert_counts_inserted_and_updated(rows, merged):
+    upserted, rebuilt, change = merged
+    assert len(change.inserted) == 25
+    assert len(change.updated) == len(rows[::7])
+    assert len(upserted) == len(rebuilt)
+    assert upserted.version == 2
+
+
+def test_upsert_matches_a_rebuild(merged):
+    upserted, rebuilt, _ = merged
+
+    def rows_of(dataset: Dataset) -> list[tuple]:
+        return sorted(
+            zip(
+                *(
+                    dataset.column(col).tolist()
+                    for col in ITEM_COLUMNS
+                )
+            )
+        )
+
+    assert rows_of(upserted) == rows_of(rebuilt)
+
+
+def test_upsert_patches_indexes_like_a_rebuild(merged):
+    upserted, rebuilt, _ = merged
+    for col in ENCODED_COLUMNS:
+        assert sorted(
+            upserted.distinct_values(col), key=str
+        ) == sorted(rebuilt.distinct_values(col), key=str)
+    for col in POSTING_COLUMNS:
+        name = f"postings_{col}"
+        values = set(upserted.derived(name).postings) | set(
+            rebuilt.derived(name).postings
+        )
+        for value in values:
+            assert _row_keys(
+                upserted,
+                upserted.derived(name).positions(value),
+            ) == _row_keys(
+                rebuilt,
+                rebuilt.derived(name).positions(value),
+            )
+
+
+@pytest.mark.parametrize(
+    "group_column, filter_column, filter_value",
+    [
+        ("pn", None, None),
+        ("ac_reg", None, None),
+        ("pn", "urgency", "AOG"),
+        ("annee", "ac_reg", "F-NEW01"),
+    ],
+)
+def test_upsert_patches_grouped_sums_like_a_rebuild(
+    merged, group_column, filter_column, filter_value
+):
+    upserted, rebuilt, _ = merged
+
+    def sums(dataset: Dataset) -> dict:
+        groups, counts, values = dataset.derived(
+            f"sums_{group_column}"
+        ).groups(filter_column, filter_value)
+        return {
+            group: (
+                int(counts[i]),
+                *(
+                    round(float(values[col][i]), 6)
+                    for col in sorted(values)
+                ),
+            )
+            for i, group in enumerate(groups.tolist())
+        }
+
+    assert sums(upserted) == sums(rebuilt)
+
+
+def test_upsert_patches_sketches_like_a_rebuild(merged):
+    upserted, rebuilt, _ = merged
+    name = f"sketches_{SKETCH_COLUMN}"
+    for equalities in [
+        {},
+        {"urgency": "AOG"},
+        {"annee": 2030},
+    ]:
+        patched = upserted.derived(name).sketch(equalities)
+        built = rebuilt.derived(name).sketch(equalities)
+        assert patched.count == built.count
+        assert patched.minimum == built.minimum
+        assert patched.maximum == built.maximum
+        np.testing.assert_allclose(
+            patched.quantiles([0.1, 0.5, 0.9]),
+            built.quantiles([0.1, 0.5, 0.9]),
+            atol=1.0,
+        )
+
+
+def test_upsert_rebuilds_only_changed_partitions(rows):
+    dataset = Dataset.from_records(rows)
+    register_summaries(dataset)
+    name = f"sketches_{SKETCH_COLUMN}"
+    sketches = dataset.derived(name)
+    before = dict(sketches.partitions)
+    unchanged = rows[1::50]
+    moved = [
+        {
+            **row,
+            "urgency": (
+                "Routine"
+                if row["urgency"] == "AOG"
+                else "AOG"
+            ),
+        }
+        for row in rows[2::50]
+    ]
+    dataset.upsert(
+        pd.DataFrame(
+            unchanged + moved, columns=ITEM_COLUMNS
+        )
+    )
+    rebuilt = Dataset.from_records(
+        [row for row in rows if row not in rows[2::50]]
+        + moved
+    )
+    register_summaries(rebuilt)
+    expected = rebuilt.derived(name).partitions
+    assert set(sketches.partitions) >= set(expected)
+    for key, sketch in sketches.partitions.items():
+        built = expected.get(key)
+        assert sketch.count == (built.count if built else 0)
+        if built:
+            assert sketch.minimum == built.minimum
+            assert sketch.maximum == built.maximum
+    touched = {
+        (row["urgency"], row["ac_reg"], row["annee"])
+        for row in rows[2::50] + moved
+    }
+    assert all(
+        sketches.partitions[key] is sketch
+        for key, sketch in before.items()
+        if key not in touched
+    )
\ No newline at end of file
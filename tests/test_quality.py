@@ -0,0 +1,87 @@
+import warnings
+
+import pandas as pd
+
+from app.data.ingest import (
+    parse_and_prepare_df,
+    parse_dates,
+)
+from app.data.quality import QualityReport, format_rate
+from app.data.schema import COLUMN_MAPPING
+
+
+def _sheet(rows) -> pd.DataFrame:
+    """Rows under the workbook's French headers."""
+    french = {
+        internal: original
+        for original, internal in COLUMN_MAPPING.items()
+    }
+    return pd.DataFrame(rows).rename(columns=french)
+
+
+def test_issues_carry_their_share_of_rows(rows):
+    sheet = rows[:80]
+    sheet[0] = {**sheet[0], "percent_aog": 2.0}
+    for i in (1, 2, 3, 4):
+        sheet[i] = {**sheet[i], "frequence_totale": "n/a"}
+    report = QualityReport()
+    _, error = parse_and_prepare_df(
+        _sheet(sheet), quality=report
+    )
+    assert error is None
+    assert report.rows_read == 80
+    issues = {
+        (issue["issue"], issue["column"]): issue
+        for issue in report.issues
+    }
+    coerced = issues[
+        ("Valeurs non converties", "frequence_totale")
+    ]
+    assert coerced["count"] == "4"
+    assert coerced["rate"] == "5,0 %"
+    out_of_range = issues[
+        ("Taux hors de [0, 1]", "percent_aog")
+    ]
+    assert out_of_range["rate"] == format_rate(1 / 80)
+    data = report.to_dict()
+    assert data["rows_read"] == 80
+    assert all("rate" in issue for issue in data["issues"])
+    assert QualityReport.from_dict(data) == report
+
+
+def test_format_rate():
+    assert format_rate(0.125) == "12,5 %"
+    assert format_rate(1.0) == "100,0 %"
+
+
+def test_dates_in_both_forms_parse_without_warnings(
+    rows,
+):
+    dates = [
+        "2021-03-04",
+        "2021-03-04 10:30:00",
+        pd.Timestamp("2021-03-04"),
+        "04/03/2021",
+        "24/12/2021",
+        "pas une date",
+        None,
+    ]
+    sheet = [
+        {**row, "date": date}
+        for row, date in zip(rows, dates)
+    ]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df, error = parse_and_prepare_df(_sheet(sheet))
+        parsed = parse_dates(pd.Series(dates[:5]))
+    assert error is None
+    assert df["date"].tolist() == [
+        "2021-03-04",
+        "2021-03-04",
+        "2021-03-04",
+        "2021-03-04",
+        "2021-12-24",
+        "",
+        "",
+    ]
+    assert parsed.notna().all()
\ No newline at end of file
@@ -0,0 +1,148 @@
+import pandas as pd
+import pytest
+
+from app.data import store as store_module
+from app.data.dataset import Dataset
+from app.data.query import (
+    Aggregate,
+    NumpyExecutor,
+    QueryPlan,
+    SQLExecutor,
+    filter_predicates,
+    select_columns,
+)
+from app.data.registry import (
+    register_dataset,
+    release_dataset,
+)
+from app.data.store import STORE_PATH_ENV, AnalyticalStore
+
+
+@pytest.fixture
+def backends(rows, tmp_path):
+    """The same rows in memory and in a SQLite store."""
+    dataset = Dataset.from_records(rows)
+    dataset_id = register_dataset(dataset, publish=False)
+    store = AnalyticalStore(str(tmp_path / "store.db"))
+    stored_id = store.ingest(pd.DataFrame(rows))
+
+    def numpy_run(plan: QueryPlan):
+        return NumpyExecutor().execute(
+            dataset_id, dataset.version, plan.normalized()
+        )
+
+    def sql_run(plan: QueryPlan):
+        return SQLExecutor(store).execute(
+            stored_id, 1, plan.normalized()
+        )
+
+    yield numpy_run, sql_run
+    release_dataset(dataset_id)
+
+
+def _keys(rows) -> list[tuple]:
+    return sorted(
+        (row["pn"], row["ac_reg"], row["annee"])
+        for row in rows
+    )
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"pn": "_1"},
+        {"pn": "%"},
+        {"pn": "\\"},
+        {"pn": "AB_"},
+        {"pn": "pn00"},
+        {"urgency": "AOG", "min_score": 50},
+        {"ac_reg": "F-G003", "annee": "2021"},
+        {"pn": "1", "urgency": "Critical"},
+    ],
+)
+def test_sql_and_numpy_select_the_same_rows(
+    backends, filters
+):
+    numpy_run, sql_run = backends
+    plan = QueryPlan(
+        predicates=filter_predicates(**filters),
+        columns=("pn", "ac_reg", "annee"),
+    )
+    assert _keys(sql_run(plan)) == _keys(numpy_run(plan))
+
+
+def test_contains_matches_wildcards_literally(backends):
+    plan = QueryPlan(
+        predicates=filter_predicates(pn="_1"),
+        columns=("pn", "ac_reg", "annee"),
+    )
+    for run in backends:
+        assert {row["pn"] for row in run(plan)} == {
+            "AB_1",
+            "ab_12",
+        }
+
+
+def test_sql_and_numpy_aggregate_the_same(backends):
+    numpy_run, sql_run = backends
+    plan = QueryPlan(
+        predicates=filter_predicates(pn="%", min_score=10),
+        group_by="urgency",
+        aggregates=(
+            Aggregate("count", alias="count"),
+            Aggregate("sum", "score_criticite", "total"),
+        ),
+    )
+
+    def grouped(rows):
+        return {
+            row["urgency"]: (
+                int(row["count"]),
+                round(float(row["total"]), 6),
+            )
+            for row in rows
+        }
+
+    assert grouped(sql_run(plan)) == grouped(
+        numpy_run(plan)
+    )
+
+
+@pytest.mark.parametrize("stored", [False, True])
+def test_select_columns_ignores_pn_case(
+    rows, tmp_path, monkeypatch, stored
+):
+    if stored:
+        store = AnalyticalStore(str(tmp_path / "store.db"))
+        monkeypatch.setenv(STORE_PATH_ENV, store.path)
+        monkeypatch.setattr(store_module, "_store", store)
+        dataset_id, version = (
+            store.ingest(pd.DataFrame(rows)),
+            1,
+        )
+    else:
+        dataset = Dataset.from_records(rows)
+        dataset_id = register_dataset(
+            dataset, publish=False
+        )
+        version = dataset.version
+    expected = [
+        row["pn"]
+        for row in rows
+        if "pn00" in row["pn"].lower()
+    ]
+    try:
+        for pn in ("PN00", "pn00", "Pn00"):
+            selected = select_columns(
+                dataset_id,
+                version,
+                filter_predicates(pn=pn),
+                ("pn",),
+            )["pn"]
+            assert sorted(selected.tolist()) == sorted(
+                expected
+            )
+    finally:
+        if not stored:
+            release_dataset(dataset_id)
\ No newline at end of file
@@ -0,0 +1,283 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.aggregates import register_summaries
+from app.data.dataset import (
+    ENCODED_COLUMNS,
+    POSTING_COLUMNS,
+    Dataset,
+    is_mapped,
+)
+from app.data import registry
+from app.data.registry import (
+    SUMMARY_ARRAYS_FILE,
+    read_dataset,
+    write_dataset,
+)
+from app.data.schema import ITEM_COLUMNS, STORED_COLUMNS
+from app.data.sketches import SKETCH_COLUMN
+
+
+@pytest.fixture
+def published(rows, tmp_path):
+    dataset = Dataset.from_records(rows)
+    write_dataset(dataset, tmp_path / "v1")
+    return dataset, tmp_path / "v1"
+
+
+def _columns(dataset: Dataset) -> dict:
+    return {
+        col: dataset.column(col).tolist()
+        for col in STORED_COLUMNS
+    }
+
+
+def test_reopened_dataset_maps_its_indexes(published):
+    dataset, directory = published
+    reopened = read_dataset(
+        directory, dataset.dataset_id, dataset.version
+    )
+    assert sorted(reopened.derived_indexes()) == sorted(
+        dataset.derived_indexes()
+    )
+    for col in ENCODED_COLUMNS:
+        assert is_mapped(reopened.encoding(col).codes(1))
+    for col in POSTING_COLUMNS:
+        postings = reopened.derived(
+            f"postings_{col}"
+        ).postings
+        assert all(is_mapped(p) for p in postings.values())
+        assert postings.keys() == (
+            dataset.derived(
+                f"postings_{col}"
+            ).postings.keys()
+        )
+    assert reopened.resident_bytes() < 0.1 * (
+        dataset.resident_bytes()
+    )
+
+
+def test_reopened_dataset_reads_the_same_rows(published):
+    dataset, directory = published
+    reopened = read_dataset(
+        directory, dataset.dataset_id, dataset.version
+    )
+    positions = np.array([3, 0, len(dataset) - 1])
+    assert (
+        reopened.records(positions).to_dicts()
+        == dataset.records(positions).to_dicts()
+    )
+    assert _columns(reopened) == _columns(dataset)
+
+
+def test_upsert_after_reopening(rows, published):
+    dataset, directory = published
+    reopened = read_dataset(
+        directory, dataset.dataset_id, dataset.version
+    )
+    delta = pd.DataFrame(
+        [
+            {**rows[0], "score_criticite": 99.5},
+            {**rows[1], "ac_reg": "F-NEW01"},
+        ],
+        columns=ITEM_COLUMNS,
+    )
+    for target in (dataset, reopened):
+        change = target.upsert(delta)
+        assert len(change.updated) == 1
+        assert len(change.inserted) == 1
+    assert _columns(reopened) == _columns(dataset)
+    for col in POSTING_COLUMNS:
+        for value, positions in dataset.derived(
+            f"postings_{col}"
+        ).postings.items():
+            assert np.array_equal(
+                reopened.derived(
+                    f"postings_{col}"
+                ).positions(value),
+                positions,
+            )
+    name = f"sketches_{SKETCH_COLUMN}"
+    assert (
+        reopened.derived(name).sketch({}).count
+        == dataset.derived(name).sketch({}).count
+    )
+
+
+def test_reads_the_previous_format(published):
+    dataset, directory = published
+    for path in directory.iterdir():
+        if (
+            path.name.endswith(
+                (
+                    "postings.npy",
+                    "bounds.npy",
+                    "summaries.json",
+                    "summaries.npz",
+                )
+            )
+            or path.name == "annee.codes.npy"
+        ):
+            path.unlink()
+    meta = json.loads((directory / "meta.json").read_text())
+    del meta["format"]
+    (directory / "meta.json").write_text(json.dumps(meta))
+    reopened = read_dataset(
+        directory, dataset.dataset_id, dataset.version
+    )
+    register_summaries(reopened)
+    assert sorted(reopened.derived_indexes()) == sorted(
+        dataset.derived_indexes()
+    )
+    assert _columns(reopened) == _columns(dataset)
+
+
+def test_summaries_round_trip_without_pickle(published):
+    dataset, directory = published
+    reopened = read_dataset(
+        directory, dataset.dataset_id, dataset.version
+    )
+    for name in ("sums_pn", "sums_annee"):
+        for filter_column, value in [
+            (None, None),
+            ("urgency", "AOG"),
+        ]:
+            groups, counts, sums = dataset.derived(
+                name
+            ).groups(filter_column, value)
+            (
+                reopened_groups,
+                reopened_counts,
+                reopened_sums,
+            ) = reopened.derived(name).groups(
+                filter_column, value
+            )
+            assert (
+                reopened_groups.tolist() == groups.tolist()
+            )
+            assert np.array_equal(reopened_counts, counts)
+            for col, values in sums.items():
+                assert np.array_equal(
+                    reopened_sums[col], values
+                )
+    name = f"sketches_{SKETCH_COLUMN}"
+    partitions = dataset.derived(name).partitions
+    reopened_partitions = reopened.derived(name).partitions
+    assert reopened_partitions.keys() == partitions.keys()
+    for key, sketch in partitions.items():
+        assert np.array_equal(
+            reopened_partitions[key].means, sketch.means
+        )
+        assert (
+            reopened_partitions[key].maximum
+            == sketch.maximum
+        )
+
+
+def test_pickled_summaries_are_not_loaded(published):
+    dataset, directory = published
+    np.savez(
+        directory / SUMMARY_ARRAYS_FILE,
+        **{"sums_pn.total.counts": np.array([object()])},
+    )
+    reopened = read_dataset(
+        directory, dataset.dataset_id, dataset.version
+    )
+    assert not reopened.has_derived("sums_pn")
+    assert _columns(reopened) == _columns(dataset)
+
+
+def test_foreign_directory_is_not_read(
+    published, monkeypatch
+):
+    dataset, directory = published
+    monkeypatch.setattr(
+        registry.os, "getuid", lambda: -1, raising=False
+    )
+    assert (
+        read_dataset(
+            directory, dataset.dataset_id, dataset.version
+        )
+        is None
+    )
+
+
+def test_collect_garbage_sweeps_dataset_staging(
+    rows, tmp_path, monkeypatch
+):
+    monkeypatch.setenv(
+        registry.DATASET_DIR_ENV, str(tmp_path)
+    )
+    dataset = Dataset.from_records(rows)
+    directory = tmp_path / dataset.dataset_id
+    write_dataset(dataset, directory / "v1")
+    (directory / registry.LAST_USED_FILE).touch()
+    stale = directory / ".staging-crashed"
+    fresh = directory / ".staging-writing"
+    for staging in (stale, fresh):
+        staging.mkdir()
+        (staging / "score_criticite.npy").write_bytes(b"")
+    os.utime(stale, (0, 0))
+    assert (
+        registry.collect_garbage(max_idle_seconds=60) == 1
+    )
+    assert not stale.exists()
+    assert fresh.exists()
+    assert (directory / "v1" / "meta.json").exists()
+
+
+def test_publish_links_unchanged_columns(
+    rows, tmp_path, monkeypatch
+):
+    monkeypatch.setenv(
+        registry.DATASET_DIR_ENV, str(tmp_path)
+    )
+    dataset = Dataset.from_records(rows)
+    registry.register_dataset(dataset)
+    dataset.replace_columns(
+        {"score_criticite": np.zeros(len(dataset))}
+    )
+    dataset.upsert(
+        pd.DataFrame(
+            [{**rows[0], "percent_aog": 0.75}],
+            columns=ITEM_COLUMNS,
+        )
+    )
+    registry.publish_dataset(dataset)
+    first, last = (
+        tmp_path / dataset.dataset_id / f"v{version}"
+        for version in (1, dataset.version)
+    )
+
+    def shared(name: str) -> bool:
+        return (first / name).stat().st_ino == (
+            last / name
+        ).stat().st_ino
+
+    assert not shared("score_criticite.npy")
+    assert not shared("percent_aog.npy")
+    assert shared("pn.codes.npy")
+    assert shared("urgency.postings.npy")
+    assert shared("percent_nrc.npy")
+    reopened = read_dataset(
+        last, dataset.dataset_id, dataset.version
+    )
+    assert _columns(reopened) == _columns(dataset)
+    dataset.upsert(
+        pd.DataFrame(
+            [{**rows[0], "ac_reg": "F-NEW01"}],
+            columns=ITEM_COLUMNS,
+        )
+    )
+    registry.publish_dataset(dataset)
+    assert (
+        tmp_path
+        / dataset.dataset_id
+        / f"v{dataset.version}"
+        / "pn.codes.npy"
+    ).stat().st_ino != (last / "pn.codes.npy").stat().st_ino
+    registry.release_dataset(dataset.dataset_id)
\ No newline at end of file
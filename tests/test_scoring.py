@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.aggregates import register_summaries
+from app.data.dataset import Dataset
+from app.data.schema import KEY_COLUMNS
+from app.data.query import filter_predicates
+from app.data.registry import (
+    register_dataset,
+    release_dataset,
+)
+from app.data.scoring import (
+    SCORE_INPUTS,
+    ScoreWeights,
+    criticality_scores,
+    scoring_columns,
+    what_if,
+)
+from app.data.sketches import SKETCH_COLUMN
+from app.data.store import AnalyticalStore
+
+WEIGHTS = ScoreWeights(aog=1.0, nrc=0.0, quantity=4.0)
+SCORED_COLUMNS = (
+    "percent_nrc",
+    "percent_aog",
+    "score_criticite",
+)
+
+
+def _rescored(rows) -> list[dict]:
+    scores = criticality_scores(
+        {
+            col: np.asarray(
+                [row[col] for row in rows], dtype=np.float64
+            )
+            for col in SCORE_INPUTS
+        },
+        WEIGHTS,
+    )
+    return [
+        {
+            **row,
+            **{
+                col: float(scores[col][i])
+                for col in SCORED_COLUMNS
+            },
+        }
+        for i, row in enumerate(rows)
+    ]
+
+
+def _scores_by_key(columns) -> dict[tuple, tuple]:
+    return {
+        key: tuple(round(value, 9) for value in scores)
+        for key, scores in zip(
+            zip(*(columns[col] for col in KEY_COLUMNS)),
+            zip(*(columns[col] for col in SCORED_COLUMNS)),
+        )
+    }
+
+
+def test_replace_columns_matches_a_rebuild(rows):
+    dataset = Dataset.from_records(rows)
+    register_summaries(dataset)
+    dataset.replace_columns(
+        criticality_scores(
+            {
+                col: dataset.column(col)
+                for col in SCORE_INPUTS
+            },
+            WEIGHTS,
+        )
+    )
+    rebuilt = Dataset.from_records(_rescored(rows))
+    register_summaries(rebuilt)
+    assert dataset.version == 2
+    assert _scores_by_key(
+        {
+            col: dataset.column(col).tolist()
+            for col in (*KEY_COLUMNS, *SCORED_COLUMNS)
+        }
+    ) == _scores_by_key(
+        {
+            col: rebuilt.column(col).tolist()
+            for col in (*KEY_COLUMNS, *SCORED_COLUMNS)
+        }
+    )
+    _, _, sums = dataset.derived("sums_pn").groups(
+        None, None
+    )
+    _, _, expected = rebuilt.derived("sums_pn").groups(
+        None, None
+    )
+    assert sums["score_criticite"].sum() == pytest.approx(
+        expected["score_criticite"].sum()
+    )
+    name = f"sketches_{SKETCH_COLUMN}"
+    assert (
+        dataset.derived(name).sketch({}).maximum
+        == rebuilt.derived(name).sketch({}).maximum
+    )
+
+
+def test_replace_columns_keeps_upserting(rows):
+    dataset = Dataset.from_records(rows[:100])
+    dataset.replace_columns(
+        {"score_criticite": np.zeros(len(dataset))}
+    )
+    change = dataset.upsert(pd.DataFrame(rows[100:]))
+    assert len(change.inserted) == len(rows) - 100
+    assert (
+        dataset.column("score_criticite")[:100].sum() == 0
+    )
+
+
+def test_replace_columns_rejects_keys_and_strings(rows):
+    dataset = Dataset.from_records(rows)
+    for col in ("annee", "urgency"):
+        with pytest.raises(ValueError):
+            dataset.replace_columns(
+                {col: dataset.column(col)}
+            )
+
+
+def test_store_replace_columns_matches_numpy(
+    rows, tmp_path
+):
+    store = AnalyticalStore(str(tmp_path / "store.db"))
+    dataset_id = store.ingest(pd.DataFrame(rows))
+    count = store.replace_columns(
+        dataset_id,
+        SCORE_INPUTS,
+        lambda columns: criticality_scores(
+            columns, WEIGHTS
+        ),
+    )
+    assert count == len(rows)
+    assert store.version(dataset_id) == 2
+    stored = store.query(
+        f"SELECT {', '.join((*KEY_COLUMNS, *SCORED_COLUMNS))} "
+        "FROM items WHERE dataset_id = ?",
+        [dataset_id],
+    )
+    rescored = _rescored(rows)
+    assert _scores_by_key(
+        dict(
+            zip(
+                (*KEY_COLUMNS, *SCORED_COLUMNS),
+                zip(*stored),
+            )
+        )
+    ) == _scores_by_key(
+        {
+            col: [row[col] for row in rescored]
+            for col in (*KEY_COLUMNS, *SCORED_COLUMNS)
+        }
+    )
+
+
+def test_what_if_under_an_upper_case_pn_filter(rows):
+    dataset = Dataset.from_records(rows)
+    dataset_id = register_dataset(dataset, publish=False)
+    expected = sum(
+        "pn00" in row["pn"].lower() for row in rows
+    )
+    try:
+        result = what_if(
+            scoring_columns(
+                dataset_id,
+                dataset.version,
+                filter_predicates(pn="PN00"),
+            ),
+            WEIGHTS,
+            10,
+        )
+    finally:
+        release_dataset(dataset_id)
+    assert expected
+    assert result["rows"] == expected
+    assert len(result["top"]) == min(expected, 10)
\ No newline at end of file
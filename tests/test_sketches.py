@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from app.data.aggregates import register_summaries
+from app.data.dataset import Dataset
+from app.data.sketches import SKETCH_COLUMN, QuantileSketch
+
+QS = [0.01, 0.1, 0.5, 0.9, 0.99]
+
+
+@pytest.fixture
+def scores() -> np.ndarray:
+    return np.random.default_rng(0).gamma(2.0, 10.0, 50_000)
+
+
+def test_percentiles_close_to_exact(scores):
+    sketch = QuantileSketch.from_values(scores)
+    assert sketch.count == len(scores)
+    assert len(sketch.means) < 200
+    np.testing.assert_allclose(
+        sketch.quantiles(QS),
+        np.quantile(scores, QS),
+        rtol=0.01,
+    )
+
+
+def test_merged_sketch_matches_whole(scores):
+    parts = np.array_split(scores, 37)
+    merged = QuantileSketch.merge(
+        [QuantileSketch.from_values(part) for part in parts]
+    )
+    assert merged.count == len(scores)
+    assert merged.minimum == scores.min()
+    assert merged.maximum == scores.max()
+    np.testing.assert_allclose(
+        merged.quantiles(QS),
+        np.quantile(scores, QS),
+        rtol=0.01,
+    )
+
+
+def test_quantiles_above_lower_bound(scores):
+    sketch = QuantileSketch.from_values(scores)
+    kept = scores[scores >= 20.0]
+    np.testing.assert_allclose(
+        sketch.quantiles([0.5, 0.9], lower=20.0),
+        np.quantile(kept, [0.5, 0.9]),
+        rtol=0.01,
+    )
+
+
+def test_quantiles_above_the_maximum(scores):
+    sketch = QuantileSketch.from_values(scores)
+    assert sketch.quantiles(
+        [0.5, 0.99], lower=sketch.maximum + 1
+    ) == [0.0, 0.0]
+    assert sketch.quantiles(
+        [0.5], lower=sketch.maximum
+    ) == pytest.approx([sketch.maximum])
+
+
+def test_histogram_keeps_every_value():
+    values = np.array([1.0, 2.0, 2.0, 7.5, 9.0])
+    sketch = QuantileSketch.from_values(values)
+    counts = sketch.histogram(np.linspace(0, 10, 6))
+    assert counts.tolist() == [1, 2, 0, 1, 1]
+
+
+def test_empty_sketch():
+    sketch = QuantileSketch.from_values(np.array([]))
+    assert sketch.count == 0
+    assert sketch.quantiles([0.5]) == [0.0]
+    assert QuantileSketch.merge([sketch]).count == 0
+
+
+def test_partition_sketches_follow_filters(rows):
+    dataset = Dataset.from_records(rows)
+    register_summaries(dataset)
+    sketches = dataset.derived(f"sketches_{SKETCH_COLUMN}")
+    urgency = dataset.column("urgency")
+    annee = dataset.column("annee")
+    selected = dataset.column(SKETCH_COLUMN)[
+        (urgency == "AOG") & (annee == 2021)
+    ]
+    sketch = sketches.sketch(
+        {"urgency": "AOG", "annee": 2021}
+    )
+    assert sketch.count == len(selected)
+    assert sketch.minimum == selected.min()
+    assert sketch.maximum == selected.max()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from app.data.aggregates import register_summaries
+from app.data.dataset import Dataset
+from app.data.query import (
+    NumpyExecutor,
+    QueryPlan,
+    filter_predicates,
+)
+from app.data.registry import (
+    register_dataset,
+    release_dataset,
+)
+from app.data.report import build_report
+from app.data.views import invalidate_views, view
+
+
+@pytest.fixture
+def viewed(rows):
+    """A dataset with its summaries and a runner of its plans."""
+    dataset = Dataset.from_records(rows)
+    register_summaries(dataset)
+    dataset_id = register_dataset(dataset, publish=False)
+
+    def run(plan: QueryPlan):
+        return NumpyExecutor().execute(
+            dataset_id, dataset.version, plan.normalized()
+        )
+
+    yield dataset_id, dataset.version, run
+    invalidate_views(dataset_id)
+    release_dataset(dataset_id)
+
+
+def test_views_ignore_pn_case(rows, viewed):
+    dataset_id, version, run = viewed
+    scores = [
+        row["score_criticite"]
+        for row in rows
+        if "pn00" in row["pn"].lower()
+    ]
+    predicates = filter_predicates(pn="PN00")
+
+    def get(name: str):
+        return view(
+            name, dataset_id, version, run, predicates
+        )
+
+    assert get("filtered_count") == len(scores)
+    percentiles = get("score_percentiles")
+    assert percentiles[
+        "median_score_criticite"
+    ] == pytest.approx(np.median(scores), abs=1.0)
+    assert percentiles["p99_score_criticite"] > 0
+    assert sum(
+        bar["Lignes"] for bar in get("score_histogram")
+    ) == len(scores)
+
+
+def test_report_of_raw_predicates(rows, viewed):
+    dataset_id, version, run = viewed
+    report = build_report(
+        dataset_id,
+        version,
+        run,
+        filter_predicates(pn="PN00", min_score=0),
+    )
+    assert report["kpis"]["filtered_count"] > 0
+    assert report["kpis"]["median_score_criticite"] > 0
+    assert report["series"]["score_histogram"]
+
+
+@pytest.mark.parametrize("min_score", [101, 1000])
+def test_percentiles_of_no_rows(viewed, min_score):
+    dataset_id, version, run = viewed
+    predicates = filter_predicates(min_score=min_score)
+    assert (
+        view(
+            "filtered_count",
+            dataset_id,
+            version,
+            run,
+            predicates,
+        )
+        == 0
+    )
+    assert set(
+        view(
+            "score_percentiles",
+            dataset_id,
+            version,
+            run,
+            predicates,
+        ).values()
+    ) == {0.0}
\ No newline at end of file